@@ -1,7 +1,9 @@
-from bento_transforms import Converter
+from bento_transforms.converters.registry import ConverterRegistry
 
-ccdi_to_gc_converter = Converter(from=('CCDI', '1.6.0'),
-                                 to=('GC', '10.0.1'))
+# crosswalk files, each converting between a pair of model versions
+registry = ConverterRegistry("ccdi_1.6.0_to_ccdi_3.1.0.yaml",
+                             "ccdi_3.1.0_to_cds_10.0.0.yaml",
+                             "cds_10.0.0_to_gc_10.0.1.yaml")
 
-
-    
+ccdi_to_gc_converter = registry.converter(('CCDI', '1.6.0'),
+                                          ('GC', '10.0.1'))
@@ -0,0 +1,66 @@
+"""
+bento_transforms.cli
+
+The `bento-transforms` command line:
+
+    bento-transforms convert -t transforms.yaml -o outdir participant.tsv ...
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from typing import List
+from .converters.converter import BACKENDS, Converter
+from .converters.parallel import ParallelConverter
+from .manifests.tsv import convert_tsv_files
+from .mdf.reader import TransformReader
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="bento-transforms")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cvt = sub.add_parser("convert",
+                         help="convert loading files, one per source node, "
+                         "to one TSV per target node")
+    cvt.add_argument("files", nargs="+", help="source node TSV files")
+    cvt.add_argument("-t", "--transforms", action="append", required=True,
+                     help="MDF-Transform YAML file (may be repeated)")
+    cvt.add_argument("-o", "--outdir", required=True,
+                     help="directory for target node TSV files")
+    cvt.add_argument("--mdf-schema", help="MDF schema file for validation")
+    cvt.add_argument("--cache-dir",
+                     help="cache parsed transform files in this directory")
+    cvt.add_argument("--backend", choices=list(BACKENDS), default="reference")
+    cvt.add_argument("--csv", action="store_true",
+                     help="source files are comma-separated "
+                          "(output files are always TSV)")
+    cvt.add_argument("--buffer-rows", type=int, default=10000,
+                     help="rows buffered per target node between writes")
+    cvt.add_argument("--workers", type=int, default=0,
+                     help="convert in this many worker processes")
+    cvt.add_argument("--chunk-size", type=int, default=10000,
+                     help="records per worker chunk")
+    args = parser.parse_args(argv)
+
+    tmdf = TransformReader(*args.transforms, mdf_schema=args.mdf_schema,
+                           cache_dir=args.cache_dir)
+    cvtr = Converter(tmdf=tmdf, backend=args.backend)
+    delimiter = "," if args.csv else "\t"
+    parallel = None
+    if args.workers > 0:
+        parallel = ParallelConverter(cvtr, workers=args.workers,
+                                     chunk_size=args.chunk_size)
+    try:
+        counts = convert_tsv_files(cvtr, args.files, args.outdir,
+                                   buffer_rows=args.buffer_rows,
+                                   delimiter=delimiter, parallel=parallel)
+    finally:
+        if parallel is not None:
+            parallel.close()
+    for (node, n) in counts.items():
+        print(f"{node}\t{n}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+bento_transforms.converters.batch
+
+Column-wise ("batch") execution of transform pipelines. Each transform
+step runs once over a whole column of values, rather than once per value.
+Steps that register a batch form (see bento_transforms.tflib.protocol)
+use it; other steps fall back to looping their scalar form over the column.
+
+Low-cardinality inputs are dictionary-encoded: the input column (or tuple
+of input columns) is factorized into unique values and integer codes, the
+pipeline runs only on the unique values, and the results are expanded back
+by code. By default ("auto"), this is done when the ratio of distinct values
+to rows in a sample of the input is at most DICT_ENCODE_MAX_RATIO; array
+inputs (anything with __array__) are left to the steps' vectorized forms.
+Set the `dict_encode` attribute of a batch function to True or False to
+force it on or off; forced on, NumPy arrays are factorized with np.unique,
+and array results are expanded by indexing, so they stay arrays.
+Transforms with impure steps are never dictionary-encoded.
+"""
+
+from __future__ import annotations
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+from ..tflib.protocol import get_batch_form
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# rows sampled to estimate the cardinality of input columns
+DICT_ENCODE_SAMPLE = 1024
+# dictionary-encode when (distinct values / rows) in the sample is at most this
+DICT_ENCODE_MAX_RATIO = 0.5
+
+
+def column_function(method: Callable | None, params: Any = None) -> Callable:
+    """
+    Return the column form of a transform step method: a function taking one
+    column per step input and returning the output column.
+    `method` None represents the Identity step.
+    """
+    if method is None:
+        return lambda col: col
+    batch = get_batch_form(method)
+    if batch is not None:
+        return batch if params is None else partial(batch, params=params)
+    if params is not None:
+        method = partial(method, params=params)
+
+    def loop(*columns):
+        if len(columns) == 1:
+            return [method(v) for v in columns[0]]
+        return [method(*row) for row in zip(*columns)]
+    return loop
+
+
+def create_batch_function(cfuncs: List[Callable], arglist: List[str],
+                          outlist: List[str], pure: bool = True) -> Callable:
+    """
+    Compose step column functions into the batch form of a transform function.
+    The returned function takes input columns in the same ways the scalar
+    transform function takes input values: positionally, in input order, or
+    as keyword arguments named by the `node_prop` input names. It returns the
+    output column, or for multi-output transforms, a dict of output columns
+    keyed by the `node_prop` output names.
+    Set `pure` False if any step is impure, to turn off dictionary encoding.
+    """
+    def run(columns: List[List]) -> List:
+        col = cfuncs[0](*columns)
+        for cfunc in cfuncs[1:]:
+            col = cfunc(col)
+        return col
+
+    def map_batch(*columns, **kwcolumns) -> List | Dict[str, List]:
+        if kwcolumns:
+            if columns:
+                raise RuntimeError("Provide input columns either positionally "
+                                   "or by input name, not both")
+            if not kwcolumns.keys() <= set(arglist):
+                raise RuntimeError("Invalid input. "
+                                   f"Valid input keys are '{arglist}'")
+            columns = [kwcolumns[a] for a in arglist if a in kwcolumns]
+        columns = [as_column(c) for c in columns]
+        if len({len(c) for c in columns}) > 1:
+            raise RuntimeError("Input columns must all have the same length")
+        encode = map_batch.dict_encode
+        if encode == "auto":
+            encode = (not any(hasattr(c, "__array__") for c in columns)
+                      and low_cardinality(columns))
+        factors = factorize(columns) if encode else None
+        if factors is None:
+            return split_outputs(run(columns), outlist)
+        (uniques, codes) = factors
+        ucol = run(uniques)
+        if hasattr(ucol, "__array__") and hasattr(codes, "__array__"):
+            return split_outputs(ucol[codes], outlist)
+        return split_outputs([ucol[c] for c in codes], outlist)
+
+    map_batch.dict_encode = "auto" if pure else False
+    return map_batch
+
+
+def low_cardinality(columns: List[List]) -> bool:
+    """Estimate from a sample whether input columns have few distinct values"""
+    if not columns:
+        return False
+    n = min(len(columns[0]), DICT_ENCODE_SAMPLE)
+    if n < 2:
+        return False
+    sample = columns[0][:n] if len(columns) == 1 else list(
+        zip(*[c[:n] for c in columns]))
+    try:
+        distinct = len(set(sample))
+    except TypeError:
+        return False
+    return distinct <= n * DICT_ENCODE_MAX_RATIO
+
+
+def factorize(columns: List[List]) -> Tuple[List[List], List[int]] | None:
+    """
+    Factorize input columns into columns of unique values (or unique tuples
+    of values, for several columns) in order of first appearance, and the
+    code of each row. Values are keyed with their types, so that equal
+    values of different types (1, 1.0 and True) get different codes.
+    A single NumPy array column of numbers or strings is factorized with
+    np.unique, giving sorted unique values and an array of codes.
+    Returns None if the values are unhashable.
+    """
+    if not columns:
+        return None
+    if len(columns) == 1 and np is not None and hasattr(columns[0], "__array__"):
+        factors = _factorize_array(columns[0])
+        if factors is not None:
+            return factors
+    index = {}
+    if len(columns) == 1:
+        keys = ((type(v), v) for v in columns[0])
+    else:
+        keys = ((tuple(map(type, row)), row) for row in zip(*columns))
+    try:
+        codes = [index.setdefault(k, len(index)) for k in keys]
+    except TypeError:
+        return None
+    values = [v for (_, v) in index]
+    if len(columns) == 1:
+        return ([values], codes)
+    uniques = [list(c) for c in zip(*values)] if values else [[] for c in columns]
+    return (uniques, codes)
+
+
+def _factorize_array(values: Any) -> Tuple[List, Any] | None:
+    if np.ma.isMaskedArray(values):
+        return None
+    arr = np.asarray(values)
+    if arr.ndim != 1 or arr.dtype.kind not in "biufUS":
+        return None
+    (uniques, codes) = np.unique(arr, return_inverse=True)
+    return ([uniques], codes.reshape(-1))
+
+
+def as_column(values: Any) -> List:
+    # arrays (anything with __array__) pass through for vectorized steps
+    if isinstance(values, list) or hasattr(values, "__array__"):
+        return values
+    return list(values)
+
+
+def split_outputs(col: List, outlist: List[str]) -> List | Dict[str, List]:
+    """
+    Turn a column of per-row output lists into a dict of columns keyed by
+    output name. Rows with fewer values than outputs (or no list at all)
+    get None in the missing outputs. As in the scalar form, a single-output
+    transform returns its column as is, unless rows are lists: then it
+    returns a dict of the column of their first values (other rows are
+    kept as they are).
+    """
+    if len(outlist) == 1:
+        if hasattr(col, "__array__") or list not in map(type, col):
+            return col
+        return {outlist[0]: [(row[0] if row else None)
+                             if isinstance(row, list) else row for row in col]}
+    if not outlist:
+        return col
+    ret = {}
+    for (i, out) in enumerate(outlist):
+        ret[out] = [row[i] if isinstance(row, list) and i < len(row) else None
+                    for row in col]
+    return ret
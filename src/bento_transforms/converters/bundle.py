@@ -0,0 +1,106 @@
+"""
+bento_transforms.converters.bundle
+
+Converter bundles: a Converter's validated transform specs and resolved
+step methods, saved to a single file, so a new process can rebuild the
+Converter without parsing and validating MDF-Transform YAML, constructing
+GeneralTransform models, or searching for step entrypoints.
+
+A bundle records a hash of the contents of each source file it was built
+from, and the bento-transforms version and bundle format it was written
+with. A bundle whose header doesn't match is stale, and is rebuilt from
+its sources (see Converter.load_bundle).
+
+Bundles are pickles: load only bundles you made yourself.
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+BUNDLE_MAGIC = b"BTBUNDLE"
+# bump when the bundle contents change
+BUNDLE_FORMAT = 1
+
+
+def package_version() -> str:
+    try:
+        return version("bento-transforms")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def source_hashes(paths: Iterable[str | Path]) -> Dict[str, str]:
+    """sha256 of the contents of each file, keyed by its absolute path"""
+    return {str(Path(p).resolve()): hashlib.sha256(Path(p).read_bytes()).hexdigest()
+            for p in paths}
+
+
+def bundle_header(sources: Iterable[str | Path]) -> dict:
+    return {"format": BUNDLE_FORMAT, "package_version": package_version(),
+            "sources": source_hashes(sources)}
+
+
+def write_bundle(path: str | Path, header: dict, body: Any) -> None:
+    """Write a bundle file atomically, so readers never see a partial bundle"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    (fd, tmp) = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(BUNDLE_MAGIC)
+            pickle.dump(header, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(body, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def read_bundle(path: str | Path) -> Tuple[dict, Any] | None:
+    """
+    Read a bundle file, returning (header, body), or None if the file is
+    missing, isn't a bundle, or is stale: written with another format or
+    package version, or built from sources whose contents have changed.
+    """
+    try:
+        fh = Path(path).open("rb")
+    except FileNotFoundError:
+        return None
+    with fh:
+        if fh.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+            return None
+        header = pickle.load(fh)
+        if (header.get("format") != BUNDLE_FORMAT
+                or header.get("package_version") != package_version()):
+            return None
+        try:
+            if source_hashes(header["sources"]) != header["sources"]:
+                return None
+        except FileNotFoundError:
+            return None
+        return (header, pickle.load(fh))
+
+
+def bundle_sources(path: str | Path) -> List[str]:
+    """The source files recorded in a bundle file, stale or not"""
+    try:
+        with Path(path).open("rb") as fh:
+            if fh.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                return []
+            return list(pickle.load(fh).get("sources", {}))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return []
+
+
+def picklable(obj: Any) -> bool:
+    try:
+        pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    return True
@@ -0,0 +1,115 @@
+"""
+bento_transforms.converters.compiler
+
+The "compiled" transform function backend. Instead of wrapping the steps
+in partial/curry/compose_left layers, as create_transform_function does,
+compile_transform_function generates the source of one flat Python function
+per GeneralTransform, with the step methods and their compiled params bound
+as closure variables and the input and output names unrolled. The result
+takes inputs and returns outputs exactly as the reference backend's
+functions do, and carries the same `inputs`, `outputs` and `map_batch`
+attributes.
+"""
+
+from __future__ import annotations
+import linecache
+import weakref
+from itertools import count
+from typing import Callable, List
+from ..mdf.pymodels import GeneralTransform
+from ..tflib.protocol import is_pure
+from .batch import column_function, create_batch_function
+from .tf_utils import (
+    compile_step_params,
+    io_arg_names,
+    StepWrapper,
+    resolve_step_method,
+)
+
+_serial = count()
+
+
+def _identity(x):
+    return x
+
+
+def compile_transform_function(gtf: GeneralTransform,
+                               step_wrapper: StepWrapper | None = None) -> Callable:
+    (args, outs) = io_arg_names(gtf)
+    bindings = {"_arglist": args, "_argset": frozenset(args), "_outs": outs}
+    calls = []
+    cfuncs = []
+    pure = True
+    for (i, step) in enumerate(gtf.Steps):
+        method = resolve_step_method(step)
+        params = compile_step_params(method, step)
+        cfuncs.append(column_function(method, params))
+        pure = pure and (method is None or is_pure(method))
+        if method is None:
+            # identity steps after the first are no-ops
+            if i > 0:
+                continue
+            method = _identity
+        elif step_wrapper is not None:
+            method = step_wrapper(step, method)
+        bindings[f"_s{i}"] = method
+        if params is not None:
+            bindings[f"_p{i}"] = params
+            calls.append(f"_s{i}({{}}, params=_p{i})")
+        else:
+            calls.append(f"_s{i}({{}})")
+    tf = _build(generate_source(args, outs, calls), bindings)
+    tf.__setattr__("inputs", gtf.Inputs)
+    tf.__setattr__("outputs", gtf.Outputs)
+    tf.__setattr__("map_batch",
+                   create_batch_function(cfuncs, args, outs, pure=pure))
+    return tf
+
+
+def generate_source(args: List[str], outs: List[str],
+                    calls: List[str]) -> str:
+    """
+    Generate the source of the flat transform function. Names other than
+    the function's own arguments are bound by the factory built in `_build`.
+    `calls` are step call templates, with `{}` standing for the step input.
+    """
+    lines = [
+        "def transform(*args, **kwargs):",
+        "    if kwargs and not args:",
+        "        if not kwargs.keys() <= _argset:",
+        "            raise RuntimeError('Invalid input. '",
+        "                               f\"Valid input keys are '{_arglist}'\")",
+        f"        if len(kwargs) == {len(args)}:",
+        "            args = (" + "".join(f"kwargs[{a!r}], " for a in args) + ")",
+        "        else:",
+        "            args = [kwargs[a] for a in _arglist if a in kwargs]",
+    ]
+    lines.append("    v = " + calls[0].format("*args"))
+    for call in calls[1:]:
+        lines.append("    v = " + call.format("v"))
+    lines.extend([
+        "    if isinstance(v, list):",
+        f"        if len(v) == {len(outs)}:",
+        "            return {" + "".join(f"{o!r}: v[{j}], "
+                                      for (j, o) in enumerate(outs)) + "}",
+        "        return dict(zip(_outs, v))",
+        "    return v",
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def _build(body: str, bindings: dict) -> Callable:
+    names = sorted(bindings)
+    src = (f"def _make({', '.join(names)}):\n"
+           + "".join(f"    {line}\n" for line in body.splitlines())
+           + "    return transform\n")
+    # register the source, so tracebacks through generated code are readable,
+    # for as long as the function lives
+    filename = f"<bento_transforms compiled transform {next(_serial)}>"
+    linecache.cache[filename] = (len(src), None, src.splitlines(True), filename)
+    namespace = {}
+    exec(compile(src, filename, "exec"), namespace)
+    tf = namespace["_make"](**bindings)
+    tf.__setattr__("source", src)
+    weakref.finalize(tf, linecache.cache.pop, filename, None)
+    return tf
@@ -8,81 +8,372 @@ from an MDB or from an MDF-Tranform YAML file
 """
 
 from __future__ import annotations
-import importlib
-import json
+import hashlib
+import os
 from toolz import compose_left, curry
-from functools import partial, reduce
-from collections import Counter
-from typing import Callable, List, Tuple
+from functools import partial
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Tuple
+)
 from ..mdf.pymodels import GeneralTransform
 from ..mdf.reader import TransformReader
+from ..tflib.protocol import is_pure
+from .batch import column_function, create_batch_function
+from .bundle import (
+    bundle_header,
+    bundle_sources,
+    picklable,
+    read_bundle,
+    write_bundle,
+)
+from .compiler import compile_transform_function
+from .memo import LRUMemo
+from .metrics import Instrumentation
+from .tracing import Tracer
+from .index import TransformIndex
+from .plan import ExecutionPlan
+from .records import RecordPlan, record_plan, record_shape
+from .tf_utils import (
+    compile_step_params,
+    io_arg_names,
+    register_step_methods,
+    resolve_step_method,
+    StepWrapper,
+    step_methods,
+    transform_is_pure,
+)
+
+# record shapes whose plans Converter.convert_records keeps
+MAX_RECORD_PLANS = 1024
+
+
+class ConverterState:
+    """
+    A Converter's transforms and everything derived from them: the index,
+    the transform functions built so far, and the execution plans.
+    Converter.reload() replaces the state as a whole, so work that holds a
+    state sees one consistent set of transforms throughout.
+    """
+    def __init__(self, transforms: Mapping[str, GeneralTransform],
+                 tfuncs: Dict[str, Callable] | None = None):
+        self.transforms = transforms
+        self.index = TransformIndex(transforms)
+        self.tfuncs = tfuncs or {}
+        self.plan = None
+        self.record_plans = OrderedDict()
 
 
 class Converter:
     def __init__(self, tmdf: TransformReader | None = None,
-                 gtfs: List[GeneralTransform] | None = None):
-        self._from_model = None
-        self._to_model = None
-        self._tfnames_by_io = {}
-        self._tfuncs = {}
+                 gtfs: List[GeneralTransform] | None = None,
+                 backend: str = "reference",
+                 from_model: Tuple[str, str] | None = None,
+                 to_model: Tuple[str, str] | None = None,
+                 memo_size: int | None = None,
+                 memo_sizes: Dict[str, int | None] | None = None,
+                 instrumentation: Instrumentation | None = None,
+                 tracer: Tracer | None = None):
+        if backend not in BACKENDS:
+            raise RuntimeError(f"Unknown transform function backend '{backend}'; "
+                               f"choose one of {list(BACKENDS)}")
+        self._backend = backend
+        self._create_tfunction = BACKENDS[backend]
+        self._from_model = tuple(from_model) if from_model else None
+        self._to_model = tuple(to_model) if to_model else None
+        # an explicit target model restricts record outputs to that model
+        self._record_model = self._to_model
+        # memoize transform functions: memo_size for all transforms,
+        # memo_sizes by handle (None or 0 turns memoization off)
+        self._memo_size = memo_size
+        self._memo_sizes = memo_sizes or {}
+        # count and time transform and step calls (see
+        # bento_transforms.converters.metrics); None builds unwrapped functions
+        self._instrumentation = instrumentation
+        # step-level tracing (see bento_transforms.converters.tracing); a
+        # tracer without hooks is ignored
+        self._tracer = tracer if tracer is not None and tracer.hooks else None
+        # MDF-Transform files the transforms were read from, with the
+        # options to read them again, and their stamps when last read
+        self._sources = []
+        self._reader_options = {}
+        self._stamps = {}
         if tmdf:
-            self._transforms = tmdf.transforms
+            transforms = tmdf.transforms
+            self._sources = [str(f) for f in _flatten(tmdf.files)
+                             if isinstance(f, (str, Path)) and Path(f).is_file()]
+            self._reader_options = dict(getattr(tmdf, "options", {}))
+            self._stamps = {src: file_stamp(src) for src in self._sources}
         elif gtfs:
-            self._transforms = gtfs
+            transforms = gtfs
         else:
             raise RuntimeError("Converter constructor requires either MDF"
                                "object or dict of GeneralTransforms")
-        # create signature hash table
-        for hdl in self._transforms:
-            self._tfnames_by_io[
-                hash_gtf_by_io(self._transforms[hdl])
-            ] = hdl
+        self._state = ConverterState(transforms)
 
     @property
     def transforms(self) -> dict:
-        return self._transforms
+        return self._state.transforms
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def instrumentation(self) -> Instrumentation | None:
+        return self._instrumentation
+
+    @property
+    def tracer(self) -> Tracer | None:
+        return self._tracer
+
+    @property
+    def sources(self) -> List[str]:
+        return self._sources
+
+    @property
+    def index(self) -> TransformIndex:
+        """The index of the converter's transforms by inputs, outputs, etc."""
+        return self._state.index
 
     @property
     def from_model(self) -> str:
-        if not self._from_model:
-            ctr = Counter(
-                [(x.Model, x.Version) for x in reduce(
-                    lambda x,y:x+y, [y.Inputs for y in self.transforms.values()])]
-            )
-            self._from_model = ctr.most_common()[0][0]
-        return self._from_model
+        if self._from_model:
+            return self._from_model
+        return self._state.index.input_models().most_common(1)[0][0]
 
     @property
     def to_model(self) -> str:
-        if not self._to_model:
-            ctr = Counter(
-                [(x.Model, x.Version) for x in reduce(
-                    lambda x,y:x+y, [y.Outputs for y in self.transforms.values()])]
-            )
-            self._to_model = ctr.most_common()[0][0]
-        return self._to_model
+        if self._to_model:
+            return self._to_model
+        return self._state.index.output_models().most_common(1)[0][0]
 
     def tfunction(self, handle) -> Callable:
-        if not self._tfuncs.get(handle):
-            if not self._transforms.get(handle):
+        return self._tfunction(self._state, handle)
+
+    def _tfunction(self, state: ConverterState, handle: str) -> Callable:
+        if not state.tfuncs.get(handle):
+            if not state.transforms.get(handle):
                 raise RuntimeError(f"No such transform '{handle}'")
-            self._tfuncs[handle] = create_transform_function(
-                self._transforms[handle]
-            )
-        return self._tfuncs[handle]
+            state.tfuncs[handle] = self._build_tfunction(
+                handle, state.transforms[handle])
+        return state.tfuncs[handle]
+
+    def _build_tfunction(self, handle: str, gtf: GeneralTransform) -> Callable:
+        wrappers = [w for w in (self._instrumentation, self._tracer) if w is not None]
+        if not wrappers:
+            tf = self._create_tfunction(gtf)
+        else:
+            def step_wrapper(step, method):
+                for w in wrappers:
+                    method = w.wrap_step(handle, step, method)
+                return method
+            tf = self._create_tfunction(gtf, step_wrapper=step_wrapper)
+            for w in wrappers:
+                tf = w.wrap_transform(handle, tf)
+        size = self._memo_sizes.get(handle, self._memo_size)
+        if size and transform_is_pure(gtf):
+            tf = LRUMemo(tf, size)
+        return tf
+
+    def memo_stats(self) -> Dict[str, Dict[str, int]]:
+        """Cache counters of the memoized transform functions built so far"""
+        return {hdl: tf.cache_info() for (hdl, tf) in self._state.tfuncs.items()
+                if isinstance(tf, LRUMemo)}
 
     def convert(self, frm: str | List[str], to: str | List(str)) -> Callable:
         if isinstance(frm, str):
             frm = [frm]
         if isinstance(to, str):
             to = [to]
-        idx = hash(json.dumps([sorted(frm), sorted(to)]))
-        if not self._tfnames_by_io.get(idx):
+        state = self._state
+        hdl = state.index.find(frm, to)
+        if hdl is None:
             raise RuntimeError(f"No transformation available with inputs '{frm}' and outputs '{to}'")
-        return self.tfunction(self._tfnames_by_io[idx])
+        return self._tfunction(state, hdl)
+
+    def convert_batch(self, frm: str | List[str], to: str | List[str],
+                      *columns, **kwcolumns) -> List | dict:
+        """
+        Convert whole columns of input values. Columns are given positionally
+        in input order, or keyed by `node_prop` input names. See
+        bento_transforms.converters.batch.
+        """
+        return self.convert(frm, to).map_batch(*columns, **kwcolumns)
 
+    def convert_records(self, records: Iterable[dict]) -> Iterator[dict]:
+        """
+        Apply every transform whose inputs are all present in a source record,
+        for each record of `records`, and yield target records keyed by target
+        node (see bento_transforms.converters.records). Records are processed
+        one at a time; the plan for each record shape is computed once.
+        All records are converted with the transforms current when the first
+        record is converted, even if the converter is reloaded meanwhile.
+        With a tracer, each record is sampled for tracing as a whole.
+        """
+        state = None
+        tracer = self._tracer
+        for record in records:
+            if state is None:
+                state = self._state
+            plan = self._record_plan(state, record_shape(record))
+            if tracer is None:
+                yield plan.apply(record)
+                continue
+            tracer.start_record()
+            try:
+                out = plan.apply(record)
+            finally:
+                tracer.end_record()
+            yield out
 
-def create_transform_function(gtf: GeneralTransform) -> Callable:
+    def save_bundle(self, path: str | Path,
+                    sources: List[str | Path] | None = None) -> None:
+        """
+        Save the converter's transforms, resolved step methods and options to
+        a bundle file (see bento_transforms.converters.bundle). The bundle
+        is valid while the `sources` files (default: the files the
+        transforms were read from) are unchanged.
+        """
+        transforms = self._state.transforms
+        methods = {key: mth for (key, mth)
+                   in step_methods(transforms.values()).items()
+                   if picklable(mth)}
+        body = {
+            "transforms": dict(transforms),
+            "methods": methods,
+            "options": {"backend": self._backend,
+                        "to_model": self._record_model,
+                        "memo_size": self._memo_size,
+                        "memo_sizes": self._memo_sizes},
+        }
+        sources = self._sources if sources is None else [str(s) for s in sources]
+        write_bundle(path, bundle_header(sources), body)
+
+    @classmethod
+    def load_bundle(cls, path: str | Path,
+                    sources: List[str | Path] | None = None,
+                    mdf_schema: str | Path | None = None,
+                    **kwargs) -> Converter:
+        """
+        Create a Converter from a bundle file written by save_bundle. If the
+        bundle is missing or stale, the Converter is built from the `sources`
+        MDF-Transform files (default: the sources recorded in the bundle)
+        instead, and the bundle is rewritten. `kwargs` are passed to the
+        Converter constructor, overriding the options saved in the bundle.
+        """
+        bundle = read_bundle(path)
+        if bundle is not None:
+            (header, body) = bundle
+            register_step_methods(body["methods"])
+            cvtr = cls(gtfs=body["transforms"], **{**body["options"], **kwargs})
+            cvtr._sources = list(header["sources"])
+            cvtr._reader_options = {"mdf_schema": mdf_schema}
+            cvtr._stamps = {src: file_stamp(src) for src in cvtr._sources}
+            return cvtr
+        if sources is None:
+            sources = bundle_sources(path)
+        if not sources:
+            raise RuntimeError(f"Bundle {path} is missing or stale, and no "
+                               "source files are available to rebuild it")
+        cvtr = cls(tmdf=TransformReader(*[str(s) for s in sources],
+                                        mdf_schema=mdf_schema), **kwargs)
+        cvtr.save_bundle(path)
+        return cvtr
+
+    @property
+    def plan(self) -> ExecutionPlan:
+        """The execution plan over all the converter's transforms"""
+        return self._plan(self._state)
+
+    def _plan(self, state: ConverterState) -> ExecutionPlan:
+        if state.plan is None:
+            state.plan = ExecutionPlan(state.transforms)
+        return state.plan
+
+    def record_plan(self, shape: FrozenSet[Tuple[str, str]]) -> RecordPlan:
+        return self._record_plan(self._state, shape)
+
+    def _record_plan(self, state: ConverterState,
+                     shape: FrozenSet[Tuple[str, str]]) -> RecordPlan:
+        plan = state.record_plans.get(shape)
+        if plan is not None:
+            state.record_plans.move_to_end(shape)
+            return plan
+        plan = record_plan(self._plan(state), shape,
+                           partial(self._tfunction, state),
+                           to_model=self._record_model)
+        state.record_plans[shape] = plan
+        if len(state.record_plans) > MAX_RECORD_PLANS:
+            state.record_plans.popitem(last=False)
+        return plan
+
+    def reload(self) -> List[str]:
+        """
+        Re-read the converter's source files if any of them has changed (by
+        modification time and size, then content hash), and switch to the
+        transforms read. Transform functions of unchanged transforms are
+        kept, with their memo caches; those of changed transforms that were
+        built are rebuilt before the switch, so if any fails to build, the
+        converter keeps its current transforms. The switch replaces the
+        converter state in one step (see ConverterState).
+
+        Returns the handles of the transforms added, removed or changed
+        (for a lazy reader, only built transforms are compared).
+        """
+        if not self._sources:
+            raise RuntimeError("Converter has no source files to reload")
+        stamps = {src: file_stamp(src, self._stamps.get(src))
+                  for src in self._sources}
+        if all(self._stamps.get(src, ())[2:] == stamp[2:]
+               for (src, stamp) in stamps.items()):
+            # touched, perhaps, but not changed
+            self._stamps = stamps
+            return []
+        tmdf = TransformReader(*self._sources, **self._reader_options)
+        old = self._state
+        new = tmdf.transforms
+        lazy = hasattr(new, "io")
+        changed = [hdl for hdl in old.transforms if hdl not in new]
+        tfuncs = {}
+        for hdl in new:
+            if hdl not in old.transforms:
+                changed.append(hdl)
+            elif (hdl in old.tfuncs or not lazy) and new[hdl] != old.transforms[hdl]:
+                changed.append(hdl)
+                if hdl in old.tfuncs:
+                    tfuncs[hdl] = self._build_tfunction(hdl, new[hdl])
+            elif hdl in old.tfuncs:
+                tfuncs[hdl] = old.tfuncs[hdl]
+        self._state = ConverterState(new, tfuncs)
+        self._stamps = stamps
+        return changed
+
+
+def file_stamp(path: str | Path,
+               prev: Tuple[int, int, str] | None = None) -> Tuple[int, int, str]:
+    """
+    (modification time, size, sha256) of a file. If the time and size match
+    `prev`, the file isn't read again, and the hash of `prev` is used.
+    """
+    st = os.stat(path)
+    if prev is not None and prev[:2] == (st.st_mtime_ns, st.st_size):
+        return prev
+    return (st.st_mtime_ns, st.st_size,
+            hashlib.sha256(Path(path).read_bytes()).hexdigest())
+
+
+def _flatten(items: Iterable) -> Iterator:
+    for item in items:
+        if isinstance(item, (list, tuple)):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+def create_transform_function(gtf: GeneralTransform,
+                              step_wrapper: StepWrapper | None = None) -> Callable:
     def porcelain(func: Callable, *args, **kwargs):
         if args:
             return func(args)
@@ -112,42 +403,26 @@ def create_transform_function(gtf: GeneralTransform) -> Callable:
             # return value
             return ret
 
-    args = []
-    for inp in gtf.Inputs:
-        for prop in inp.Props:
-            args.append(inp.Node+"_"+prop)
-    outs = []
-    for outp in gtf.Outputs:
-        for prop in outp.Props:
-            outs.append(outp.Node+"_"+prop)
+    (args, outs) = io_arg_names(gtf)
     tf_func = None
     funcs = []
+    cfuncs = []
+    pure = True
     for step in gtf.Steps:
-        mod = step.Package.Name
-        if (mod == "Identity"):
+        method = resolve_step_method(step)
+        params = compile_step_params(method, step)
+        cfuncs.append(column_function(method, params))
+        pure = pure and (method is None or is_pure(method))
+        if method is None:
             funcs.append(lambda x: x)
             continue
-        ep = step.Entrypoint.split(".")
-        mth = ep.pop()
-        method = None
-        if len(ep) > 0:
-            qmod = ".".join([mod]+ep)
-        try:
-            module = importlib.import_module(qmod)
-            if hasattr(module, mth):
-                method = getattr(module, mth)
-        except ModuleNotFoundError:
-            # check if imported to the top level via __init__.py
-            module = importlib.import_module(".".join([mod, "__init__"]))
-            if hasattr(module, ".".join(ep)):
-                method = getattr(getattr(module, ".".join(ep)), mth)
-        if method is None:
-            raise RuntimeError(f"Module {mod} has no method '{mth}'")
-        if step.Params is not None:
+        if params is not None:
             method = curry(method)
-            method = method(params=step.Params)
+            method = method(params=params)
             if not isinstance(method, Callable):
                 RuntimeError("Didn't get a function back from a curried function; check the transformation implementation")
+        if step_wrapper is not None:
+            method = step_wrapper(step, method)
         funcs.append(method)
     if len(funcs) == 1:
         tf_func = funcs.pop()
@@ -158,21 +433,16 @@ def create_transform_function(gtf: GeneralTransform) -> Callable:
     tf = partial(porcelain, wrapper(func=tf_func, arglist=args, outlist=outs))
     tf.__setattr__("inputs", gtf.Inputs)
     tf.__setattr__("outputs", gtf.Outputs)
+    tf.__setattr__("map_batch",
+                   create_batch_function(cfuncs, args, outs, pure=pure))
     return tf
 
 
-def hash_gtf_by_io(gtf: GeneralTransform) -> int:
-    inp = []
-    out = []
-    for item in gtf.Inputs:
-        node = item.Node
-        for p in item.Props:
-            inp.append(f"{node}.{p}")
-    for item in gtf.Outputs:
-        node = item.Node
-        for p in item.Props:
-            out.append(f"{node}.{p}")
-    inp.sort()
-    out.sort()
-    return hash(json.dumps([inp, out]))
+# transform function backends: "reference" composes the steps with
+# toolz; "compiled" generates one flat function per transform
+BACKENDS = {
+    "reference": create_transform_function,
+    "compiled": compile_transform_function,
+}
+
     
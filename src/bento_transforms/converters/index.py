@@ -0,0 +1,146 @@
+"""
+bento_transforms.converters.index
+
+An index of a set of transforms by what they read and write: by input and
+output property, by node, by model and version, by step entrypoint, and by
+exact input and output signature. Building the index is linear in the
+number of transform inputs, outputs and steps, and each lookup is a dict
+access.
+
+Properties are given as `node.prop` strings; `node.*` matches every
+property of the node.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from typing import Iterable, List, Mapping, Tuple
+from ..mdf.pymodels import GeneralTransform
+from .plan import PropKey, transform_io_keys
+
+ModelVersion = Tuple[str, str]
+
+
+def transform_entrypoints(transforms: Mapping[str, GeneralTransform],
+                          hdl: str) -> List[str]:
+    """
+    The step Entrypoints of transforms[hdl], from the mapping if it
+    provides them (see bento_transforms.mdf.reader.LazyTransforms)
+    """
+    entrypoints = getattr(transforms, "entrypoints", None)
+    if entrypoints is None:
+        return [step.Entrypoint for step in transforms[hdl].Steps]
+    return entrypoints(hdl)
+
+
+def io_signature(inputs: Iterable[str], outputs: Iterable[str]
+                 ) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """The lookup key of a transform by its `node.prop` inputs and outputs"""
+    return (tuple(sorted(inputs)), tuple(sorted(outputs)))
+
+
+def _add(index: dict, key, hdl: str) -> None:
+    hdls = index.setdefault(key, [])
+    if not hdls or hdls[-1] != hdl:
+        hdls.append(hdl)
+
+
+class TransformIndex:
+    def __init__(self, transforms: Mapping[str, GeneralTransform]):
+        self._io = {}
+        self._entrypoints = {}
+        self._by_signature = {}
+        # (node, prop) and node -> handles, for inputs and outputs
+        self._readers = {}
+        self._node_readers = {}
+        self._producers = {}
+        self._node_producers = {}
+        # (model, version) and model -> handles
+        self._by_model_version = {}
+        self._by_model = {}
+        self._by_entrypoint = {}
+        self._input_models = Counter()
+        self._output_models = Counter()
+        for hdl in transforms:
+            self._add(hdl, transform_io_keys(transforms, hdl),
+                      transform_entrypoints(transforms, hdl))
+
+    def _add(self, hdl: str, io: Tuple[List[PropKey], List[PropKey]],
+             entrypoints: List[str]) -> None:
+        (inputs, outputs) = io
+        self._io[hdl] = io
+        self._entrypoints[hdl] = entrypoints
+        self._by_signature[io_signature(
+            [f"{k.node}.{k.prop}" for k in inputs],
+            [f"{k.node}.{k.prop}" for k in outputs])] = hdl
+        for k in inputs:
+            _add(self._readers, (k.node, k.prop), hdl)
+            _add(self._node_readers, k.node, hdl)
+            self._input_models[(k.model, k.version)] += 1
+        for k in outputs:
+            _add(self._producers, (k.node, k.prop), hdl)
+            _add(self._node_producers, k.node, hdl)
+            self._output_models[(k.model, k.version)] += 1
+        for k in inputs + outputs:
+            _add(self._by_model_version, (k.model, k.version), hdl)
+            _add(self._by_model, k.model, hdl)
+        for ep in entrypoints:
+            _add(self._by_entrypoint, ep, hdl)
+
+    def __len__(self) -> int:
+        return len(self._io)
+
+    def __contains__(self, hdl: str) -> bool:
+        return hdl in self._io
+
+    def io(self, hdl: str) -> Tuple[List[PropKey], List[PropKey]]:
+        return self._io[hdl]
+
+    def find(self, inputs: Iterable[str], outputs: Iterable[str]) -> str | None:
+        """The transform with exactly these `node.prop` inputs and outputs"""
+        return self._by_signature.get(io_signature(inputs, outputs))
+
+    def readers(self, prop: str) -> List[str]:
+        """Transforms with input `node.prop` (or any property of `node.*`)"""
+        (node, name) = _split_prop(prop)
+        if name == "*":
+            return list(self._node_readers.get(node, []))
+        return list(self._readers.get((node, name), []))
+
+    def producers(self, prop: str) -> List[str]:
+        """Transforms with output `node.prop` (or any property of `node.*`)"""
+        (node, name) = _split_prop(prop)
+        if name == "*":
+            return list(self._node_producers.get(node, []))
+        return list(self._producers.get((node, name), []))
+
+    def by_node(self, node: str) -> List[str]:
+        """Transforms that read or write properties of `node`"""
+        readers = self._node_readers.get(node, [])
+        seen = set(readers)
+        return list(readers) + [hdl for hdl in self._node_producers.get(node, [])
+                                if hdl not in seen]
+
+    def by_model(self, model: str, version: str | None = None) -> List[str]:
+        """Transforms that read or write properties of a model (and version)"""
+        if version is None:
+            return list(self._by_model.get(model, []))
+        return list(self._by_model_version.get((model, version), []))
+
+    def by_entrypoint(self, entrypoint: str) -> List[str]:
+        """Transforms with a step of this Entrypoint"""
+        return list(self._by_entrypoint.get(entrypoint, []))
+
+    def input_models(self) -> Counter:
+        """Count of transform inputs by (model, version)"""
+        return Counter(self._input_models)
+
+    def output_models(self) -> Counter:
+        """Count of transform outputs by (model, version)"""
+        return Counter(self._output_models)
+
+
+def _split_prop(prop: str) -> Tuple[str, str]:
+    (node, dot, name) = prop.partition(".")
+    if not dot or not node or not name:
+        raise RuntimeError(f"Expected 'node.prop' or 'node.*', got '{prop}'")
+    return (node, name)
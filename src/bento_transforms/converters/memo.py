@@ -0,0 +1,73 @@
+"""
+bento_transforms.converters.memo
+
+Memoization of transform functions. Transform functions are pure (see the
+README), so a transform's output for given inputs can be reused; for
+low-cardinality columns, most calls are then dictionary lookups.
+LRUMemo keeps a bounded number of results, evicting the least recently
+used, and counts hits, misses and evictions. Results are cached by input
+values and their types, so that equal inputs of different types (1, 1.0
+and True) are not confused.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+_KWARGS = object()
+
+
+class LRUMemo:
+    def __init__(self, func: Callable, maxsize: int = 1024):
+        if maxsize < 1:
+            raise RuntimeError("Memo size must be at least 1")
+        self._func = func
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+        # keep the transform function attributes
+        for attr in ("inputs", "outputs", "map_batch"):
+            if hasattr(func, attr):
+                setattr(self, attr, getattr(func, attr))
+
+    @property
+    def func(self) -> Callable:
+        return self._func
+
+    def __call__(self, *args, **kwargs) -> Any:
+        key = args + tuple(map(type, args))
+        if kwargs:
+            items = tuple(sorted(kwargs.items()))
+            key += (_KWARGS,) + items + tuple(type(v) for (_, v) in items)
+        cache = self._cache
+        try:
+            ret = cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable inputs
+            self.uncacheable += 1
+            return self._func(*args, **kwargs)
+        else:
+            self.hits += 1
+            cache.move_to_end(key)
+            return dict(ret) if isinstance(ret, dict) else ret
+        self.misses += 1
+        ret = self._func(*args, **kwargs)
+        cache[key] = ret
+        if len(cache) > self._maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return dict(ret) if isinstance(ret, dict) else ret
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "uncacheable": self.uncacheable,
+                "size": len(self._cache), "maxsize": self._maxsize}
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
+        self.hits = self.misses = self.evictions = self.uncacheable = 0
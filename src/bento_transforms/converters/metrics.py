@@ -0,0 +1,185 @@
+"""
+bento_transforms.converters.metrics
+
+Instrumentation of transform functions: counts of calls, errors and null
+(None) results, and wall time, per transform handle, per step Entrypoint,
+and per transform for batch calls (where `rows` counts the column values
+converted, and `nulls` the None output values).
+
+A Converter instruments its transform functions only when it is given an
+Instrumentation object; otherwise the functions are built unwrapped, and
+instrumentation costs nothing. With `sample_every=N`, every call is
+counted, but only every Nth call is timed; `est_seconds` scales the time
+measured to all calls.
+
+Calls answered from a transform's memo cache (see
+bento_transforms.converters.memo) are not counted. Counters are not
+locked, so under threads they may undercount slightly.
+"""
+
+from __future__ import annotations
+import json
+import time
+from typing import Callable, Dict, List
+from ..mdf.pymodels import TfStepSpec
+
+
+class Stats:
+    __slots__ = ("calls", "errors", "nulls", "rows", "timed", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.nulls = 0
+        self.rows = 0
+        self.timed = 0
+        self.seconds = 0.0
+
+    @property
+    def est_seconds(self) -> float:
+        """Time measured, scaled to all calls"""
+        if not self.timed:
+            return 0.0
+        return self.seconds * self.calls / self.timed
+
+    def as_dict(self) -> Dict[str, int | float]:
+        return {"calls": self.calls, "errors": self.errors, "nulls": self.nulls,
+                "rows": self.rows, "timed": self.timed, "seconds": self.seconds,
+                "est_seconds": self.est_seconds}
+
+
+# Stats groups, with the Prometheus `kind` label of each
+KINDS = {"transforms": "transform", "steps": "step", "batches": "batch"}
+
+# Prometheus metric name suffix, type, help text and Stats attribute;
+# est_seconds can go down (as the sampled mean changes), so is a gauge
+_METRICS = [
+    ("calls_total", "counter", "Calls", "calls"),
+    ("errors_total", "counter", "Calls that raised an exception", "errors"),
+    ("nulls_total", "counter", "None results", "nulls"),
+    ("rows_total", "counter", "Values converted by batch calls", "rows"),
+    ("timed_calls_total", "counter", "Calls timed", "timed"),
+    ("seconds_total", "counter", "Wall time of the calls timed", "seconds"),
+    ("est_seconds", "gauge", "Wall time scaled to all calls", "est_seconds"),
+]
+
+
+class Instrumentation:
+    def __init__(self, sample_every: int = 1, prefix: str = "bento_transforms"):
+        if sample_every < 1:
+            raise RuntimeError("sample_every must be at least 1")
+        self._sample_every = sample_every
+        self._prefix = prefix
+        self.transforms: Dict[str, Stats] = {}
+        self.steps: Dict[str, Stats] = {}
+        self.batches: Dict[str, Stats] = {}
+
+    @property
+    def sample_every(self) -> int:
+        return self._sample_every
+
+    def wrap_transform(self, handle: str, tf: Callable) -> Callable:
+        """
+        Instrument a transform function under `handle`, and its map_batch.
+        The wrapper carries the function's `inputs`, `outputs` and
+        `map_batch` attributes.
+        """
+        wrapped = self._wrap(tf, self.transforms.setdefault(handle, Stats()))
+        for attr in ("inputs", "outputs", "source"):
+            if hasattr(tf, attr):
+                setattr(wrapped, attr, getattr(tf, attr))
+        if hasattr(tf, "map_batch"):
+            wrapped.map_batch = self._wrap_batch(
+                tf.map_batch, self.batches.setdefault(handle, Stats()))
+        wrapped.__wrapped__ = tf
+        return wrapped
+
+    def wrap_step(self, handle: str, step: TfStepSpec, method: Callable) -> Callable:
+        """Instrument a step method, under its Entrypoint"""
+        return self._wrap(method, self.steps.setdefault(step.Entrypoint, Stats()))
+
+    def _wrap(self, func: Callable, stats: Stats) -> Callable:
+        every = self._sample_every
+        clock = time.perf_counter
+
+        def instrumented(*args, **kwargs):
+            stats.calls += 1
+            if stats.calls % every:
+                try:
+                    ret = func(*args, **kwargs)
+                except Exception:
+                    stats.errors += 1
+                    raise
+            else:
+                t0 = clock()
+                try:
+                    ret = func(*args, **kwargs)
+                except Exception:
+                    stats.errors += 1
+                    raise
+                finally:
+                    stats.seconds += clock() - t0
+                    stats.timed += 1
+            if ret is None:
+                stats.nulls += 1
+            return ret
+        return instrumented
+
+    def _wrap_batch(self, map_batch: Callable, stats: Stats) -> Callable:
+        clock = time.perf_counter
+
+        # batch calls are few and long: time them all
+        def instrumented(*columns, **kwcolumns):
+            stats.calls += 1
+            t0 = clock()
+            try:
+                ret = map_batch(*columns, **kwcolumns)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.seconds += clock() - t0
+                stats.timed += 1
+            outcols = ret.values() if isinstance(ret, dict) else [ret]
+            for col in outcols:
+                stats.nulls += sum(1 for v in col if v is None)
+            stats.rows += len(next(iter(outcols), []))
+            return ret
+        return instrumented
+
+    def reset(self) -> None:
+        """Zero all the counters, keeping the instrumented functions' Stats"""
+        for group in (self.transforms, self.steps, self.batches):
+            for stats in group.values():
+                stats.__init__()
+
+    def to_dict(self) -> dict:
+        ret = {"sample_every": self._sample_every}
+        for group in KINDS:
+            ret[group] = {name: stats.as_dict()
+                          for (name, stats) in getattr(self, group).items()}
+        return ret
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for (suffix, mtype, text, attr) in _METRICS:
+            name = f"{self._prefix}_{suffix}"
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {mtype}")
+            for (group, kind) in KINDS.items():
+                for (label, stats) in getattr(self, group).items():
+                    lines.append(f'{name}{{kind="{kind}",name="{_escape(label)}"}} '
+                                 f"{_number(getattr(stats, attr))}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: int | float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
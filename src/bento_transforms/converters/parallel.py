@@ -0,0 +1,140 @@
+"""
+bento_transforms.converters.parallel
+
+Process-parallel conversion of large inputs. ParallelConverter splits input
+records or columns into chunks, converts the chunks concurrently in a pool
+of worker processes, and returns the results in input order.
+
+Transform functions are closures, which can't be pickled; so each worker
+builds its own Converter from the GeneralTransform specs of the parent
+Converter when it starts, and only data crosses process boundaries.
+"""
+
+from __future__ import annotations
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List
+from toolz import partition_all
+from ..mdf.pymodels import GeneralTransform
+from .converter import Converter
+
+# the Converter of a worker process
+_converter = None
+
+
+def _init_worker(specs: Dict[str, dict], options: dict) -> None:
+    global _converter
+    _converter = Converter(
+        gtfs={hdl: GeneralTransform(**spec) for (hdl, spec) in specs.items()},
+        **options)
+
+
+def _convert_records_chunk(records: List[dict]) -> List[dict]:
+    return list(_converter.convert_records(records))
+
+
+def _map_batch_chunk(handle: str, columns: List[List],
+                     kwcolumns: Dict[str, List]) -> List | dict:
+    return _converter.tfunction(handle).map_batch(*columns, **kwcolumns)
+
+
+class ParallelConverter:
+    def __init__(self, cvtr: Converter, workers: int | None = None,
+                 chunk_size: int = 10000, mp_context=None):
+        """
+        Args:
+            cvtr: the Converter whose transforms to run
+            workers: number of worker processes (default: number of CPUs)
+            chunk_size: number of records or column values per chunk
+            mp_context: multiprocessing context for the pool (default:
+                the platform default)
+        """
+        if chunk_size < 1:
+            raise RuntimeError("chunk_size must be at least 1")
+        self._specs = {hdl: gtf.model_dump() for (hdl, gtf)
+                       in cvtr.transforms.items()}
+        self._options = {"backend": cvtr.backend,
+                         "to_model": cvtr._record_model,
+                         "memo_size": cvtr._memo_size,
+                         "memo_sizes": cvtr._memo_sizes}
+        self._workers = workers
+        self._chunk_size = chunk_size
+        self._mp_context = mp_context
+        self._pool = None
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=self._mp_context,
+                initializer=_init_worker, initargs=(self._specs, self._options))
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> ParallelConverter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def convert_records(self, records: Iterable[dict]) -> Iterator[dict]:
+        """
+        As Converter.convert_records, with chunks of records converted in
+        parallel. Target records are yielded in the order of `records`.
+        """
+        for chunk in self._ordered(_convert_records_chunk,
+                                   partition_all(self._chunk_size, records)):
+            yield from chunk
+
+    def map_batch(self, handle: str, *columns, **kwcolumns) -> List | dict:
+        """
+        As Converter.tfunction(handle).map_batch, with chunks of the input
+        columns converted in parallel.
+        """
+        columns = [list(c) for c in columns]
+        kwcolumns = {k: list(c) for (k, c) in kwcolumns.items()}
+        lengths = {len(c) for c in columns} | {len(c) for c in kwcolumns.values()}
+        if len(lengths) > 1:
+            raise RuntimeError("Input columns must all have the same length")
+        n = lengths.pop() if lengths else 0
+        chunks = (
+            (handle, [c[i:i + self._chunk_size] for c in columns],
+             {k: c[i:i + self._chunk_size] for (k, c) in kwcolumns.items()})
+            # an empty input still makes one (empty) chunk
+            for i in range(0, max(n, 1), self._chunk_size)
+        )
+        ret = None
+        for part in self._ordered(_map_batch_chunk, chunks, star=True):
+            if ret is None:
+                ret = part
+            elif isinstance(part, dict):
+                for (k, col) in part.items():
+                    ret[k].extend(col)
+            else:
+                ret.extend(part)
+        return ret
+
+    def _ordered(self, fn: Callable, chunks: Iterable,
+                 star: bool = False) -> Iterator:
+        # keep a bounded number of chunks in flight, and collect results
+        # in submission order
+        window = 2 * (self._workers or os.cpu_count() or 1)
+        pending = deque()
+        for chunk in chunks:
+            if star:
+                pending.append(self.pool.submit(fn, *chunk))
+            else:
+                pending.append(self.pool.submit(fn, chunk))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
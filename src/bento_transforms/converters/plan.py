@@ -0,0 +1,236 @@
+"""
+bento_transforms.converters.plan
+
+Execution plans over a set of transforms. Transforms are linked where one
+transform's output property (by model, version, node and property) is
+another's input, and ordered topologically into "stages": the transforms
+in a stage depend only on transforms in earlier stages, so are independent
+of one another.
+
+A transform that reads and writes the same property is an in-place rewrite.
+It runs after the other transforms that write the property, and before the
+other transforms that read it, which see the rewritten value. Several
+in-place rewrites of one property run in declaration order. If several
+transforms write a property, the value written last (in plan order) wins.
+
+The output of a plan is every property it produces in the output model:
+a given (model, version), or by default the models of its targets (the
+properties no other transform reads). So a target model property is
+output even when another transform derives a further property from it.
+"""
+
+from __future__ import annotations
+from typing import (
+    Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Set, Tuple
+)
+from ..mdf.pymodels import GeneralTransform
+
+
+class PropKey(NamedTuple):
+    model: str
+    version: str
+    node: str
+    prop: str
+
+    def __str__(self):
+        return f"{self.model}:{self.version}:{self.node}.{self.prop}"
+
+
+def io_prop_keys(gtf: GeneralTransform) -> Tuple[List[PropKey], List[PropKey]]:
+    """Return a transform's input and output PropKeys, in order"""
+    inputs = [PropKey(i.Model, i.Version, i.Node, p)
+              for i in gtf.Inputs for p in i.Props]
+    outputs = [PropKey(o.Model, o.Version, o.Node, p)
+               for o in gtf.Outputs for p in o.Props]
+    return (inputs, outputs)
+
+
+def transform_io_keys(transforms: Mapping[str, GeneralTransform],
+                      hdl: str) -> Tuple[List[PropKey], List[PropKey]]:
+    """
+    io_prop_keys of transforms[hdl], taken from the I/O index of the mapping
+    if it has one (see bento_transforms.mdf.reader.LazyTransforms), so that
+    the transform needn't be built.
+    """
+    io = getattr(transforms, "io", None)
+    if io is None:
+        return io_prop_keys(transforms[hdl])
+    (inputs, outputs) = io(hdl)
+    return ([PropKey(*k) for k in inputs], [PropKey(*k) for k in outputs])
+
+
+class ExecutionPlan:
+    def __init__(self, transforms: Mapping[str, GeneralTransform]):
+        self._io = {hdl: transform_io_keys(transforms, hdl) for hdl in transforms}
+        # output names, as io_arg_names gives them
+        self._outnames = {hdl: [f"{k.node}_{k.prop}" for k in outputs]
+                          for (hdl, (_, outputs)) in self._io.items()}
+        self._producers = {}
+        self._consumers = {}
+        for (hdl, (inputs, outputs)) in self._io.items():
+            for k in inputs:
+                self._consumers.setdefault(k, []).append(hdl)
+            for k in outputs:
+                self._producers.setdefault(k, []).append(hdl)
+        self._in_place = {}
+        for (hdl, (inputs, outputs)) in self._io.items():
+            inset = set(inputs)
+            rewritten = [k for k in outputs if k in inset]
+            if rewritten:
+                self._in_place[hdl] = rewritten
+        self._deps = {hdl: set() for hdl in self._io}
+        for (k, producers) in self._producers.items():
+            consumers = self._consumers.get(k, [])
+            rewriters = [h for h in producers if h in consumers]
+            for b in consumers:
+                if b in rewriters:
+                    # writers of the property precede its in-place rewriters,
+                    # which are chained in declaration order
+                    ups = [a for a in producers if a not in rewriters]
+                    ups.extend(rewriters[:rewriters.index(b)])
+                else:
+                    ups = [a for a in producers if a != b]
+                self._deps[b].update(ups)
+        self._stages = self._toposort()
+        self._order = [hdl for stage in self._stages for hdl in stage]
+        self._sources = [k for (k, consumers) in self._consumers.items()
+                         if set(self._producers.get(k, [])) <= set(consumers)]
+        self._targets = [k for (k, producers) in self._producers.items()
+                         if set(self._consumers.get(k, [])) <= set(producers)]
+        self._target_models = {(k.model, k.version) for k in self._targets}
+        self._outputs = self.outputs()
+
+    @property
+    def stages(self) -> List[List[str]]:
+        return self._stages
+
+    @property
+    def order(self) -> List[str]:
+        return self._order
+
+    @property
+    def in_place(self) -> Dict[str, List[PropKey]]:
+        """Transforms that rewrite properties in place, with those properties"""
+        return self._in_place
+
+    @property
+    def sources(self) -> List[PropKey]:
+        """Input properties produced by no transform in the plan, except by
+        in-place rewrites"""
+        return self._sources
+
+    @property
+    def targets(self) -> List[PropKey]:
+        """Output properties no other transform in the plan reads"""
+        return self._targets
+
+    def outputs(self, model: Tuple[str, str] | None = None) -> List[PropKey]:
+        """
+        Output properties of the (model, version) `model`, or by default of
+        the models of the plan's targets
+        """
+        models = self._target_models if model is None else {tuple(model)}
+        return [k for k in self._producers if (k.model, k.version) in models]
+
+    def io(self, hdl: str) -> Tuple[List[PropKey], List[PropKey]]:
+        return self._io[hdl]
+
+    def dependencies(self, hdl: str) -> Set[str]:
+        """Transforms that must run before transform `hdl`"""
+        return self._deps[hdl]
+
+    def firing(self, available: Iterable[PropKey]) -> List[str]:
+        """
+        The transforms, in plan order, that can run given values for the
+        `available` properties and the outputs of transforms run before them.
+        """
+        have = set(available)
+        ret = []
+        for hdl in self._order:
+            (inputs, outputs) = self._io[hdl]
+            if all(k in have for k in inputs):
+                ret.append(hdl)
+                have.update(outputs)
+        return ret
+
+    def run(self, values: Dict[PropKey, Any],
+            tfunction: Callable[[str], Callable]) -> Dict[PropKey, Any]:
+        """
+        Run the transforms that can fire on `values` (a dict of PropKeys to
+        values), in plan order, getting each transform function from
+        `tfunction(handle)`. Return the values of the output properties produced.
+        """
+        env = dict(values)
+        produced = set()
+        for hdl in self.firing(env):
+            (inputs, outputs) = self._io[hdl]
+            ret = tfunction(hdl)(*[env[k] for k in inputs])
+            self.route(hdl, ret, env)
+            produced.update(outputs)
+        return {k: env[k] for k in self._outputs if k in produced and k in env}
+
+    def run_batch(self, columns: Dict[PropKey, List],
+                  tfunction: Callable[[str], Callable]) -> Dict[PropKey, List]:
+        """
+        As `run`, but with columns of values, using each transform function's
+        batch form.
+        """
+        env = dict(columns)
+        produced = set()
+        for hdl in self.firing(env):
+            (inputs, outputs) = self._io[hdl]
+            ret = tfunction(hdl).map_batch(*[env[k] for k in inputs])
+            self.route(hdl, ret, env)
+            produced.update(outputs)
+        return {k: env[k] for k in self._outputs if k in produced and k in env}
+
+    def route(self, hdl: str, ret: Any, env: Dict[PropKey, Any]) -> None:
+        """Store the return value of transform `hdl` in `env` by output PropKey"""
+        outputs = self._io[hdl][1]
+        if isinstance(ret, dict):
+            for (name, k) in zip(self._outnames[hdl], outputs):
+                if name in ret:
+                    env[k] = ret[name]
+        elif len(outputs) == 1:
+            env[outputs[0]] = ret
+        else:
+            raise RuntimeError(f"Transform '{hdl}' has {len(outputs)} outputs "
+                               f"but returned a single value ({ret})")
+
+    def describe(self) -> str:
+        lines = []
+        for (i, stage) in enumerate(self._stages):
+            lines.append(f"stage {i}:")
+            for hdl in stage:
+                (inputs, outputs) = self._io[hdl]
+                lines.append(f"  {hdl}: {', '.join(str(k) for k in inputs)}"
+                             f" -> {', '.join(str(k) for k in outputs)}")
+                if self._deps[hdl]:
+                    lines.append(f"    after: {', '.join(sorted(self._deps[hdl]))}")
+                if hdl in self._in_place:
+                    lines.append("    in place: "
+                                 f"{', '.join(str(k) for k in self._in_place[hdl])}")
+        return "\n".join(lines)
+
+    def _toposort(self) -> List[List[str]]:
+        rank = {hdl: i for (i, hdl) in enumerate(self._deps)}
+        indegree = {hdl: len(deps) for (hdl, deps) in self._deps.items()}
+        downstream = {hdl: [] for hdl in self._deps}
+        for (b, deps) in self._deps.items():
+            for a in deps:
+                downstream[a].append(b)
+        stages = []
+        stage = [hdl for (hdl, n) in indegree.items() if n == 0]
+        while stage:
+            stages.append(stage)
+            nxt = []
+            for a in stage:
+                for b in downstream[a]:
+                    indegree[b] -= 1
+                    if indegree[b] == 0:
+                        nxt.append(b)
+            stage = sorted(nxt, key=rank.get)
+        if sum(len(stage) for stage in stages) < len(self._deps):
+            raise RuntimeError("Transforms have cyclic dependencies: "
+                               f"{sorted(h for (h, n) in indegree.items() if n > 0)}")
+        return stages
@@ -0,0 +1,87 @@
+"""
+bento_transforms.converters.records
+
+Whole-record conversion. A source record is a dict of node handles to dicts
+of property handles and values, e.g.
+
+    {"participant": {"race": "Asian", "sex_at_birth": "Female"},
+     "study_personnel": {"personnel_name": "James Earl Jones"}}
+
+A RecordPlan holds the transform functions that fire for one record
+"shape" (the set of node/property pairs present), in the order of an
+ExecutionPlan, and routes record values to their inputs, and their outputs
+to later transforms and into a target record keyed by target node. The
+output properties of the plan (see ExecutionPlan.outputs) are written to
+the target record.
+"""
+
+from __future__ import annotations
+from typing import Callable, Dict, FrozenSet, List, Tuple
+from .plan import ExecutionPlan, PropKey
+
+NodeProp = Tuple[str, str]
+
+
+def record_shape(record: Dict[str, dict]) -> FrozenSet[NodeProp]:
+    return frozenset((node, prop) for (node, props) in record.items()
+                     for prop in props)
+
+
+class RecordPlan:
+    """
+    The transforms to apply to records of one shape, in plan order.
+    `seeds` are the (PropKey, node, prop) source properties read from the
+    record; `entries` are (handle, transform function, input PropKeys);
+    `emit` are the target PropKeys written to the target record.
+    Values are passed between transforms by PropKey, using the routing of
+    `plan`.
+    """
+    def __init__(self, plan: ExecutionPlan,
+                 seeds: List[Tuple[PropKey, str, str]],
+                 entries: List[Tuple[str, Callable, List[PropKey]]],
+                 emit: List[PropKey]):
+        self._plan = plan
+        self._seeds = seeds
+        self._entries = entries
+        self._emit = emit
+
+    @property
+    def handles(self) -> List[str]:
+        return [e[0] for e in self._entries]
+
+    def apply(self, record: Dict[str, dict]) -> Dict[str, dict]:
+        env = {}
+        for (k, n, p) in self._seeds:
+            env[k] = record[n][p]
+        route = self._plan.route
+        for (hdl, tf, inputs) in self._entries:
+            route(hdl, tf(*[env[k] for k in inputs]), env)
+        out = {}
+        for k in self._emit:
+            if k in env:
+                out.setdefault(k.node, {})[k.prop] = env[k]
+        return out
+
+
+def record_plan(plan: ExecutionPlan, shape: FrozenSet[NodeProp],
+                tfunction: Callable[[str], Callable],
+                to_model: Tuple[str, str] | None = None) -> RecordPlan:
+    """
+    Plan the conversion of records of `shape`: record values seed the
+    plan's source properties with the same node and property handles.
+    If `to_model` (model, version) is given, every property of that model
+    the transforms produce is written to target records; otherwise, those
+    of the plan's target models.
+    """
+    seeds = [(k, k.node, k.prop) for k in plan.sources
+             if (k.node, k.prop) in shape]
+    hdls = plan.firing(k for (k, _, _) in seeds)
+    entries = [(hdl, tfunction(hdl), plan.io(hdl)[0]) for hdl in hdls]
+    targets = set(plan.outputs(to_model))
+    emit = []
+    for hdl in hdls:
+        for k in plan.io(hdl)[1]:
+            if k in targets:
+                targets.discard(k)
+                emit.append(k)
+    return RecordPlan(plan, seeds, entries, emit)
@@ -0,0 +1,139 @@
+"""
+bento_transforms.converters.registry
+
+A registry of transforms across many models and model versions. Transforms
+are indexed by the (model, version) pairs they convert from and to, which
+form a graph. Given a source and a target (model, version), the registry
+finds the cheapest chain of conversions between them, and composes the
+transforms on that chain into one Converter.
+
+The composed Converter keeps only the transforms that contribute to target
+model properties, so intermediate models are converted only as far as the
+target requires.
+"""
+
+from __future__ import annotations
+import heapq
+from collections import Counter
+from itertools import count
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+from ..mdf.pymodels import GeneralTransform
+from ..mdf.reader import TransformReader
+from .converter import Converter
+from .plan import ExecutionPlan
+
+ModelVersion = Tuple[str, str]
+
+
+def model_pair(gtf: GeneralTransform) -> Tuple[ModelVersion, ModelVersion]:
+    """The (model, version) pairs a transform converts from and to"""
+    frm = Counter((i.Model, i.Version) for i in gtf.Inputs).most_common(1)
+    to = Counter((o.Model, o.Version) for o in gtf.Outputs).most_common(1)
+    return (frm[0][0], to[0][0])
+
+
+class ConverterRegistry:
+    def __init__(self, *sources: str | Path | TransformReader
+                 | Mapping[str, GeneralTransform]):
+        # (from, to) -> {handle: GeneralTransform}
+        self._edges = {}
+        self._costs = {}
+        self._converters = {}
+        for src in sources:
+            self.add(src)
+
+    @property
+    def model_pairs(self) -> List[Tuple[ModelVersion, ModelVersion]]:
+        return list(self._edges)
+
+    def add(self, src: str | Path | TransformReader
+            | Mapping[str, GeneralTransform],
+            cost: float | None = None) -> None:
+        """
+        Add transforms from an MDF-Transform file, a TransformReader, or a
+        dict of GeneralTransforms. Each (from, to) pair the transforms cover
+        costs 1 to traverse, unless `cost` is given.
+        """
+        if isinstance(src, (str, Path)):
+            src = TransformReader(src)
+        if isinstance(src, TransformReader):
+            src = src.transforms
+        for (hdl, gtf) in src.items():
+            pair = model_pair(gtf)
+            tfs = self._edges.setdefault(pair, {})
+            if hdl in tfs and tfs[hdl] != gtf:
+                raise RuntimeError(f"Transform '{hdl}' for {pair[0]} -> {pair[1]} "
+                                   "is already registered with a different spec")
+            tfs[hdl] = gtf
+            if cost is not None:
+                self._costs[pair] = cost
+        self._converters = {}
+
+    def path(self, frm: ModelVersion,
+             to: ModelVersion) -> List[Tuple[ModelVersion, ModelVersion]]:
+        """The cheapest chain of (from, to) model pairs from `frm` to `to`"""
+        frm = tuple(frm)
+        to = tuple(to)
+        adj = {}
+        for (a, b) in self._edges:
+            adj.setdefault(a, []).append(b)
+        tie = count()
+        queue = [(0, next(tie), frm, [])]
+        done = set()
+        while queue:
+            (cost, _, mv, hops) = heapq.heappop(queue)
+            if mv == to:
+                return hops
+            if mv in done:
+                continue
+            done.add(mv)
+            for nxt in adj.get(mv, []):
+                if nxt not in done:
+                    heapq.heappush(queue, (cost + self._costs.get((mv, nxt), 1),
+                                           next(tie), nxt, hops + [(mv, nxt)]))
+        raise RuntimeError(f"No chain of transforms converts {frm} to {to}")
+
+    def converter(self, frm: ModelVersion, to: ModelVersion,
+                  **kwargs) -> Converter:
+        """
+        A Converter from `frm` to `to` (model, version) pairs, composed from
+        the transforms of the cheapest chain between them. Composed converters
+        are cached per pair; `kwargs` are passed to the Converter constructor
+        on first construction.
+        """
+        frm = tuple(frm)
+        to = tuple(to)
+        if frm == to:
+            raise RuntimeError(f"Can't convert {frm} to itself")
+        if (frm, to) not in self._converters:
+            gtfs = self.compose(self.path(frm, to))
+            self._converters[(frm, to)] = Converter(gtfs=gtfs, from_model=frm,
+                                                    to_model=to, **kwargs)
+        return self._converters[(frm, to)]
+
+    def compose(self, hops: List[Tuple[ModelVersion, ModelVersion]]
+                ) -> Dict[str, GeneralTransform]:
+        """
+        Collect the transforms of a chain of model pairs, keeping those that
+        produce properties of the last model, and those they depend on.
+        Handles that recur along the chain are qualified by hop number.
+        """
+        gtfs = {}
+        for (i, pair) in enumerate(hops):
+            for (hdl, gtf) in self._edges[pair].items():
+                gtfs[hdl if hdl not in gtfs else f"{hdl}@{i}"] = gtf
+        if not hops:
+            return gtfs
+        (model, version) = hops[-1][1]
+        plan = ExecutionPlan(gtfs)
+        keep = set()
+        pending = [hdl for hdl in gtfs
+                   if any(k.model == model and k.version == version
+                          for k in plan.io(hdl)[1])]
+        while pending:
+            hdl = pending.pop()
+            if hdl not in keep:
+                keep.add(hdl)
+                pending.extend(plan.dependencies(hdl))
+        return {hdl: gtf for (hdl, gtf) in gtfs.items() if hdl in keep}
@@ -0,0 +1,108 @@
+"""
+bento_transforms.converters.tf_utils
+
+Helpers shared by the transform function backends: resolving step
+entrypoints to methods, compiling step params, and naming inputs and outputs.
+"""
+
+from __future__ import annotations
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from pydantic import ValidationError
+from ..mdf.pymodels import GeneralTransform, TfStepSpec
+from ..tflib.protocol import get_params_model, is_pure
+
+# a backend option: called with each step and its method, returns the
+# callable to use for the step (see bento_transforms.converters.metrics)
+StepWrapper = Callable[[TfStepSpec, Callable], Callable]
+
+
+def io_arg_names(gtf: GeneralTransform) -> Tuple[List[str], List[str]]:
+    """Return the `node_prop` names of a transform's inputs and outputs, in order"""
+    args = []
+    for inp in gtf.Inputs:
+        for prop in inp.Props:
+            args.append(inp.Node+"_"+prop)
+    outs = []
+    for outp in gtf.Outputs:
+        for prop in outp.Props:
+            outs.append(outp.Node+"_"+prop)
+    return (args, outs)
+
+
+# step methods resolved so far, by (package name, entrypoint)
+_step_methods: Dict[Tuple[str, str], Callable | None] = {}
+
+
+def resolve_step_method(step: TfStepSpec) -> Callable | None:
+    """Import and return the method for a transform step; None for an Identity step"""
+    key = (step.Package.Name, step.Entrypoint)
+    if key not in _step_methods:
+        _step_methods[key] = _import_step_method(step)
+    return _step_methods[key]
+
+
+def step_methods(gtfs: Iterable[GeneralTransform]
+                 ) -> Dict[Tuple[str, str], Callable | None]:
+    """The resolved methods of all steps of the transforms"""
+    ret = {}
+    for gtf in gtfs:
+        for step in gtf.Steps:
+            ret[(step.Package.Name, step.Entrypoint)] = resolve_step_method(step)
+    return ret
+
+
+def register_step_methods(methods: Dict[Tuple[str, str], Callable | None]) -> None:
+    """Add already-resolved step methods, so they aren't looked up again"""
+    _step_methods.update(methods)
+
+
+def _import_step_method(step: TfStepSpec) -> Callable | None:
+    mod = step.Package.Name
+    if (mod == "Identity"):
+        return None
+    ep = step.Entrypoint.split(".")
+    mth = ep.pop()
+    method = None
+    if len(ep) > 0:
+        qmod = ".".join([mod]+ep)
+    try:
+        module = importlib.import_module(qmod)
+        if hasattr(module, mth):
+            method = getattr(module, mth)
+    except ModuleNotFoundError:
+        # check if imported to the top level via __init__.py
+        module = importlib.import_module(".".join([mod, "__init__"]))
+        if hasattr(module, ".".join(ep)):
+            method = getattr(getattr(module, ".".join(ep)), mth, None)
+    if method is None:
+        raise RuntimeError(f"Module {mod} has no method '{mth}'")
+    return method
+
+
+def compile_step_params(method: Callable | None, step: TfStepSpec) -> Any:
+    """
+    Validate a step's Params once, against the params model declared by the
+    step method (see bento_transforms.tflib.protocol.params_model), and return
+    the value to pass as `params` on every call. Params of methods that
+    declare no model are returned unchanged.
+    """
+    model = get_params_model(method) if method is not None else None
+    if model is None or step.Params is None:
+        return step.Params
+    if not isinstance(step.Params, dict):
+        raise RuntimeError(f"Params for step '{step.Entrypoint}' must be a mapping "
+                           f"of {model.__name__} fields (got {step.Params})")
+    try:
+        return model(**step.Params)
+    except ValidationError as e:
+        raise RuntimeError(f"Invalid Params for step '{step.Entrypoint}': {e}") from e
+
+
+def transform_is_pure(gtf: GeneralTransform) -> bool:
+    """True unless a step method of the transform is declared impure"""
+    for step in gtf.Steps:
+        method = resolve_step_method(step)
+        if method is not None and not is_pure(method):
+            return False
+    return True
@@ -0,0 +1,217 @@
+"""
+bento_transforms.converters.tracing
+
+Step-level tracing of transform functions. A Tracer passes events to its
+hooks (TraceHook subclasses) when a transform call starts and ends, and
+when each of its steps starts and ends. Events are span dicts:
+
+- `trace`: the number of the record (or of the transform call, outside
+  Converter.convert_records) the span belongs to
+- `kind`: "transform" or "step"
+- `handle`: the transform handle
+- `entrypoint`: the step Entrypoint (None for transforms)
+- `params`: a digest of the step Params (None if there are none)
+- `start`: wall clock time at the start, and, in end events,
+  `duration` in seconds and `error` (the exception repr, or None)
+- with `capture_values=True`, `inputs` and, in end events, `output`
+
+Tracing is sampled per record: with `sample_every=N`, all the transforms
+and steps of every Nth record are traced, and other records run without
+events. Calls answered from a transform's memo cache are not traced. A
+Converter wraps its transform functions and steps for tracing only when
+it is given a Tracer with hooks; otherwise nothing is wrapped, and
+tracing costs nothing.
+
+Two hooks are included: RingBuffer keeps the latest spans in memory, and
+JsonlExporter writes spans to a file, one JSON object per line.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, List
+from ..mdf.pymodels import TfStepSpec
+
+
+class TraceHook:
+    """Tracing hook interface; methods that aren't overridden do nothing"""
+    def on_transform_start(self, span: dict) -> None:
+        pass
+
+    def on_transform_end(self, span: dict) -> None:
+        pass
+
+    def on_step_start(self, span: dict) -> None:
+        pass
+
+    def on_step_end(self, span: dict) -> None:
+        pass
+
+
+class RingBuffer(TraceHook):
+    """The latest `maxlen` finished spans, in memory"""
+    def __init__(self, maxlen: int = 10000):
+        self._spans = deque(maxlen=maxlen)
+
+    def on_transform_end(self, span: dict) -> None:
+        self._spans.append(span)
+
+    def on_step_end(self, span: dict) -> None:
+        self._spans.append(span)
+
+    def spans(self) -> List[dict]:
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class JsonlExporter(TraceHook):
+    """Appends finished spans to a JSONL file; values are written with str()"""
+    def __init__(self, path: str | Path):
+        self._fh = Path(path).open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def on_transform_end(self, span: dict) -> None:
+        self._write(span)
+
+    def on_step_end(self, span: dict) -> None:
+        self._write(span)
+
+    def _write(self, span: dict) -> None:
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            self._fh.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+    def __enter__(self) -> JsonlExporter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def params_digest(params: Any) -> str | None:
+    if params is None:
+        return None
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+
+
+# a record is being converted, but isn't sampled
+_UNSAMPLED = -1
+
+
+class Tracer:
+    def __init__(self, *hooks: TraceHook, sample_every: int = 1,
+                 capture_values: bool = False):
+        if sample_every < 1:
+            raise RuntimeError("sample_every must be at least 1")
+        self._hooks = list(hooks)
+        self._sample_every = sample_every
+        self._capture = capture_values
+        self._records = count()
+        # the trace of the record or transform call in progress, per thread
+        self._local = threading.local()
+
+    @property
+    def hooks(self) -> List[TraceHook]:
+        return self._hooks
+
+    def _sample(self) -> int:
+        n = next(self._records)
+        return n if n % self._sample_every == 0 else _UNSAMPLED
+
+    def start_record(self) -> None:
+        """Start a record: its transform calls are sampled together"""
+        self._local.record = self._sample()
+
+    def end_record(self) -> None:
+        self._local.record = None
+
+    def _emit(self, event: str, span: dict) -> None:
+        for hook in self._hooks:
+            getattr(hook, event)(span)
+
+    def wrap_transform(self, handle: str, tf: Callable) -> Callable:
+        """Trace a transform function under `handle`; map_batch is not traced"""
+        local = self._local
+        capture = self._capture
+
+        def traced(*args, **kwargs):
+            trace = getattr(local, "record", None)
+            if trace is None:
+                trace = self._sample()
+            if trace == _UNSAMPLED:
+                return tf(*args, **kwargs)
+            span = {"trace": trace, "kind": "transform", "handle": handle,
+                    "entrypoint": None, "params": None, "start": time.time()}
+            if capture:
+                span["inputs"] = list(args) if args else dict(kwargs)
+            self._emit("on_transform_start", span)
+            span = dict(span)
+            local.trace = trace
+            t0 = time.perf_counter()
+            error = None
+            try:
+                ret = tf(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                local.trace = None
+                span["duration"] = time.perf_counter() - t0
+                span["error"] = repr(error) if error is not None else None
+                if capture and error is None:
+                    span["output"] = ret
+                self._emit("on_transform_end", span)
+            return ret
+
+        for attr in ("inputs", "outputs", "map_batch", "source"):
+            if hasattr(tf, attr):
+                setattr(traced, attr, getattr(tf, attr))
+        traced.__wrapped__ = tf
+        return traced
+
+    def wrap_step(self, handle: str, step: TfStepSpec, method: Callable) -> Callable:
+        """Trace a step method of the transform `handle`"""
+        local = self._local
+        capture = self._capture
+        entrypoint = step.Entrypoint
+        digest = params_digest(step.Params)
+
+        def traced(*args, **kwargs):
+            trace = getattr(local, "trace", None)
+            if trace is None:
+                return method(*args, **kwargs)
+            span = {"trace": trace, "kind": "step", "handle": handle,
+                    "entrypoint": entrypoint, "params": digest,
+                    "start": time.time()}
+            if capture:
+                span["inputs"] = list(args)
+            self._emit("on_step_start", span)
+            span = dict(span)
+            t0 = time.perf_counter()
+            error = None
+            try:
+                ret = method(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                span["duration"] = time.perf_counter() - t0
+                span["error"] = repr(error) if error is not None else None
+                if capture and error is None:
+                    span["output"] = ret
+                self._emit("on_step_end", span)
+            return ret
+        return traced
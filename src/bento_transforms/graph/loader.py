@@ -0,0 +1,129 @@
+"""
+bento_transforms.graph.loader
+
+Read transforms back out of MDB as GeneralTransform objects. TransformLoader
+runs a fixed set of queries, whatever the number of transforms: one for
+the transform nodes, one for the steps of all transforms (each with its
+position in the first_tf_step/next_tf_step chain), and one each for the
+input and output properties. The queries run in one read transaction, in
+one session of the given neo4j driver (which pools its connections).
+
+The order of a transform's inputs and outputs is read from the `position`
+of its value_as_tf_input and tf_output_as_value relationships (see
+bento_transforms.graph.mc_utils); relationships without one sort after
+those with one, by node and property handle.
+"""
+
+from __future__ import annotations
+import json
+from itertools import groupby
+from typing import Any, Dict, List
+from ..mdf.pymodels import (
+    GeneralTransform,
+    IdentityTransform,
+    IOSpec,
+    PackageC,
+    TfStepSpec,
+)
+
+TRANSFORMS_QUERY = "MATCH (t:transform) RETURN t.nanoid AS tf, t.handle AS handle"
+
+STEPS_QUERY = (
+    "MATCH p = (t:transform)-[:first_tf_step]->(:tf_step)"
+    "-[:next_tf_step*0..]->(s:tf_step) "
+    "RETURN t.nanoid AS tf, length(p) AS pos, s.package AS package, "
+    "s.version AS version, s.entrypoint AS entrypoint, "
+    "s.params_json AS params_json"
+)
+
+_IO_RETURN = ("RETURN t.nanoid AS tf, r.position AS position, n.model AS model, "
+              "n.version AS version, n.handle AS node, p.handle AS prop")
+
+INPUTS_QUERY = ("MATCH (n:node)-[:has_property]->(p:property)"
+                "-[r:value_as_tf_input]->(t:transform) " + _IO_RETURN)
+
+OUTPUTS_QUERY = ("MATCH (t:transform)-[r:tf_output_as_value]->(p:property)"
+                 "<-[:has_property]-(n:node) " + _IO_RETURN)
+
+
+class TransformLoader:
+    def __init__(self, driver: Any, database: str | None = None):
+        self._driver = driver
+        self._database = database
+
+    @classmethod
+    def from_mdb(cls, mdb: Any, database: str | None = None) -> TransformLoader:
+        """A loader using the driver of a bento_meta.mdb.MDB object"""
+        return cls(mdb.driver, database=database)
+
+    def load(self) -> Dict[str, GeneralTransform]:
+        """All the transforms in MDB, by handle"""
+        with self._driver.session(database=self._database) as session:
+            results = session.execute_read(_run_queries)
+        return build_transforms(*results)
+
+
+def _run_queries(tx: Any) -> List[List[dict]]:
+    return [tx.run(qry).data()
+            for qry in (TRANSFORMS_QUERY, STEPS_QUERY, INPUTS_QUERY, OUTPUTS_QUERY)]
+
+
+def build_transforms(transforms: List[dict], steps: List[dict],
+                     inputs: List[dict], outputs: List[dict]
+                     ) -> Dict[str, GeneralTransform]:
+    """
+    GeneralTransforms, by handle, from the records of TRANSFORMS_QUERY,
+    STEPS_QUERY, INPUTS_QUERY and OUTPUTS_QUERY (as dicts)
+    """
+    handles = {}
+    seen = set()
+    for rec in transforms:
+        if rec["handle"] in seen:
+            raise RuntimeError(f"Transform '{rec['handle']}' is stored more than "
+                               "once; sync the transforms to replace duplicates")
+        seen.add(rec["handle"])
+        handles[rec["tf"]] = rec["handle"]
+    tf_steps = _by_transform(steps, key=lambda rec: rec["pos"])
+    tf_inputs = _by_transform(inputs, key=_io_order)
+    tf_outputs = _by_transform(outputs, key=_io_order)
+    ret = {}
+    for (nanoid, hdl) in handles.items():
+        if not tf_steps.get(nanoid):
+            raise RuntimeError(f"Transform '{hdl}' has no steps in MDB")
+        specs = [_step_spec(rec) for rec in tf_steps[nanoid]]
+        ins = _io_specs(tf_inputs.get(nanoid, []))
+        outs = _io_specs(tf_outputs.get(nanoid, []))
+        if all(spec.Package.Name == "Identity" for spec in specs):
+            ret[hdl] = IdentityTransform(Inputs=ins, Outputs=outs)
+        else:
+            ret[hdl] = GeneralTransform(Inputs=ins, Outputs=outs, Steps=specs)
+    return ret
+
+
+def _by_transform(records: List[dict], key) -> Dict[str, List[dict]]:
+    ret = {}
+    for rec in records:
+        ret.setdefault(rec["tf"], []).append(rec)
+    for recs in ret.values():
+        recs.sort(key=key)
+    return ret
+
+
+def _io_order(rec: dict):
+    pos = rec.get("position")
+    return (pos is None, pos or 0, rec["node"], rec["prop"])
+
+
+def _step_spec(rec: dict) -> TfStepSpec:
+    params = rec.get("params_json")
+    return TfStepSpec(Package=PackageC(Name=rec["package"], Version=rec.get("version")),
+                      Entrypoint=rec["entrypoint"],
+                      Params=json.loads(params) if params is not None else None)
+
+
+def _io_specs(records: List[dict]) -> List[IOSpec]:
+    # runs of properties of one node make one IOSpec
+    return [IOSpec(Model=model, Version=version, Node=node,
+                   Props=[rec["prop"] for rec in recs])
+            for ((model, version, node), recs)
+            in groupby(records, key=lambda r: (r["model"], r["version"], r["node"]))]
@@ -1,4 +1,5 @@
 import minicypher as mc
+from typing import Dict, Iterable, List, Tuple
 from toolz import first, last
 from itertools import pairwise
 from bento_meta.mdb import make_nanoid
@@ -64,10 +65,12 @@ def create_tf_and_steps(tf: Transform) -> dict:
     
 
 def link_tf_to_io(tf_nanoid: str, tf: Transform) -> list:
+    # `position` keeps the order of the transform function's arguments
+    # and results, which the graph otherwise loses
     stmts = []
     tfn = mc.N(label="transform",
                props=[mc.P(handle="nanoid", value=tf_nanoid)])
-    for prop in tf.input_props.values():
+    for (i, prop) in enumerate(tf.input_props.values()):
         t = t_from_property(prop)
         stmts.append(
             mc.Statement(
@@ -75,14 +78,15 @@ def link_tf_to_io(tf_nanoid: str, tf: Transform) -> list:
                 mc.With(t.nodes()[1].plain_var(),
                          tfn.plain_var()),
                 mc.Merge(
-                    mc.R(Type="value_as_tf_input").relate(
+                    mc.R(Type="value_as_tf_input",
+                         props=[mc.P(handle="position", value=i)]).relate(
                          t.nodes()[1].plain_var(),
                          tfn.plain_var())
                 ),
                 terminate=True
             )
         )
-    for prop in tf.output_props.values():
+    for (i, prop) in enumerate(tf.output_props.values()):
         t = t_from_property(prop)
         stmts.append(
             mc.Statement(
@@ -90,7 +94,8 @@ def link_tf_to_io(tf_nanoid: str, tf: Transform) -> list:
                 mc.With(tfn.plain_var(),
                         t.nodes()[1].plain_var()),
                 mc.Merge(
-                    mc.R(Type="tf_output_as_value").relate(
+                    mc.R(Type="tf_output_as_value",
+                         props=[mc.P(handle="position", value=i)]).relate(
                         tfn.plain_var(),
                         t.nodes()[1].plain_var())
                 ),
@@ -100,10 +105,15 @@ def link_tf_to_io(tf_nanoid: str, tf: Transform) -> list:
     return stmts
 
 
+def owner_node(prop: Property) -> Node:
+    # the node comes first: a pooled property is owned by its node before
+    # any transform uses it (see graph.meta.intern_property)
+    return next(e for e in prop.belongs.values() if isinstance(e, Node))
+
+
 def t_from_property(prop: Property):
     # find node
-    node = [e for e in prop.belongs.values() if isinstance(e, Node)]
-    node = node[0]
+    node = owner_node(prop)
     n = mc.N(label="node",
              props=[mc.P(handle="model", value=node.model),
                     mc.P(handle="version", value=node.version),
@@ -114,3 +124,155 @@ def t_from_property(prop: Property):
                     mc.P(handle="handle", value=prop.handle)])
     r = mc.R(Type="has_property")
     return r.relate(n, p)
+
+
+# Batched upsert: the graph of create_tf_and_steps and link_tf_to_io, as
+# rows of parameters for a few UNWIND statements, one per kind of entity,
+# applied in this order (relationships after the nodes they link)
+UPSERT_KINDS = ["transform", "tf_step", "first_tf_step", "last_tf_step",
+                "next_tf_step", "value_as_tf_input", "tf_output_as_value"]
+
+
+def upsert_rows(tf: Transform, fingerprint: str | None = None
+                ) -> Dict[str, List[dict]]:
+    """
+    The nodes and relationships create_tf_and_steps and link_tf_to_io
+    create for a transform, as parameter rows by UPSERT_KINDS kind.
+    Properties with None values are left out, as minicypher leaves them
+    out of the literal statements. A `fingerprint` (see
+    bento_transforms.graph.sync) is stored on the transform node.
+    """
+    rows = {kind: [] for kind in UPSERT_KINDS}
+    tfn_id = make_nanoid()
+    rows["transform"].append(_present({"handle": tf.handle, "nanoid": tfn_id,
+                                       "fingerprint": fingerprint}))
+    step_ids = []
+    stp = tf.first_step
+    while stp is not None:
+        step_ids.append(make_nanoid())
+        rows["tf_step"].append(_present({"package": stp.package,
+                                         "version": stp.version,
+                                         "entrypoint": stp.entrypoint,
+                                         "params_json": stp.params_json,
+                                         "nanoid": step_ids[-1]}))
+        stp = stp.next_step
+    if step_ids:
+        rows["first_tf_step"].append({"tf": tfn_id, "step": first(step_ids)})
+        rows["last_tf_step"].append({"tf": tfn_id, "step": last(step_ids)})
+    for (a_id, b_id) in pairwise(step_ids):
+        rows["next_tf_step"].append({"step": a_id, "next_step": b_id})
+    for (kind, props) in (("value_as_tf_input", tf.input_props),
+                          ("tf_output_as_value", tf.output_props)):
+        for (i, prop) in enumerate(props.values()):
+            node = owner_node(prop)
+            rows[kind].append({
+                "tf": tfn_id,
+                "position": i,
+                "node": _present({"model": node.model, "version": node.version,
+                                  "handle": node.handle}),
+                "prop": _present({"model": prop.model, "version": prop.version,
+                                  "handle": prop.handle}),
+            })
+    return rows
+
+
+def batched_upsert_statements(tfs: Iterable[Transform], batch_size: int = 1000,
+                              fingerprints: Dict[str, str] | None = None
+                              ) -> List[Tuple[str, dict]]:
+    """
+    Cypher to create the transforms and their steps, and link them to
+    their input and output properties, as (statement, parameters) pairs:
+    `UNWIND $rows` statements with at most `batch_size` rows each. The
+    statements create the same graph as create_tf_and_steps and
+    link_tf_to_io, but there are few of them, and their text doesn't
+    vary with the data, so the server can reuse their plans. Each
+    property is matched once per batch, with its links to all the
+    transforms that use it. Transform nodes get their `fingerprints`, by
+    handle, if given.
+    """
+    _check_batch_size(batch_size)
+    fingerprints = fingerprints or {}
+    rows = {kind: [] for kind in UPSERT_KINDS}
+    for tf in tfs:
+        for (kind, krows) in upsert_rows(tf, fingerprints.get(tf.handle)).items():
+            rows[kind].extend(krows)
+    for kind in ("value_as_tf_input", "tf_output_as_value"):
+        rows[kind] = _property_links(rows[kind])
+    stmts = []
+    for kind in UPSERT_KINDS:
+        # MERGE can't take null property values, so rows missing
+        # properties get a statement of their own
+        by_text = {}
+        for row in rows[kind]:
+            by_text.setdefault(_upsert_statement(kind, row), []).append(row)
+        for (text, krows) in by_text.items():
+            for i in range(0, len(krows), batch_size):
+                stmts.append((text, {"rows": krows[i:i+batch_size]}))
+    return stmts
+
+
+def _property_links(rows: List[dict]) -> List[dict]:
+    # one row per property, matched once, with its links to transforms
+    by_prop = {}
+    for row in rows:
+        key = (tuple(row["node"].items()), tuple(row["prop"].items()))
+        if key not in by_prop:
+            by_prop[key] = {"node": row["node"], "prop": row["prop"], "links": []}
+        by_prop[key]["links"].append({"tf": row["tf"], "position": row["position"]})
+    return list(by_prop.values())
+
+
+# delete transforms by handle, with their steps
+DELETE_TRANSFORMS = (
+    "UNWIND $rows AS row MATCH (t:transform {handle: row.handle}) "
+    "OPTIONAL MATCH (t)-[:first_tf_step]->(:tf_step)-[:next_tf_step*0..]->(s:tf_step) "
+    "DETACH DELETE s, t"
+)
+
+
+def batched_delete_statements(handles: Iterable[str], batch_size: int = 1000
+                              ) -> List[Tuple[str, dict]]:
+    """
+    Cypher to delete the transforms with these handles, their steps, and
+    their links to properties, as (statement, parameters) pairs
+    """
+    _check_batch_size(batch_size)
+    rows = [{"handle": hdl} for hdl in handles]
+    return [(DELETE_TRANSFORMS, {"rows": rows[i:i+batch_size]})
+            for i in range(0, len(rows), batch_size)]
+
+
+def _check_batch_size(batch_size: int) -> None:
+    if batch_size < 1:
+        raise RuntimeError("Batch size must be at least 1")
+
+
+def _present(props: dict) -> dict:
+    return {k: v for (k, v) in props.items() if v is not None}
+
+
+def _row_map(row: dict, var: str) -> str:
+    return "{" + ", ".join(f"{k}: {var}.{k}" for k in row) + "}"
+
+
+def _upsert_statement(kind: str, row: dict) -> str:
+    unwind = "UNWIND $rows AS row "
+    if kind in ("transform", "tf_step"):
+        return unwind + f"MERGE (:{kind} {_row_map(row, 'row')})"
+    if kind in ("first_tf_step", "last_tf_step"):
+        return unwind + ("MATCH (t:transform {nanoid: row.tf}), "
+                         "(s:tf_step {nanoid: row.step}) "
+                         f"MERGE (t)-[:{kind}]->(s)")
+    if kind == "next_tf_step":
+        return unwind + ("MATCH (a:tf_step {nanoid: row.step}), "
+                         "(b:tf_step {nanoid: row.next_step}) "
+                         "MERGE (a)-[:next_tf_step]->(b)")
+    match = (f"MATCH (n:node {_row_map(row['node'], 'row.node')})"
+             f"-[:has_property]->(p:property {_row_map(row['prop'], 'row.prop')}) "
+             "UNWIND row.links AS link "
+             "MATCH (t:transform {nanoid: link.tf}) ")
+    if kind == "value_as_tf_input":
+        return unwind + match + ("MERGE (p)-[:value_as_tf_input "
+                                 "{position: link.position}]->(t)")
+    return unwind + match + ("MERGE (t)-[:tf_output_as_value "
+                             "{position: link.position}]->(p)")
@@ -8,27 +8,48 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import List
+from typing import Dict, List, Mapping, Tuple
 from ..mdf.pymodels import GeneralTransform
 from .mc_utils import (
+    batched_upsert_statements,
     create_tf_and_steps,
     link_tf_to_io
 )
+from .sync import SyncPlan, transform_fingerprint
     
 from bento_meta.objects import Node, Property
 from bento_meta.tf_objects import Transform, TfStep
 
+# pool keys: (model, version, node) and (model, version, node, prop)
+NodeKey = Tuple[str, str, str]
+PropKey = Tuple[str, str, str, str]
+
 
 class TransformModel:
     def __init__(self, gtfs=dict[GeneralTransform]):
+        self._gtfs = gtfs
+        self._fingerprints = None
+        # nodes and properties shared by all the transforms
+        self._nodes = {}
+        self._props = {}
         self._transforms = {}
         for (hdl, tf) in gtfs.items():
-            self._transforms[hdl] = gtf_to_tf_graph(tf, hdl)
+            self._transforms[hdl] = gtf_to_tf_graph(tf, hdl, self._nodes, self._props)
 
     @property
     def transforms(self):
         return self._transforms
 
+    @property
+    def nodes(self) -> Dict[NodeKey, Node]:
+        """The model nodes the transforms use, by (model, version, node)"""
+        return self._nodes
+
+    @property
+    def props(self) -> Dict[PropKey, Property]:
+        """The properties the transforms use, by (model, version, node, prop)"""
+        return self._props
+
     def cypher_for_upsert(self) -> List[str]:
         stmts = []
         for tf in self.transforms.values():
@@ -38,40 +59,51 @@ class TransformModel:
                 link_tf_to_io(ss['tf_nanoid'], tf)
             )
         return stmts
+
+    def cypher_for_upsert_batched(self, batch_size: int = 1000
+                                  ) -> List[Tuple[str, dict]]:
+        """
+        The upsert as a few parameterized `UNWIND $rows` statements, with
+        at most `batch_size` rows each, as (statement, parameters) pairs
+        """
+        return batched_upsert_statements(self.transforms.values(), batch_size)
+
+    @property
+    def fingerprints(self) -> Dict[str, str]:
+        """Content fingerprints of the transforms, by handle"""
+        if self._fingerprints is None:
+            self._fingerprints = {hdl: transform_fingerprint(gtf)
+                                  for (hdl, gtf) in self._gtfs.items()}
+        return self._fingerprints
+
+    def sync_plan(self, stored: Mapping[str, str | None],
+                  prune: bool = False) -> SyncPlan:
+        """
+        The changes to make to stored transforms, given their fingerprints
+        by handle (see bento_transforms.graph.sync)
+        """
+        return SyncPlan(self.transforms, self.fingerprints, stored, prune=prune)
                  
 
-def gtf_to_tf_graph(gtf: GeneralTransform, handle: str) -> Transform:
+def gtf_to_tf_graph(gtf: GeneralTransform, handle: str,
+                    nodes: Dict[NodeKey, Node] | None = None,
+                    props: Dict[PropKey, Property] | None = None) -> Transform:
+    """
+    Express a GeneralTransform as a bento-meta Transform. Nodes and
+    properties are taken from, and added to, the `nodes` and `props` pools
+    if given, so transforms built with the same pools share them.
+    """
     tf = Transform({"handle": handle})
-    nodes = {}
-    props = {}
+    nodes = {} if nodes is None else nodes
+    props = {} if props is None else props
     for inp in gtf.Inputs:
-        nidx = (inp.Model, inp.Version, inp.Node)
-        if nodes.get(nidx) is None:
-            nodes[nidx] = Node({"handle": inp.Node,
-                                "model": inp.Model,
-                                "version": inp.Version})
         for p in inp.Props:
-            pidx = (inp.Model, inp.Version, p)
-            if props.get(pidx) is None:
-                props[pidx] = Property({"handle": p,
-                                        "model": inp.Model,
-                                        "version": inp.Version})
-            nodes[nidx].props[p] = props[pidx]
-            tf.input_props[f"{nodes[nidx].handle}.{props[pidx].handle}"] = props[pidx]
+            prop = intern_property(nodes, props, inp.Model, inp.Version, inp.Node, p)
+            tf.input_props[f"{inp.Node}.{p}"] = prop
     for outp in gtf.Outputs:
-        nidx = (outp.Model, outp.Version, outp.Node)
-        if nodes.get(nidx) is None:
-            nodes[nidx] = Node({"handle": outp.Node,
-                                "model": outp.Model,
-                                "version": outp.Version})
         for p in outp.Props:
-            pidx = (outp.Model, outp.Version, p)
-            if props.get(pidx) is None:
-                props[pidx] = Property({"handle": p,
-                                        "model": outp.Model,
-                                        "version": outp.Version})
-            nodes[nidx].props[p] = props[pidx]
-            tf.output_props[f"{nodes[nidx].handle}.{props[pidx].handle}"] = props[pidx]
+            prop = intern_property(nodes, props, outp.Model, outp.Version, outp.Node, p)
+            tf.output_props[f"{outp.Node}.{p}"] = prop
     first_step = True
     step = None
     prev_step = None
@@ -90,3 +122,16 @@ def gtf_to_tf_graph(gtf: GeneralTransform, handle: str) -> Transform:
     tf.last_step = step
     return tf
 
+
+def intern_property(nodes: Dict[NodeKey, Node], props: Dict[PropKey, Property],
+                    model: str, version: str, node: str, prop: str) -> Property:
+    """The pooled Property `prop` of `node`, created (with its Node) if new"""
+    pkey = (model, version, node, prop)
+    if pkey not in props:
+        nkey = (model, version, node)
+        if nkey not in nodes:
+            nodes[nkey] = Node({"handle": node, "model": model, "version": version})
+        props[pkey] = Property({"handle": prop, "model": model, "version": version})
+        nodes[nkey].props[prop] = props[pkey]
+    return props[pkey]
+
@@ -0,0 +1,113 @@
+"""
+bento_transforms.graph.sync
+
+Incremental sync of transforms to MDB. Each GeneralTransform has a
+fingerprint, a hash of its inputs, outputs and steps (with their params),
+which is stored on its `transform` node. Given the fingerprints already
+stored, by handle, a SyncPlan finds the transforms added, changed and
+removed since, and emits Cypher for those only: unchanged transforms are
+not touched, and re-running a sync of the same spec emits nothing.
+
+FINGERPRINT_QUERY returns every transform in the MDB, which may hold the
+transforms of other specs, so stored transforms missing from the spec are
+only deleted ("pruned") when asked for, with `prune=True`.
+
+Stored fingerprints are read from MDB with FINGERPRINT_QUERY (see
+stored_fingerprints), or kept in a local JSON snapshot file (see
+read_snapshot and write_snapshot).
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Tuple
+from bento_meta.tf_objects import Transform
+from ..mdf.pymodels import GeneralTransform
+from .mc_utils import batched_delete_statements, batched_upsert_statements
+
+FINGERPRINT_QUERY = ("MATCH (t:transform) "
+                     "RETURN t.handle AS handle, t.fingerprint AS fingerprint")
+
+
+def transform_fingerprint(gtf: GeneralTransform) -> str:
+    """sha256 of the transform's Inputs, Outputs and Steps, as canonical JSON"""
+    spec = gtf.model_dump(mode="json", include={"Inputs", "Outputs", "Steps"})
+    return hashlib.sha256(
+        json.dumps(spec, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def stored_fingerprints(records: Iterable[Mapping]) -> Dict[str, str | None]:
+    """
+    Fingerprints by handle from the records of FINGERPRINT_QUERY. Transforms
+    stored without a fingerprint, or stored more than once, map to None, so
+    a sync replaces them.
+    """
+    ret = {}
+    for rec in records:
+        hdl = rec["handle"]
+        ret[hdl] = None if hdl in ret else rec["fingerprint"]
+    return ret
+
+
+def read_snapshot(path: str | Path) -> Dict[str, str]:
+    """Fingerprints by handle from a snapshot file; empty if there is none"""
+    try:
+        with Path(path).open(encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def write_snapshot(path: str | Path, fingerprints: Mapping[str, str]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    (fd, tmp) = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(dict(sorted(fingerprints.items())), fh, indent=1)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+class SyncPlan:
+    """
+    The changes that bring stored transforms up to date: `transforms` and
+    their `fingerprints` are the current spec, by handle, and `stored` the
+    fingerprints already stored. Stored transforms not in the spec are
+    kept, unless `prune` is True.
+    """
+    def __init__(self, transforms: Mapping[str, Transform],
+                 fingerprints: Mapping[str, str],
+                 stored: Mapping[str, str | None],
+                 prune: bool = False):
+        self._transforms = transforms
+        self.fingerprints = dict(fingerprints)
+        self.added = [hdl for hdl in fingerprints if hdl not in stored]
+        self.changed = [hdl for hdl in fingerprints
+                        if hdl in stored and stored[hdl] != fingerprints[hdl]]
+        self.unchanged = [hdl for hdl in fingerprints
+                          if hdl in stored and stored[hdl] == fingerprints[hdl]]
+        self.removed = [hdl for hdl in stored
+                        if hdl not in fingerprints] if prune else []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def statements(self, batch_size: int = 1000) -> List[Tuple[str, dict]]:
+        """
+        Batched Cypher (see bento_transforms.graph.mc_utils) that deletes
+        the changed and removed transforms, then creates the added and
+        changed ones, with their fingerprints, as (statement, parameters)
+        pairs
+        """
+        stmts = batched_delete_statements(self.changed + self.removed, batch_size)
+        stmts.extend(batched_upsert_statements(
+            [self._transforms[hdl] for hdl in self.added + self.changed],
+            batch_size, fingerprints=self.fingerprints))
+        return stmts
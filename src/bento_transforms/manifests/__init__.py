@@ -0,0 +1 @@
+from .tsv import convert_tsv_files, read_node_tsv, NodeTSVWriter
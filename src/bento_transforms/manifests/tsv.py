@@ -0,0 +1,125 @@
+"""
+bento_transforms.manifests.tsv
+
+Streaming conversion of TSV (or CSV) loading files, one file per source node,
+into one TSV per target node.
+
+Source rows are read one at a time and become source records keyed by node,
+so each column is routed to the transform inputs for its node and property
+(the `node_prop` input names of the transform functions). The node is taken
+from the row's `type` column, as in CCDI/CDS loading files, or else from the
+file name. Converted rows are buffered per target node and written in bulk.
+"""
+
+from __future__ import annotations
+import csv
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+from ..converters.converter import Converter
+
+TYPE_COLUMN = "type"
+
+
+def read_node_tsv(path: str | Path, node: str | None = None,
+                  delimiter: str = "\t") -> Iterator[Dict[str, dict]]:
+    """
+    Yield a source record, {node: {prop: value}}, for each row of a loading
+    file. Empty values are left out of the record, so transforms reading
+    them don't fire.
+    """
+    path = Path(path)
+    default_node = node or path.name.split(".")[0]
+    with path.open(newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh, delimiter=delimiter):
+            nd = row.pop(TYPE_COLUMN, None) or default_node
+            yield {nd: {k: v for (k, v) in row.items() if v not in ("", None)}}
+
+
+def target_columns(cvtr: Converter) -> Dict[str, List[str]]:
+    """The output properties of a converter's plan, by target node"""
+    cols = {}
+    for k in cvtr.plan.outputs(cvtr._record_model):
+        props = cols.setdefault(k.node, [])
+        if k.prop not in props:
+            props.append(k.prop)
+    return cols
+
+
+class NodeTSVWriter:
+    """
+    Write target records to one TSV per target node, in `outdir`. Rows are
+    buffered per node and written `buffer_rows` at a time; files are opened
+    when a node's first rows are written.
+    """
+    def __init__(self, outdir: str | Path, columns: Dict[str, List[str]],
+                 buffer_rows: int = 10000, delimiter: str = "\t"):
+        self._outdir = Path(outdir)
+        self._columns = columns
+        self._buffer_rows = buffer_rows
+        self._delimiter = delimiter
+        self._buffers = {}
+        self._files = {}
+        self._writers = {}
+        self._counts = {}
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Rows written (or buffered), by target node"""
+        return self._counts
+
+    def write(self, record: Dict[str, dict]) -> None:
+        for (node, values) in record.items():
+            if node not in self._columns:
+                raise RuntimeError(f"No output columns defined for node '{node}'")
+            buf = self._buffers.setdefault(node, [])
+            buf.append([node] + [values.get(p) for p in self._columns[node]])
+            self._counts[node] = self._counts.get(node, 0) + 1
+            if len(buf) >= self._buffer_rows:
+                self._flush(node)
+
+    def close(self) -> None:
+        for node in list(self._buffers):
+            self._flush(node)
+        for fh in self._files.values():
+            fh.close()
+        self._files = {}
+        self._writers = {}
+
+    def __enter__(self) -> NodeTSVWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _flush(self, node: str) -> None:
+        buf = self._buffers.get(node)
+        if not buf:
+            return
+        if node not in self._writers:
+            self._outdir.mkdir(parents=True, exist_ok=True)
+            fh = (self._outdir / f"{node}.tsv").open("w", newline="",
+                                                   encoding="utf-8")
+            self._files[node] = fh
+            self._writers[node] = csv.writer(fh, delimiter=self._delimiter,
+                                             lineterminator="\n")
+            self._writers[node].writerow([TYPE_COLUMN] + self._columns[node])
+        self._writers[node].writerows(buf)
+        buf.clear()
+
+
+def convert_tsv_files(cvtr: Converter, paths: Iterable[str | Path],
+                      outdir: str | Path, buffer_rows: int = 10000,
+                      delimiter: str = "\t", parallel=None) -> Dict[str, int]:
+    """
+    Convert source loading files to one TSV per target node in `outdir`.
+    `delimiter` is that of the source files; output files are always
+    tab-separated. If `parallel` (a ParallelConverter for `cvtr`) is given, records are
+    converted with it. Returns the number of rows written per target node.
+    """
+    records = (rec for p in paths for rec in read_node_tsv(p, delimiter=delimiter))
+    engine = parallel if parallel is not None else cvtr
+    with NodeTSVWriter(outdir, target_columns(cvtr),
+                       buffer_rows=buffer_rows) as writer:
+        for rec in engine.convert_records(records):
+            writer.write(rec)
+    return writer.counts
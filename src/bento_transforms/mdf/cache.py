@@ -0,0 +1,72 @@
+"""
+bento_transforms.mdf.cache
+
+An on-disk cache of parsed MDF-Transform files, for TransformReader.
+
+An entry holds the loaded MDF dict, the Defaults and the normalized
+GeneralTransform specs of a set of files, as JSON; entries written by lazy
+readers hold the normalized raw specs instead, with their I/O index, so
+that writing them builds no transforms. Entries are keyed by a
+hash of the file contents, the MDF schema, and the bento-transforms and
+bento-mdf versions, so an entry is never used for inputs that would parse
+differently. Entries are written to a temporary file and renamed into
+place, so any number of processes can share a cache directory: readers
+see a whole entry or none, and concurrent writers of one entry write
+equivalent contents.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import List
+
+# bump when the cache entry contents change
+CACHE_FORMAT = "2"
+
+
+def _version(pkg: str) -> str:
+    try:
+        return version(pkg)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def cache_key(files: List[Path], mdf_schema: str | Path | None) -> str:
+    """Hash of the files' contents, the schema and the package versions"""
+    digest = hashlib.sha256()
+    for part in (CACHE_FORMAT, _version("bento-transforms"), _version("bento-mdf")):
+        digest.update(part.encode() + b"\0")
+    if mdf_schema is not None and Path(mdf_schema).is_file():
+        digest.update(b"schema\0" + Path(mdf_schema).read_bytes())
+    else:
+        # the schema is a URL, or the bento-mdf default
+        digest.update(f"schema\0{mdf_schema}".encode())
+    for f in files:
+        data = f.read_bytes()
+        digest.update(f"\0{len(data)}\0".encode() + data)
+    return digest.hexdigest()
+
+
+def read_entry(cache_dir: str | Path, key: str) -> dict | None:
+    try:
+        with (Path(cache_dir) / f"{key}.json").open(encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def write_entry(cache_dir: str | Path, key: str, entry: dict) -> None:
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    (fd, tmp) = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp, cache_dir / f"{key}.json")
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
@@ -6,6 +6,7 @@ of standardized Pydantic GeneralTransform instances
 """
 from __future__ import annotations
 
+import json
 import logging
 import re
 from .pymodels import (
@@ -14,15 +15,96 @@ from .pymodels import (
     IdentitySpec, IdentityTransform,
     FromToList, GeneralTransform,
 )
-from typing import List
+from collections.abc import Mapping
+from functools import partial
+from typing import Callable, Iterator, List, Tuple
 from pathlib import Path
 from bento_mdf import MDFReader
+from .cache import cache_key, read_entry, write_entry
 
 from pdb import set_trace
 
 
+# (Model, Version, Node, Prop) of a transform input or output
+IOKey = Tuple[str, str, str, str]
+
+
+class LazyTransforms(Mapping):
+    """
+    A mapping of handles to GeneralTransforms that builds each transform the
+    first time it is accessed, with an index of every transform's inputs and
+    outputs available up front.
+    """
+    def __init__(self):
+        self._builders = {}
+        self._io = {}
+        self._entrypoints = {}
+        self._built = {}
+
+    def add(self, hdl: str, build: Callable[[], GeneralTransform],
+            io: Tuple[List[IOKey], List[IOKey]],
+            entrypoints: List[str]) -> None:
+        self._builders[hdl] = build
+        self._io[hdl] = io
+        self._entrypoints[hdl] = entrypoints
+        self._built.pop(hdl, None)
+
+    def io(self, hdl: str) -> Tuple[List[IOKey], List[IOKey]]:
+        """The (Model, Version, Node, Prop) keys of a transform's inputs and outputs"""
+        return self._io[hdl]
+
+    def entrypoints(self, hdl: str) -> List[str]:
+        """The Entrypoints of a transform's steps"""
+        return self._entrypoints[hdl]
+
+    @property
+    def built(self) -> int:
+        """Number of transforms built so far"""
+        return len(self._built)
+
+    def __getitem__(self, hdl: str) -> GeneralTransform:
+        gtf = self._built.get(hdl)
+        if gtf is None:
+            gtf = self._built[hdl] = self._builders[hdl]()
+        return gtf
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._builders)
+
+    def __len__(self) -> int:
+        return len(self._builders)
+
+    def __contains__(self, hdl) -> bool:
+        return hdl in self._builders
+
+
+def _io_keys(specs: List[dict]) -> List[IOKey]:
+    return [(s["Model"], s["Version"], s["Node"], p)
+            for s in specs for p in s["Props"]]
+
+
+def _first(spec: dict | List[dict]) -> dict:
+    return spec[0] if isinstance(spec, list) else spec
+
+
+def _build_identity(frm: dict, to: dict) -> IdentityTransform:
+    return IdentityTransform(Inputs=[IOSpec(**frm)], Outputs=[IOSpec(**to)])
+
+
 class TransformReader(MDFReader):
-    """MDF class for reading the MDF-Transform format into bento-meta objects"""
+    """
+    MDF class for reading the MDF-Transform format into bento-meta objects
+
+    With `cache_dir`, parsed files are cached there (see
+    bento_transforms.mdf.cache), and a reader of the same files loads the
+    cached transforms instead of loading, validating and parsing the YAML.
+    A reader loaded from the cache has the raw `mdf` dict as it was before
+    parsing, and `mdf_schema` as given, rather than the loaded schema.
+
+    With `lazy`, `transforms` is a LazyTransforms mapping: each transform is
+    only built (and its spec checked) when it's first accessed, but the
+    inputs and outputs of all transforms are indexed when the file is read.
+    """
 
     def __init__(
             self,
@@ -31,18 +113,110 @@ class TransformReader(MDFReader):
             mdf_schema: str | Path | None = None,
             raise_error: bool = False,
             logger: logging.Logger | None = None,
+            cache_dir: str | Path | None = None,
+            lazy: bool = False,
     ) -> None:
         self.files = yaml_files
         self.mdf = {}
         self.mdf_schema = mdf_schema
         self.handle = handle
-        self._transforms = {}
+        # options to create a reader of the same files with
+        self.options = {"handle": handle, "mdf_schema": mdf_schema,
+                        "cache_dir": cache_dir, "lazy": lazy}
+        self._lazy = lazy
+        self._transforms = LazyTransforms() if lazy else {}
+        # lazy mode: the normalized raw spec of each transform, by handle, as
+        # (identity, spec), where an identity's spec is its [From, To] dicts
+        self._raw = {}
         self._defaults = None
         self._package_default = None
         self._raise_error = raise_error
+        key = self._cache_key() if cache_dir is not None else None
+        if key is not None:
+            entry = read_entry(cache_dir, key)
+            if entry is not None:
+                self._load_entry(entry)
+                return
         if self.files:
             super().load_yaml()
+        raw = None
+        if key is not None:
+            try:
+                raw = json.loads(json.dumps(self.mdf))
+            except (TypeError, ValueError):
+                # not representable as JSON; don't cache
+                key = None
         self.parse_mdf()
+        if key is not None:
+            try:
+                entry = json.loads(json.dumps(self._make_entry(raw)))
+            except (TypeError, ValueError):
+                entry = None
+            if entry is not None:
+                write_entry(cache_dir, key, entry)
+
+    def _cache_key(self) -> str | None:
+        # only local files are cached
+        files = []
+        pending = list(self.files)
+        while pending:
+            f = pending.pop(0)
+            if isinstance(f, (list, tuple)):
+                pending[:0] = f
+            elif isinstance(f, (str, Path)) and Path(f).is_file():
+                files.append(Path(f))
+            else:
+                return None
+        return cache_key(files, self.mdf_schema) if files else None
+
+    def _make_entry(self, raw_mdf: dict) -> dict:
+        if self._lazy:
+            # from the raw specs, so that no transform is built
+            transforms = {
+                hdl: {"identity": identity, "raw": spec,
+                      "io": self._transforms.io(hdl),
+                      "entrypoints": self._transforms.entrypoints(hdl)}
+                for (hdl, (identity, spec)) in self._raw.items()
+            }
+        else:
+            transforms = {
+                hdl: {"identity": isinstance(gtf, IdentityTransform),
+                      "spec": gtf.model_dump(mode="json")}
+                for (hdl, gtf) in self._transforms.items()
+            }
+        return {
+            "mdf": raw_mdf,
+            "defaults": (self._defaults.model_dump(mode="json")
+                         if self._defaults else None),
+            "transforms": transforms,
+        }
+
+    def _load_entry(self, entry: dict) -> None:
+        self.mdf = entry["mdf"]
+        if entry["defaults"] is not None:
+            self._defaults = Defaults.model_validate(entry["defaults"])
+        for (hdl, tf) in entry["transforms"].items():
+            if "raw" in tf:
+                # written by a lazy reader
+                build = (partial(_build_identity, *tf["raw"]) if tf["identity"]
+                         else partial(self.build_transform, tf["raw"]))
+                if self._lazy:
+                    (inputs, outputs) = tf["io"]
+                    self._transforms.add(hdl, build,
+                                         ([tuple(k) for k in inputs],
+                                          [tuple(k) for k in outputs]),
+                                         tf["entrypoints"])
+                else:
+                    self._transforms[hdl] = build()
+                continue
+            cls = IdentityTransform if tf["identity"] else GeneralTransform
+            if self._lazy:
+                self._transforms.add(hdl, partial(cls.model_validate, tf["spec"]),
+                                     (_io_keys(tf["spec"]["Inputs"]),
+                                      _io_keys(tf["spec"]["Outputs"])),
+                                     [st["Entrypoint"] for st in tf["spec"]["Steps"]])
+            else:
+                self._transforms[hdl] = cls.model_validate(tf["spec"])
 
     @property
     def input_defaults(self):
@@ -71,50 +245,45 @@ class TransformReader(MDFReader):
     
     def convert_dict_to_IOSpec(self, spec: dict | List[dict],
                                defaults: EntityDefaults) -> List[IOSpec]:
-        def set_defaults_or_die(spec, attr):
-            if spec.get(attr) is None:
-                if defaults is None or defaults.__getattribute__(attr) is None:
-                    raise RuntimeError(f"{attr} not specified and no default set (processing {spec})")
-                spec[attr] = defaults.__getattribute__(attr)
-            return
-        
         if isinstance(spec, dict):
             spec = [spec]
-        ret = []
-        for s in spec:
-            for attr in ["Model", "Version", "Node"]:
-                set_defaults_or_die(s, attr)
-
-            if s.get("Prop") is not None:
-                s["Props"] = [s["Prop"]]
-            if s.get("Props") is None:
-                raise RuntimeError(f"Props value is required (processing {spec})")
-            if isinstance(s["Props"], str):
-                s["Props"] = [s["Props"]]
-            ret.append(IOSpec(**s))
-        return ret
-            
+        return [IOSpec(**self.normalize_io_dict(s, defaults)) for s in spec]
+
+    def normalize_io_dict(self, s: dict, defaults: EntityDefaults | None) -> dict:
+        """Fill in defaults and Props of an input or output dict, in place"""
+        for attr in ["Model", "Version", "Node"]:
+            if s.get(attr) is None:
+                if defaults is None or defaults.__getattribute__(attr) is None:
+                    raise RuntimeError(f"{attr} not specified and no default set (processing {s})")
+                s[attr] = defaults.__getattribute__(attr)
+        if s.get("Prop") is not None:
+            s["Props"] = [s["Prop"]]
+        if s.get("Props") is None:
+            raise RuntimeError(f"Props value is required (processing {s})")
+        if isinstance(s["Props"], str):
+            s["Props"] = [s["Props"]]
+        return s
+
     def convert_string_to_IOSpec(self, spec: str | List[str],
                                  defaults: EntityDefaults | None ) -> List[IOSpec]:
-        if defaults is None:
-            raise RuntimeError(f"Simple identity format requires also setting input and output default models in Defaults (processing {spec})")
         if isinstance(spec, str):
             spec = [spec]
-        ret = []
-        for s in spec:
-            (node, prop) = re.match("^([^.]+[.])?(.*)", s).groups()
-            if node:
-                node = node[:-1]
-            if not node:
-                if not defaults.Node:
-                    raise RuntimeError(f"Node not specified in property string, with no default provided (processing {spec})")
-                else:
-                    node = defaults.Node
-            ret.append(IOSpec(Model=defaults.Model,
-                              Version=defaults.Version,
-                              Node=node,
-                              Props=[prop]))
-        return ret
+        return [IOSpec(**self.normalize_io_string(s, defaults)) for s in spec]
+
+    def normalize_io_string(self, s: str, defaults: EntityDefaults | None) -> dict:
+        """The input or output dict of a `node.prop` (or `prop`) string"""
+        if defaults is None:
+            raise RuntimeError(f"Simple identity format requires also setting input and output default models in Defaults (processing {s})")
+        (node, prop) = re.match("^([^.]+[.])?(.*)", s).groups()
+        if node:
+            node = node[:-1]
+        if not node:
+            if not defaults.Node:
+                raise RuntimeError(f"Node not specified in property string, with no default provided (processing {s})")
+            else:
+                node = defaults.Node
+        return {"Model": defaults.Model, "Version": defaults.Version,
+                "Node": node, "Props": [prop]}
 
     def convert_dict_to_TfStepSpec(self, spec: dict, defaults: PackageC | None) -> TfStepSpec:
         if spec.get("Package") is None:
@@ -158,6 +327,9 @@ class TransformReader(MDFReader):
             self.parse_transforms()
 
     def parse_identities(self) -> None:
+        if self._lazy:
+            self.index_identities()
+            return
         identities = []
         for spec in self.mdf["TransformDefinitions"]["Identities"]:
             if isinstance(spec, dict):
@@ -182,36 +354,78 @@ class TransformReader(MDFReader):
             self._transforms[handle] = IdentityTransform(Inputs=[ident.From],
                                                          Outputs=[ident.To])
 
+    def index_identities(self) -> None:
+        """Add the Identities to a LazyTransforms mapping, unbuilt"""
+        for spec in self.mdf["TransformDefinitions"]["Identities"]:
+            if isinstance(spec, dict):
+                frm = self.normalize_io_dict(_first(spec["From"]), self._defaults.Inputs)
+                to = self.normalize_io_dict(_first(spec["To"]), self._defaults.Outputs)
+            elif isinstance(spec, list):
+                if self.input_defaults is None and self.output_defaults is None:
+                    raise RuntimeError(f"Simple identity format requires also setting input and output default models (processing {spec})")
+                if len(spec) != 2:
+                    raise RuntimeError(f"Can't parse as an Identity: {spec}")
+                frm = self.normalize_io_string(spec[0], self._defaults.Inputs)
+                to = self.normalize_io_string(spec[1], self._defaults.Outputs)
+            else:
+                raise RuntimeError(f"Can't parse as an Identity: {spec}")
+            handle = f"{frm['Node']}_{frm['Props'][0]}_to_{to['Node']}_{to['Props'][0]}"
+            self._raw[handle] = (True, [frm, to])
+            self._transforms.add(handle, partial(_build_identity, frm, to),
+                                 (_io_keys([frm]), _io_keys([to])), ["identity"])
+
     def parse_transforms(self):
         for (hdl, spec) in self.mdf["TransformDefinitions"]["Transforms"].items():
-            inputs = []
-            outputs = []
-            steps = []
-            for s in spec["Inputs"]:
-                if isinstance(s, str):
-                    inputs.append(self.convert_string_to_IOSpec(s, self._defaults.Inputs)[0])
-                elif isinstance(s, dict):
-                    inputs.append(self.convert_dict_to_IOSpec(s, self._defaults.Inputs)[0])
-                else:
-                    raise RuntimeError(f"Cannot interpret transform input specification (processing {s})")
-            for s in spec["Outputs"]:
-                if isinstance(s, str):
-                    outputs.append(self.convert_string_to_IOSpec(s, self._defaults.Outputs)[0])
-                elif isinstance(s, dict):
-                    outputs.append(self.convert_dict_to_IOSpec(s, self._defaults.Outputs)[0])
-                else:
-                    raise RuntimeError(f"Cannot interpret transform output specification (processing {s})")
-            for s in spec["Steps"]:
-                if isinstance(s, dict):
-                    steps.append(self.convert_dict_to_TfStepSpec(s, self._defaults.Package))
-                elif isinstance(s, str):
-                    steps.append(self.convert_string_to_TfStepSpec(s, self._defaults.Package))
-                else:
-                    raise RuntimeError(f"Cannot interpret step specification ({s})")
-            self._transforms[hdl] = GeneralTransform(
-                Inputs=inputs,
-                Outputs=outputs,
-                Steps=steps
-            )
+            if self._lazy:
+                self._raw[hdl] = (False, spec)
+                self._transforms.add(hdl, partial(self.build_transform, spec),
+                                     (self.normalize_io_specs(spec["Inputs"], self._defaults.Inputs),
+                                      self.normalize_io_specs(spec["Outputs"], self._defaults.Outputs)),
+                                     [s if isinstance(s, str) else s.get("Entrypoint")
+                                      for s in spec["Steps"]])
+            else:
+                self._transforms[hdl] = self.build_transform(spec)
 
+    def normalize_io_specs(self, specs: List[str | dict],
+                           defaults: EntityDefaults | None) -> List[IOKey]:
+        """The IOKeys of a transform's Inputs or Outputs, without building IOSpecs"""
+        ret = []
+        for s in specs:
+            if isinstance(s, str):
+                ret.append(self.normalize_io_string(s, defaults))
+            elif isinstance(s, dict):
+                ret.append(self.normalize_io_dict(s, defaults))
+            else:
+                raise RuntimeError(f"Cannot interpret transform input or output specification (processing {s})")
+        return _io_keys(ret)
 
+    def build_transform(self, spec: dict) -> GeneralTransform:
+        inputs = []
+        outputs = []
+        steps = []
+        for s in spec["Inputs"]:
+            if isinstance(s, str):
+                inputs.append(self.convert_string_to_IOSpec(s, self._defaults.Inputs)[0])
+            elif isinstance(s, dict):
+                inputs.append(self.convert_dict_to_IOSpec(s, self._defaults.Inputs)[0])
+            else:
+                raise RuntimeError(f"Cannot interpret transform input specification (processing {s})")
+        for s in spec["Outputs"]:
+            if isinstance(s, str):
+                outputs.append(self.convert_string_to_IOSpec(s, self._defaults.Outputs)[0])
+            elif isinstance(s, dict):
+                outputs.append(self.convert_dict_to_IOSpec(s, self._defaults.Outputs)[0])
+            else:
+                raise RuntimeError(f"Cannot interpret transform output specification (processing {s})")
+        for s in spec["Steps"]:
+            if isinstance(s, dict):
+                steps.append(self.convert_dict_to_TfStepSpec(s, self._defaults.Package))
+            elif isinstance(s, str):
+                steps.append(self.convert_string_to_TfStepSpec(s, self._defaults.Package))
+            else:
+                raise RuntimeError(f"Cannot interpret step specification ({s})")
+        return GeneralTransform(
+            Inputs=inputs,
+            Outputs=outputs,
+            Steps=steps
+        )
@@ -3,10 +3,17 @@ from .pymodels import (
     D2YParams,
     Y2DParams,
 )
+from .protocol import batch_form, params_model, as_params
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
+
+@params_model(D2YParams)
 def days_to_years(input: int | float | None,
-                  params: dict) -> int | None:
+                  params: D2YParams | dict) -> int | None:
     """
     Args:
         input: numeric value in days
@@ -16,14 +23,15 @@ def days_to_years(input: int | float | None,
     Returns:
         Converted value or None if sentinel detected
     """
-    params = D2YParams(**params)
+    params = as_params(D2YParams, params)
     if input == params.sentinel or input is None:
         return None
     return round(input / params.divisor, params.precision)
 
 
+@params_model(Y2DParams)
 def years_to_days(input: int | float | None,
-                  params: dict) -> int:
+                  params: Y2DParams | dict) -> int:
     """
     Args:
         input: numeric value in years
@@ -32,7 +40,147 @@ def years_to_days(input: int | float | None,
     Returns:
         Converted value in days, or sentinel if input None
     """
-    params = Y2DParams(**params)
+    params = as_params(Y2DParams, params)
     if input is None:
         return params.sentinel_if_null
     return round(input * params.multiplier)
+
+
+# largest integer magnitude a float64 holds exactly
+EXACT_INT = 2.0 ** 53
+# column value types the vectorized forms handle, with NumPy integer, float
+# and bool scalars; others go to the scalar form
+_NUMBER_TYPES = {int, float, bool, type(None)}
+
+
+def _as_vector(values) -> tuple | None:
+    """
+    Split a column of numbers and Nones (a list, a NumPy array, a masked
+    array whose masked entries are missing, or anything with __array__) into
+    a float64 array with missing entries as NaN, a boolean mask of missing
+    entries, and an upper bound on the magnitude of integer entries.
+    Returns None for columns holding anything else.
+    """
+    if np.ma.isMaskedArray(values):
+        if values.dtype.kind in "biuf":
+            arr = np.ma.getdata(values).astype(np.float64)
+            missing = np.ma.getmaskarray(values)
+            arr[missing] = np.nan
+            intmax = (float(np.abs(arr[~missing]).max(initial=0))
+                      if values.dtype.kind != "f" else 0.0)
+            return (arr, missing, intmax)
+        values = values.astype(object).filled(None)
+    if hasattr(values, "__array__"):
+        arr = np.asarray(values)
+        if arr.dtype.kind in "biuf":
+            intmax = (float(np.abs(arr).max(initial=0))
+                      if arr.dtype.kind != "f" else 0.0)
+            return (arr.astype(np.float64), np.zeros(arr.shape, bool), intmax)
+        if arr.dtype.kind != "O":
+            return None
+        values = arr.tolist()
+    types = set(map(type, values))
+    if not all(t in _NUMBER_TYPES
+               or issubclass(t, (np.integer, np.floating, np.bool_))
+               for t in types):
+        return None
+    try:
+        arr = np.array(values, dtype=np.float64)
+    except OverflowError:
+        return None
+    if type(None) in types:
+        missing = np.fromiter((v is None for v in values), bool, len(values))
+    else:
+        missing = np.zeros(len(values), bool)
+    intmax = 0.0
+    if any(not issubclass(t, (float, np.floating)) for t in types - {type(None)}):
+        intmax = float(np.abs(arr[~missing]).max(initial=0))
+    return (arr, missing, intmax)
+
+
+def _as_list(values) -> list:
+    if np is not None and np.ma.isMaskedArray(values):
+        return values.astype(object).filled(None).tolist()
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return list(values)
+
+
+def _column(out, missing, like) -> list:
+    # the output column in the form of the input column: a masked array for
+    # array inputs, otherwise a list with None for missing entries
+    if hasattr(like, "__array__"):
+        return np.ma.array(out, mask=missing)
+    if not missing.any():
+        return out.tolist()
+    ret = out.astype(object)
+    ret[missing] = None
+    return ret.tolist()
+
+
+def _masked(values: list):
+    return np.ma.array([0 if v is None else v for v in values],
+                       mask=[v is None for v in values])
+
+
+@batch_form(days_to_years)
+def days_to_years_batch(inputs, params: D2YParams | dict):
+    """
+    Column form of days_to_years. With NumPy installed, numeric columns are
+    converted with vectorized operations; array inputs (anything with
+    __array__) give a masked array, masked where the result is None.
+    Results equal those of the scalar form.
+    """
+    params = as_params(D2YParams, params)
+    vec = None
+    if np is not None and params.divisor != 0 and 0 <= params.precision <= 15:
+        vec = _as_vector(inputs)
+    if vec is None:
+        out = [days_to_years(inp, params) for inp in _as_list(inputs)]
+        return _masked(out) if np is not None and hasattr(inputs, "__array__") else out
+    (arr, missing, _) = vec
+    missing = missing | (arr == params.sentinel)
+    scale = 10.0 ** params.precision
+    with np.errstate(all="ignore"):
+        quot = arr / params.divisor
+        scaled = quot * scale
+        out = np.rint(scaled) / scale
+        # the scaling may move a value lying very near a rounding boundary
+        # across it; round such values as the scalar form does (decimally)
+        mag = np.abs(scaled)
+        near = ((np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+                 <= 1e-9 + mag * 1e-15)
+                | (mag >= EXACT_INT / 2))
+    for i in np.flatnonzero(near & ~missing):
+        out[i] = round(float(quot[i]), params.precision)
+    return _column(out, missing, inputs)
+
+
+@batch_form(years_to_days)
+def years_to_days_batch(inputs, params: Y2DParams | dict):
+    """
+    Column form of years_to_days. With NumPy installed, numeric columns are
+    converted with vectorized operations; array inputs (anything with
+    __array__) give an (unmasked) masked array of int64.
+    Results equal those of the scalar form.
+    """
+    params = as_params(Y2DParams, params)
+    vec = _as_vector(inputs) if np is not None else None
+    if vec is not None:
+        (arr, missing, intmax) = vec
+        with np.errstate(all="ignore"):
+            prod = arr * params.multiplier
+        valid = prod[~missing]
+        # integer inputs must multiply exactly, and (as in the scalar form)
+        # non-finite products raise, so leave those to the scalar form
+        if (intmax * abs(params.multiplier) > EXACT_INT
+                or not np.isfinite(valid).all()
+                or (np.abs(valid) >= 2.0 ** 63).any()):
+            vec = None
+    if vec is None:
+        out = [years_to_days(inp, params) for inp in _as_list(inputs)]
+        return _masked(out) if np is not None and hasattr(inputs, "__array__") else out
+    prod[missing] = 0
+    out = np.rint(prod).astype(np.int64)
+    out[missing] = params.sentinel_if_null
+    return _column(out, np.zeros(out.shape, bool), inputs)
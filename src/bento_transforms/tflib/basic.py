@@ -1,4 +1,5 @@
-from typing import Any
+from typing import Any, List
+from .protocol import batch_form
 
 
 def identity(input: Any, params: None) -> Any:
@@ -9,3 +10,11 @@ def null(input: Any, params: None) -> None:
     return None
 
 
+@batch_form(identity)
+def identity_batch(inputs: List[Any], params: None) -> List[Any]:
+    return list(inputs)
+
+
+@batch_form(null)
+def null_batch(inputs: List[Any], params: None) -> List[None]:
+    return [None] * len(inputs)
@@ -1,30 +1,158 @@
 from __future__ import annotations
-from typing import List
-from .pymodels import UuidNS, UuidNSEnum
+import hashlib
+import json
+import os
 import uuid
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List
+from .pymodels import UuidNS, UuidNSEnum
+from .protocol import batch_form, params_model, as_params
+
+# Map enum to uuid constants
+NAMESPACES = {
+    UuidNSEnum.DNS: uuid.NAMESPACE_DNS,
+    UuidNSEnum.URL: uuid.NAMESPACE_URL,
+    UuidNSEnum.OID: uuid.NAMESPACE_OID,
+    UuidNSEnum.X500: uuid.NAMESPACE_X500
+}
+
+
+def _seed(input) -> str:
+    if not isinstance(input, (list, tuple)):
+        input = [input]
+    return "_".join(str(v) for v in input if v is not None)
+
+
+@lru_cache(maxsize=64)
+def _prefix(namespace: uuid.UUID):
+    # SHA-1 state after hashing the namespace, the common prefix of every
+    # uuid5 name hashed in that namespace
+    return hashlib.sha1(namespace.bytes, usedforsecurity=False)
+
+
+def uuid5_strs(namespace: uuid.UUID, names: Iterable[str]) -> List[str]:
+    """
+    str(uuid.uuid5(namespace, name)) for each of `names`, hashing the
+    namespace only once.
+    """
+    copy = _prefix(namespace).copy
+    ret = []
+    for name in names:
+        h = copy()
+        h.update(name.encode("utf-8"))
+        b = bytearray(h.digest()[:16])
+        # version 5, RFC 4122 variant
+        b[6] = (b[6] & 0x0F) | 0x50
+        b[8] = (b[8] & 0x3F) | 0x80
+        x = b.hex()
+        ret.append(f"{x[:8]}-{x[8:12]}-{x[12:16]}-{x[16:20]}-{x[20:]}")
+    return ret
 
 
+@params_model(UuidNS)
 def generate_uuid(input: str | List[str],
-                  params: dict):
+                  params: UuidNS | dict):
     """
     Args:
         values: list/tuple of values to seed UUID
-        params.namespace: namespace enum member for uuid.uuid5 
+        params.namespace: namespace enum member for uuid.uuid5
     Returns:
         UUID string
     """
-    params = UuidNS(params)
-    if not isinstance(input, (list, tuple)):
-        input = [input]
+    params = as_params(UuidNS, params)
+    return uuid5_strs(NAMESPACES[params.namespace], [_seed(input)])[0]
+
+
+@batch_form(generate_uuid)
+def generate_uuid_batch(inputs: list, params: UuidNS | dict) -> List[str]:
+    params = as_params(UuidNS, params)
+    return uuid5_strs(NAMESPACES[params.namespace],
+                      [_seed(inp) for inp in inputs])
+
+
+class UuidMinter:
+    """
+    Mint deterministic (uuid5) IDs for columns of seeds, checking each batch
+    for duplicate seeds and for ID collisions. With a registry file, minted
+    IDs are recorded (as JSON lines), and seeds already in the registry are
+    looked up instead of hashed again, so re-runs reuse the same IDs.
+    """
+    def __init__(self, namespace: UuidNSEnum | str | uuid.UUID = UuidNSEnum.DNS,
+                 registry: str | Path | None = None):
+        """
+        Args:
+            namespace: a UuidNSEnum member (or its value), or a namespace UUID
+            registry: path of the registry file; created if it doesn't exist
+        """
+        if not isinstance(namespace, uuid.UUID):
+            namespace = NAMESPACES[UuidNSEnum(namespace)]
+        self._namespace = namespace
+        self._registry = Path(registry) if registry is not None else None
+        self._ids = {}
+        self._seeds_by_id = {}
+        self.duplicates = Counter()
+        if self._registry is not None and self._registry.exists():
+            self._load()
+
+    @property
+    def namespace(self) -> uuid.UUID:
+        return self._namespace
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def mint(self, seeds: Iterable, unique: bool = False) -> List[str]:
+        """
+        Return the ID of each seed. Seeds are joined as by generate_uuid,
+        so a seed may be a value or a list of values. Seeds that occur more
+        than once in the batch are counted in `duplicates`; with `unique`,
+        they raise instead. An ID minted for two different seeds raises.
+        """
+        seeds = [_seed(s) for s in seeds]
+        counts = Counter(seeds)
+        self.duplicates = Counter({s: n for (s, n) in counts.items() if n > 1})
+        if unique and self.duplicates:
+            raise RuntimeError(f"{len(self.duplicates)} seeds occur more than "
+                               f"once, e.g. '{next(iter(self.duplicates))}'")
+        new = [s for s in counts if s not in self._ids]
+        minted = uuid5_strs(self._namespace, new)
+        for (s, id) in zip(new, minted):
+            other = self._seeds_by_id.setdefault(id, s)
+            if other != s:
+                raise RuntimeError(f"ID collision: seeds '{other}' and '{s}' "
+                                   f"both give {id}")
+            self._ids[s] = id
+        if new and self._registry is not None:
+            self._append(zip(new, minted))
+        ids = self._ids
+        return [ids[s] for s in seeds]
+
+    def _load(self) -> None:
+        with self._registry.open("r+b") as fh:
+            hdr = json.loads(fh.readline() or b"{}")
+            if hdr.get("namespace") != str(self._namespace):
+                raise RuntimeError(f"Registry {self._registry} is for namespace "
+                                   f"{hdr.get('namespace')}, not {self._namespace}")
+            pos = fh.tell()
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    # drop a partial line left by an interrupted run
+                    fh.truncate(pos)
+                    break
+                (s, id) = json.loads(line)
+                self._ids[s] = id
+                self._seeds_by_id[id] = s
+                pos += len(line)
 
-    # Map enum  to uuid constants
-    ns_map = {
-        UuidNSEnum.DNS: uuid.NAMESPACE_URL,
-        UuidNSEnum.URL: uuid.NAMESPACE_URL,
-        UuidNSEnum.OID: uuid.NAMESPACE_OID,
-        UuidNSEnum.X500: uuid.NAMESPACE_X500
-    }
-
-    namespace_obj = ns_map.get(params.namespace, uuid.NAMESPACE_DNS)
-    seed = "_".join(str(v) for v in input if v is not None)
-    return str(uuid.uuid5(namespace_obj, seed))
+    def _append(self, pairs: Iterable) -> None:
+        new_file = not self._registry.exists()
+        if new_file:
+            self._registry.parent.mkdir(parents=True, exist_ok=True)
+        with self._registry.open("a", encoding="utf-8") as fh:
+            if new_file:
+                fh.write(json.dumps({"namespace": str(self._namespace)}) + "\n")
+            fh.writelines(json.dumps([s, id]) + "\n" for (s, id) in pairs)
+            fh.flush()
+            os.fsync(fh.fileno())
@@ -1,5 +1,31 @@
 from __future__ import annotations
+import os
 import typing
+from .protocol import batch_form, params_model, as_params
+from .pymodels import LookupTableParams
+from .tables import LookupTable, open_table
+
+RACE_CCDI_TO_CDS = {
+    "African American": "Black or African American",
+    "European": "White",
+    "Asian": "Asian",
+    "Native American": "American Indian or Alaska Native",
+    "Pacific Islander": "Native Hawaiian or Other Pacific Islander",
+    "Other": "Other",
+    "Unknown": "Unknown",
+    "Not Reported": "Unknown"
+}
+
+RACE_CDS_TO_CCDI = {
+    "Black or African American": "African American",
+    "White": "European",
+    "Asian": "Asian",
+    "American Indian or Alaska Native": "Native American",
+    "Native Hawaiian or Other Pacific Islander": "Pacific Islander",
+    "Other": "Other",
+    "Unknown": "Unknown"
+}
+
 
 def race_ccdi_to_cds(inp: str, params:dict | str = "NA"):
     """
@@ -13,28 +39,84 @@ def race_ccdi_to_cds(inp: str, params:dict | str = "NA"):
         default = params['default']
     else:
         default = params
-    mapping = {
-        "African American": "Black or African American",
-        "European": "White",
-        "Asian": "Asian",
-        "Native American": "American Indian or Alaska Native",
-        "Pacific Islander": "Native Hawaiian or Other Pacific Islander",
-        "Other": "Other",
-        "Unknown": "Unknown",
-        "Not Reported": "Unknown"
-    }
-    return mapping.get(inp, default)
+    return RACE_CCDI_TO_CDS.get(inp, default)
 
 
 def race_cds_to_ccdi(value, default="Unknown"):
     """Reverse mapping; note some CDS values map to 'Other' in CCDI"""
-    mapping = {
-        "Black or African American": "African American",
-        "White": "European",
-        "Asian": "Asian",
-        "American Indian or Alaska Native": "Native American",
-        "Native Hawaiian or Other Pacific Islander": "Pacific Islander",
-        "Other": "Other",
-        "Unknown": "Unknown"
-    }
-    return mapping.get(value, default)
+    return RACE_CDS_TO_CCDI.get(value, default)
+
+
+@batch_form(race_ccdi_to_cds)
+def race_ccdi_to_cds_batch(inps: list, params: dict | str = "NA") -> list:
+    if isinstance(params, dict):
+        default = params['default']
+    else:
+        default = params
+    get = RACE_CCDI_TO_CDS.get
+    return [get(inp, default) for inp in inps]
+
+
+@batch_form(race_cds_to_ccdi)
+def race_cds_to_ccdi_batch(values: list, default="Unknown") -> list:
+    get = RACE_CDS_TO_CCDI.get
+    return [get(value, default) for value in values]
+
+
+# open tables, by step params, with the (path, mtime, size) of the mapping
+# file they were opened for
+_tables = {}
+
+
+def _open(params: LookupTableParams) -> LookupTable:
+    """Open the table for `params`, reopening it if the mapping file changed"""
+    st = os.stat(params.file)
+    stamp = (params.file, st.st_mtime_ns, st.st_size)
+    cached = _tables.get(params)
+    if cached is None or cached[0] != stamp:
+        cached = _tables[params] = (stamp, open_table(
+            params.file, key=params.key, value=params.value,
+            case_insensitive=params.case_insensitive, reverse=params.reverse,
+            index_dir=params.index_dir))
+    params._table = cached[1]
+    return cached[1]
+
+
+def _table(params: LookupTableParams) -> LookupTable:
+    # params compiled with a pipeline keep their table: scalar calls don't
+    # check the mapping file, which is checked per batch, and on reload
+    tbl = params._table
+    return tbl if tbl is not None else _open(params)
+
+
+@params_model(LookupTableParams)
+def table(inp: str | None, params: LookupTableParams | dict):
+    """
+    Args:
+        inp: value to look up
+        params.file: mapping file (TSV, YAML or JSON); see tflib.tables
+        params.key, params.value: TSV key and value columns (default:
+            first and second columns)
+        params.default: value to return if no mapping found
+        params.passthrough: return the input itself if no mapping found
+        params.case_insensitive: match keys ignoring case
+        params.reverse: look up keys by value
+        params.index_dir: directory for the compiled table index
+    Returns:
+        Mapped value, or default (or input, with passthrough)
+    """
+    params = as_params(LookupTableParams, params)
+    if inp is None:
+        return inp if params.passthrough else params.default
+    return _table(params).get(str(inp),
+                              inp if params.passthrough else params.default)
+
+
+@batch_form(table)
+def table_batch(inps: list, params: LookupTableParams | dict) -> list:
+    params = as_params(LookupTableParams, params)
+    get = _open(params).get
+    if params.passthrough:
+        return [inp if inp is None else get(str(inp), inp) for inp in inps]
+    default = params.default
+    return [default if inp is None else get(str(inp), default) for inp in inps]
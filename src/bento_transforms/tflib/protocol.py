@@ -0,0 +1,71 @@
+"""
+bento_transforms.tflib.protocol
+
+Optional declarations a transform step function can make about itself.
+The Converter reads these when it builds transform pipelines; a step
+function that declares nothing is used as-is.
+"""
+from __future__ import annotations
+from typing import Callable
+from pydantic import BaseModel
+
+
+def batch_form(scalar: Callable) -> Callable:
+    """
+    Decorator: register the decorated function as the column ("batch")
+    form of the step function `scalar`.
+
+    A batch form takes one column (a list) per positional input of the
+    scalar form, and the same `params` keyword, and returns a list of
+    outputs with the same length as the input columns.
+    """
+    def register(batch: Callable) -> Callable:
+        scalar.batch = batch
+        return batch
+    return register
+
+
+def get_batch_form(method: Callable) -> Callable | None:
+    return getattr(method, "batch", None)
+
+
+def params_model(model: type[BaseModel]) -> Callable:
+    """
+    Decorator: declare the Pydantic model of the step function's `params`.
+
+    The Converter validates a step's Params against the declared model
+    once, when the transform pipeline is built, and passes the resulting
+    (frozen) model instance as `params` on every call. The function should
+    still accept a plain dict, via `as_params`, so it can be called directly.
+    """
+    def declare(fn: Callable) -> Callable:
+        fn.params_model = model
+        return fn
+    return declare
+
+
+def get_params_model(method: Callable) -> type[BaseModel] | None:
+    return getattr(method, "params_model", None)
+
+
+def as_params(model: type[BaseModel], params: BaseModel | dict | None) -> BaseModel:
+    """Return `params` as an instance of `model`, validating only if necessary"""
+    if isinstance(params, model):
+        return params
+    if params is None:
+        return model()
+    return model(**params)
+
+
+def impure(fn: Callable) -> Callable:
+    """
+    Decorator: declare that a step function is not pure (its output does not
+    depend only on its inputs and params), so results of transforms using it
+    must never be memoized.
+    """
+    fn.impure = True
+    return fn
+
+
+def is_pure(method: Callable) -> bool:
+    return not getattr(method, "impure", False)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Pattern
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from enum import Enum
 
 
@@ -12,21 +12,29 @@ class UuidNSEnum(str, Enum):
 
 
 class D2YParams(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     divisor: float = 365.0
     precision: int = 2
     sentinel: int = -999
 
 
 class Y2DParams(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     multiplier: int = 365
     sentinel_if_null: int = -999
 
 
 class UuidNS(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     namespace: UuidNSEnum = UuidNSEnum.DNS
 
 
 class StrFuncParams(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     prefix: str | None = None
     suffix: str | None  = None
     delimiter: str = " "
@@ -36,4 +44,18 @@ class StrFuncParams(BaseModel):
     flags: int = 0
     default: str | None = None
     skip_null: bool = False
-    
+
+
+class LookupTableParams(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    file: str
+    key: str | None = None
+    value: str | None = None
+    default: str | None = None
+    passthrough: bool = False
+    case_insensitive: bool = False
+    reverse: bool = False
+    index_dir: str | None = None
+    # the open table, set by tflib.lookup on first use
+    _table: object = PrivateAttr(default=None)
@@ -2,10 +2,12 @@ from __future__ import annotations
 import typing
 import re
 from .pymodels import StrFuncParams
+from .protocol import batch_form, params_model, as_params
 
 
+@params_model(StrFuncParams)
 def extract_middle_name(input: str | None,
-                        params: StrFuncParams):
+                        params: StrFuncParams | dict):
     """
     Args:
         input: full name string
@@ -15,28 +17,37 @@ def extract_middle_name(input: str | None,
     Returns:
         Extracted name part or default
     """
+    params = as_params(StrFuncParams, params)
     if not input:
-        return default
+        return params.default
     parts = str(input).split(params.delimiter)
     if len(parts) > params.position:
         return parts[params.position]
     return params.default
 
 
+def _pattern(params: StrFuncParams) -> re.Pattern:
+    if params.flags:
+        return re.compile(params.pattern.pattern, params.flags)
+    return params.pattern
+
+
+@params_model(StrFuncParams)
 def strip_pattern(input: str | None,
-                  params: StrFuncParams):
+                  params: StrFuncParams | dict):
     """
     Args:
-        value: string to process
-        pattern: regex pattern to match and remove
-        replacement: string to replace matches with (default empty)
-        flags: regex flags (0=none, re.IGNORECASE=2, etc)
+        input: string to process
+        params.pattern: regex pattern to match and remove
+        params.replacement: string to replace matches with (default empty)
+        params.flags: regex flags (0=none, re.IGNORECASE=2, etc)
     Returns:
         String with pattern removed
     """
-    if not value or not pattern:
-        return value
-    return re.sub(pattern, replacement, str(value), flags=flags)
+    params = as_params(StrFuncParams, params)
+    if not input or not params.pattern:
+        return input
+    return _pattern(params).sub(params.replacement or "", str(input))
 
 
 def normalize_case(value, case_type="sentence", 
@@ -79,17 +90,20 @@ def normalize_case(value, case_type="sentence",
     return value_str
 
 
-def split(input: str, params: dict) -> list:
-    params = StrFuncParams(**params) # for type checking
+@params_model(StrFuncParams)
+def split(input: str, params: StrFuncParams | dict) -> list:
+    params = as_params(StrFuncParams, params)
     return input.split(sep=params.delimiter)
 
 
-def add_prefix(input: str, params: dict) -> str:
-    params = StrFuncParams(**params)
+@params_model(StrFuncParams)
+def add_prefix(input: str, params: StrFuncParams | dict) -> str:
+    params = as_params(StrFuncParams, params)
     return params.prefix + input
 
 
-def concat_fields(args, params: dict):
+@params_model(StrFuncParams)
+def concat_fields(args, params: StrFuncParams | dict):
     """
     in params:
         values: list/tuple of values to concatenate
@@ -100,7 +114,7 @@ def concat_fields(args, params: dict):
     Returns:
         Concatenated string
     """
-    params = StrFuncParams(**params)
+    params = as_params(StrFuncParams, params)
     if not isinstance(args, (list, tuple)):
         args = [args]
 
@@ -117,3 +131,100 @@ def concat_fields(args, params: dict):
     if params.suffix:
         result = f"{result}{params.suffix}"
     return result
+
+
+# Column ("batch") forms. NumPy's string routines are no faster than str
+# methods on columns of Python strings, so these are plain loops, with the
+# params resolved once per column rather than once per value.
+
+@batch_form(extract_middle_name)
+def extract_middle_name_batch(inputs: list,
+                              params: StrFuncParams | dict) -> list:
+    params = as_params(StrFuncParams, params)
+    (delimiter, position, default) = (params.delimiter, params.position,
+                                      params.default)
+    ret = []
+    for inp in inputs:
+        if not inp:
+            ret.append(default)
+            continue
+        parts = str(inp).split(delimiter)
+        ret.append(parts[position] if len(parts) > position else default)
+    return ret
+
+
+@batch_form(strip_pattern)
+def strip_pattern_batch(inputs: list, params: StrFuncParams | dict) -> list:
+    params = as_params(StrFuncParams, params)
+    if not params.pattern:
+        return list(inputs)
+    sub = _pattern(params).sub
+    replacement = params.replacement or ""
+    return [sub(replacement, str(inp)) if inp else inp for inp in inputs]
+
+
+@batch_form(normalize_case)
+def normalize_case_batch(values: list, case_type="sentence",
+                         exceptions=None) -> list:
+    if case_type == "upper":
+        return [str(v).upper() if v else v for v in values]
+    if case_type == "lower":
+        return [str(v).lower() if v else v for v in values]
+    if case_type == "title":
+        return [str(v).title() if v else v for v in values]
+    if case_type != "sentence":
+        return [str(v) if v else v for v in values]
+    upper = {e.upper() for e in exceptions or []}
+    ret = []
+    for v in values:
+        if not v:
+            ret.append(v)
+            continue
+        result = []
+        for (i, word) in enumerate(str(v).split()):
+            word_core = word.rstrip('.,;:!?')
+            if word_core.upper() in upper:
+                result.append(word_core.upper())
+            elif i == 0:
+                result.append(word.capitalize())
+            else:
+                result.append(word.lower())
+        ret.append(" ".join(result))
+    return ret
+
+
+@batch_form(split)
+def split_batch(inputs: list, params: StrFuncParams | dict) -> list:
+    sep = as_params(StrFuncParams, params).delimiter
+    return [inp.split(sep) for inp in inputs]
+
+
+@batch_form(add_prefix)
+def add_prefix_batch(inputs: list, params: StrFuncParams | dict) -> list:
+    prefix = as_params(StrFuncParams, params).prefix
+    return [prefix + inp for inp in inputs]
+
+
+@batch_form(concat_fields)
+def concat_fields_batch(args_col: list, params: StrFuncParams | dict) -> list:
+    params = as_params(StrFuncParams, params)
+    join = params.delimiter.join
+    prefix = params.prefix or ""
+    suffix = params.suffix or ""
+    skip_null = params.skip_null
+    ret = []
+    for args in args_col:
+        if isinstance(args, (list, tuple)):
+            if skip_null:
+                result = join([str(v) for v in args
+                               if v is not None and str(v).strip()])
+            else:
+                result = join([str(v) if v is not None else ""
+                               for v in args])
+        else:
+            # a single value joins to itself
+            result = str(args) if args is not None else ""
+            if skip_null and not result.strip():
+                result = ""
+        ret.append(f"{prefix}{result}{suffix}")
+    return ret
@@ -0,0 +1,237 @@
+"""
+bento_transforms.tflib.tables
+
+Compiled, memory-mapped lookup tables for large terminology maps.
+
+A mapping file (TSV, YAML or JSON) is compiled once into a compact sorted
+index file, named by a hash of the file's path and the compile options,
+and reused until the mapping file changes. The index header holds the
+mtime, size and content hash of the mapping file it was compiled from:
+while the mtime and size match, the index is used without reading the
+file; otherwise the file is hashed, and recompiled only if its contents
+changed. Opening an index only
+memory-maps it: keys are found by binary search in the mapped file, so
+loading is fast regardless of the table size, and processes that map the
+same index share its pages instead of each holding a copy.
+
+Index layout (native byte order; indexes are local caches, not portable):
+    magic b"BTLKIDX2", flags (u32), reserved (u32), entry count n (u64),
+    mapping file mtime in ns (i64), size (u64) and sha256 (32 bytes), key offsets (n+1 x u64), value offsets (n x u64), then the data area,
+    where entry i is key bytes [key_off[i]:val_off[i]] followed by value
+    bytes [val_off[i]:key_off[i+1]], in key byte order.
+"""
+
+from __future__ import annotations
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+import yaml
+
+MAGIC = b"BTLKIDX2"
+HEADER = struct.Struct("=8sIIQqQ32s")
+# offset of the mapping file mtime and size in the header
+STAMP = struct.Struct("=qQ")
+STAMP_OFFSET = struct.calcsize("=8sIIQ")
+FLAG_CASE_INSENSITIVE = 1
+FLAG_REVERSE = 2
+# bump when the index layout changes
+INDEX_VERSION = "2"
+
+
+def default_index_dir() -> Path:
+    env = os.environ.get("BENTO_TRANSFORMS_CACHE")
+    if env:
+        return Path(env) / "tables"
+    return Path.home() / ".cache" / "bento_transforms" / "tables"
+
+
+def read_mapping(path: str | Path, key: str | None = None,
+                 value: str | None = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (key, value) string pairs from a mapping file. YAML and JSON files
+    hold a single mapping object; TSV files have a header, and the `key` and
+    `value` columns (default: the first two columns) are used.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".yaml", ".yml", ".json"):
+        with path.open(encoding="utf-8") as fh:
+            data = (json.load(fh) if path.suffix.lower() == ".json"
+                    else yaml.safe_load(fh))
+        if not isinstance(data, dict):
+            raise RuntimeError(f"Mapping file {path} must contain a single mapping")
+        for (k, v) in data.items():
+            yield (str(k), str(v))
+        return
+    with path.open(newline="", encoding="utf-8") as fh:
+        rdr = csv.reader(fh, delimiter="\t")
+        hdr = next(rdr, None)
+        if hdr is None:
+            return
+        for col in (key, value):
+            if col and col not in hdr:
+                raise RuntimeError(f"Mapping file {path} has no column '{col}'")
+        ki = hdr.index(key) if key else 0
+        vi = hdr.index(value) if value else 1
+        for row in rdr:
+            if len(row) > max(ki, vi):
+                yield (row[ki], row[vi])
+
+
+def compile_table(path: str | Path, key: str | None = None,
+                  value: str | None = None, case_insensitive: bool = False,
+                  reverse: bool = False,
+                  index_dir: str | Path | None = None) -> Path:
+    """
+    Compile a mapping file to an index file, unless its index is up to date
+    already, and return the index path.
+    With `reverse`, the index maps values to keys. With `case_insensitive`,
+    keys are case-folded. The first entry for a (folded) key wins.
+    """
+    path = Path(path)
+    flags = ((FLAG_CASE_INSENSITIVE if case_insensitive else 0)
+             | (FLAG_REVERSE if reverse else 0))
+    name = hashlib.sha256(json.dumps(
+        [INDEX_VERSION, str(path.resolve()), key, value, flags]).encode())
+    index_dir = Path(index_dir) if index_dir else default_index_dir()
+    idx = index_dir / f"{path.stem}-{name.hexdigest()[:20]}.btlk"
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    hdr = _read_header(idx)
+    if hdr is not None and hdr[4:6] == stamp:
+        return idx
+    digest = _file_digest(path)
+    if hdr is not None and hdr[6] == digest:
+        # touched, but not changed
+        with idx.open("r+b") as fh:
+            fh.seek(STAMP_OFFSET)
+            fh.write(STAMP.pack(*stamp))
+        return idx
+    entries = {}
+    for (k, v) in read_mapping(path, key, value):
+        if reverse:
+            (k, v) = (v, k)
+        if case_insensitive:
+            k = k.casefold()
+        entries.setdefault(k.encode("utf-8"), v.encode("utf-8"))
+    keys = sorted(entries)
+    n = len(keys)
+    koff = []
+    voff = []
+    pos = HEADER.size + 8 * (2 * n + 1)
+    for k in keys:
+        koff.append(pos)
+        voff.append(pos + len(k))
+        pos += len(k) + len(entries[k])
+    koff.append(pos)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file and rename, so concurrent readers never
+    # see a partial index
+    (fd, tmp) = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(HEADER.pack(MAGIC, flags, 0, n, *stamp, digest))
+            fh.write(struct.pack(f"={n + 1}Q", *koff))
+            fh.write(struct.pack(f"={n}Q", *voff))
+            for k in keys:
+                fh.write(k)
+                fh.write(entries[k])
+        os.replace(tmp, idx)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return idx
+
+
+def _read_header(idx: Path) -> tuple | None:
+    try:
+        with idx.open("rb") as fh:
+            buf = fh.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(buf) < HEADER.size or not buf.startswith(MAGIC):
+        return None
+    return HEADER.unpack(buf)
+
+
+def _file_digest(path: Path) -> bytes:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class LookupTable:
+    """A read-only, memory-mapped view of a compiled lookup table index"""
+    def __init__(self, index_path: str | Path):
+        self._path = Path(index_path)
+        with self._path.open("rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, flags, _, n) = HEADER.unpack_from(self._mm)[:4]
+        if magic != MAGIC:
+            raise RuntimeError(f"{self._path} is not a lookup table index")
+        self._n = n
+        self.case_insensitive = bool(flags & FLAG_CASE_INSENSITIVE)
+        self.reverse = bool(flags & FLAG_REVERSE)
+        view = memoryview(self._mm)
+        start = HEADER.size
+        self._koff = view[start:start + 8 * (n + 1)].cast("Q")
+        start += 8 * (n + 1)
+        self._voff = view[start:start + 8 * n].cast("Q")
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __len__(self) -> int:
+        return self._n
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        if self.case_insensitive:
+            key = key.casefold()
+        k = key.encode("utf-8")
+        (mm, koff, voff) = (self._mm, self._koff, self._voff)
+        (lo, hi) = (0, self._n)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = mm[koff[mid]:voff[mid]]
+            if probe < k:
+                lo = mid + 1
+            elif probe > k:
+                hi = mid
+            else:
+                return mm[voff[mid]:koff[mid + 1]].decode("utf-8")
+        return default
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        mm = self._mm
+        for i in range(self._n):
+            yield (mm[self._koff[i]:self._voff[i]].decode("utf-8"),
+                   mm[self._voff[i]:self._koff[i + 1]].decode("utf-8"))
+
+
+# tables opened in this process, by index path, with the inode and mtime
+# of the index file they mapped (an index is replaced when recompiled)
+_open_tables: Dict[Path, Tuple[Tuple[int, int], LookupTable]] = {}
+
+
+def open_table(path: str | Path, key: str | None = None,
+               value: str | None = None, case_insensitive: bool = False,
+               reverse: bool = False,
+               index_dir: str | Path | None = None) -> LookupTable:
+    """Compile (if necessary) and open the lookup table for a mapping file"""
+    idx = compile_table(path, key=key, value=value,
+                        case_insensitive=case_insensitive, reverse=reverse,
+                        index_dir=index_dir)
+    st = idx.stat()
+    stamp = (st.st_ino, st.st_mtime_ns)
+    cached = _open_tables.get(idx)
+    if cached is None or cached[0] != stamp:
+        cached = _open_tables[idx] = (stamp, LookupTable(idx))
+    return cached[1]
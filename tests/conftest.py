@@ -6,3 +6,14 @@ from pathlib import Path
 def samplesd():
     tdir = Path("tests/").resolve() if Path("tests").exists() else Path().resolve()
     return tdir / "samples"
+
+
+@pytest.fixture(params=["reference", "compiled"])
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def create_tf(backend):
+    from bento_transforms.converters.converter import BACKENDS
+    return BACKENDS[backend]
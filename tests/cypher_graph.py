@@ -0,0 +1,248 @@
+"""
+An in-process stand-in for the MDB, for tests of the Cypher emitters.
+Graph runs the Cypher subset those emitters use: UNWIND of parameters and
+of row values, MATCH and OPTIONAL MATCH of paths (including
+variable-length `*n..` relationships), WITH, MERGE of nodes and
+relationships (with properties), DETACH DELETE, and RETURN of variable
+properties.
+"""
+
+import re
+from itertools import count
+
+_TOKEN = re.compile(r"\s*(?:('(?:\\.|[^'\\])*')|(\d+(?:\.\d+)?)|(\w+)|(->|\S))")
+
+
+class Graph:
+    def __init__(self):
+        self.nodes = {}
+        self.rels = set()
+        self.rel_props = {}
+        self._ids = count()
+
+    def add_node(self, label, props):
+        for (nid, (lbl, prps)) in self.nodes.items():
+            if lbl == label and props.items() <= prps.items():
+                return nid
+        nid = next(self._ids)
+        self.nodes[nid] = (label, dict(props))
+        return nid
+
+    def run(self, stmt, params=None):
+        """Run a statement; return the RETURN rows, if any, as dicts"""
+        toks = [next(t for t in m.groups() if t is not None)
+                for m in _TOKEN.finditer(str(stmt).rstrip("; \n"))]
+        rows = [{}]
+        if toks[0] == "UNWIND":
+            rows = (params or {})[toks[2]]
+            toks = toks[5:]
+        clauses = self._parse(toks)
+        ret = []
+        for row in rows:
+            bindings = [{"row": row}]
+            for (kw, items) in clauses:
+                if kw == "UNWIND":
+                    (path, alias) = items[0]
+                    bindings = [dict(b, **{alias: v}) for b in bindings
+                                for v in self._value(path, b)]
+                elif kw in ("MATCH", "OPTIONAL"):
+                    for pat in items:
+                        matched = []
+                        for b in bindings:
+                            ms = self._match(pat, b)
+                            if not ms and kw == "OPTIONAL":
+                                ms = [{}]
+                            matched.extend(dict(b, **m) for m in ms)
+                        bindings = matched
+                elif kw == "MERGE":
+                    for b in bindings:
+                        self._merge(items[0], b)
+                elif kw == "DELETE":
+                    for b in bindings:
+                        for var in items:
+                            self._delete(b.get(var))
+                elif kw == "RETURN":
+                    for b in bindings:
+                        ret.append({alias: self.nodes[b[var]][1].get(prop)
+                                    for (var, prop, alias) in items})
+        return ret
+
+    def _parse(self, toks):
+        clauses = []
+        pos = 0
+        while pos < len(toks):
+            kw = toks[pos]
+            pos += 1
+            if kw in ("OPTIONAL", "DETACH"):
+                pos += 1
+            if kw == "DETACH":
+                kw = "DELETE"
+            items = []
+            while True:
+                if kw == "UNWIND":
+                    # row.path AS alias
+                    end = toks.index("AS", pos)
+                    items.append((toks[pos:end:2], toks[end + 1]))
+                    pos = end + 2
+                elif kw in ("WITH", "DELETE"):
+                    items.append(toks[pos])
+                    pos += 1
+                elif kw == "RETURN":
+                    # var.prop AS alias
+                    items.append((toks[pos], toks[pos + 2], toks[pos + 4]))
+                    pos += 5
+                else:
+                    (pat, pos) = self._pattern(toks, pos)
+                    items.append(pat)
+                if pos < len(toks) and toks[pos] == ",":
+                    pos += 1
+                    continue
+                break
+            clauses.append((kw, items))
+        return clauses
+
+    def _pattern(self, toks, pos):
+        # [node, (type, min hops or None, props), node, ...]
+        (node, pos) = self._node(toks, pos)
+        pat = [node]
+        while pos < len(toks) and toks[pos] == "-":
+            pos = toks.index(":", pos) + 1
+            rtype = toks[pos]
+            pos += 1
+            hops = None
+            if toks[pos] == "*":
+                hops = int(toks[pos + 1])
+                pos += 4
+            (props, pos) = self._map(toks, pos)
+            (node, pos) = self._node(toks, pos + 2)
+            pat.extend([(rtype, hops, props), node])
+        return (pat, pos)
+
+    def _map(self, toks, pos):
+        props = {}
+        if toks[pos] == "{":
+            pos += 1
+            while toks[pos] != "}":
+                key = toks[pos]
+                pos += 2
+                value = [toks[pos]]
+                pos += 1
+                while toks[pos] == ".":
+                    value.append(toks[pos + 1])
+                    pos += 2
+                props[key] = value
+                if toks[pos] == ",":
+                    pos += 1
+            pos += 1
+        return (props, pos)
+
+    def _node(self, toks, pos):
+        assert toks[pos] == "("
+        pos += 1
+        label = None
+        if toks[pos] not in (":", ")", "{"):
+            var = toks[pos]
+            pos += 1
+        else:
+            var = f" anon{pos}"
+        if toks[pos] == ":":
+            label = toks[pos + 1]
+            pos += 2
+        (props, pos) = self._map(toks, pos)
+        assert toks[pos] == ")"
+        return ((var, label, props), pos + 1)
+
+    def _value(self, path, env):
+        val = env
+        for name in path:
+            val = val[name]
+        return val
+
+    def _props(self, props, env):
+        ret = {}
+        for (key, value) in props.items():
+            tok = value[0]
+            if tok.startswith("'"):
+                ret[key] = re.sub(r"\\'", "'", tok[1:-1])
+            elif tok[0].isdigit():
+                ret[key] = float(tok) if "." in tok else int(tok)
+            else:
+                ret[key] = self._value(value, env)
+        return ret
+
+    def _fits(self, node, nid, binding):
+        (var, label, props) = node
+        if var in binding:
+            return binding[var] == nid
+        (lbl, prps) = self.nodes[nid]
+        return ((label is None or lbl == label)
+                and self._props(props, binding).items() <= prps.items())
+
+    def _reach(self, nid, rtype, hops):
+        if hops is None:
+            return [b for (t, a, b) in self.rels if t == rtype and a == nid]
+        seen = {nid}
+        frontier = [nid]
+        for _ in range(hops):
+            frontier = [b for n in frontier
+                        for (t, a, b) in self.rels if t == rtype and a == n]
+        reached = list(frontier)
+        while frontier:
+            frontier = [b for n in frontier
+                        for (t, a, b) in self.rels
+                        if t == rtype and a == n and b not in seen]
+            seen.update(frontier)
+            reached.extend(frontier)
+        return reached
+
+    def _match(self, pat, binding):
+        partial = [{pat[0][0]: nid} for nid in self.nodes
+                   if self._fits(pat[0], nid, binding)]
+        for i in range(1, len(pat), 2):
+            ((rtype, hops, _), node) = (pat[i], pat[i + 1])
+            partial = [{**p, node[0]: nb} for p in partial
+                       for nb in self._reach(p[pat[i - 1][0]], rtype, hops)
+                       if self._fits(node, nb, {**binding, **p})]
+        return [{k: v for (k, v) in p.items() if not k.startswith(" ")}
+                for p in partial]
+
+    def _merge(self, pat, binding):
+        if len(pat) == 1:
+            (_, label, props) = pat[0]
+            self.add_node(label, self._props(props, binding))
+            return
+        ((rtype, _, props), a, b) = (pat[1], pat[0], pat[2])
+        rel = (rtype, binding[a[0]], binding[b[0]])
+        self.rels.add(rel)
+        self.rel_props[rel] = self._props(props, binding)
+
+    def _delete(self, nid):
+        if nid is None or nid not in self.nodes:
+            return
+        del self.nodes[nid]
+        self.rels = {r for r in self.rels if nid not in r[1:]}
+        self.rel_props = {r: p for (r, p) in self.rel_props.items()
+                          if r in self.rels}
+
+    def canonical(self):
+        def key(nid):
+            (label, props) = self.nodes[nid]
+            return (label, tuple(sorted(props.items())))
+        return ({key(nid) for nid in self.nodes},
+                {(rtype, key(a), key(b),
+                  tuple(sorted(self.rel_props.get((rtype, a, b), {}).items())))
+                 for (rtype, a, b) in self.rels})
+
+
+def mdb_graph(tmdl):
+    """A graph holding the model nodes and properties the transforms use"""
+    g = Graph()
+    for tf in tmdl.transforms.values():
+        for prop in list(tf.input_props.values()) + list(tf.output_props.values()):
+            node = [e for e in prop.belongs.values() if e.__class__.__name__ == "Node"][0]
+            n = g.add_node("node", {"model": node.model, "version": node.version,
+                                    "handle": node.handle})
+            p = g.add_node("property", {"model": prop.model, "version": prop.version,
+                                        "handle": prop.handle})
+            g.rels.add(("has_property", n, p))
+    return g
@@ -1,4 +1,5 @@
 import pytest
+from bento_mdf import MDFReader
 from bento_mdf.validator import MDFValidator
 from bento_transforms.mdf import TransformReader
 from bento_transforms.mdf.pymodels import GeneralTransform
@@ -51,3 +52,61 @@ def test_err_missing_node_default_in_to(samplesd):
 def test_err_missing_package_default_in_step(samplesd):
     with pytest.raises(RuntimeError, match="Simple step entrypoint format"):
         TransformReader(samplesd / "err_5.yaml", handle='transforms')
+
+
+def test_reader_cache(samplesd, tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", cache_dir=cache)
+    assert len(list(cache.glob("*.json"))) == 1
+    # a cached reader doesn't load or validate YAML
+    monkeypatch.setattr(MDFReader, "load_yaml", None)
+    cached = TransformReader(samplesd / "tf_func_test.yaml", cache_dir=cache)
+    assert cached.transforms == tmdf.transforms
+    assert [type(t) for t in cached.transforms.values()] == [
+        type(t) for t in tmdf.transforms.values()]
+    assert cached.package_default == tmdf.package_default
+    assert cached.mdf["TransformDefinitions"]["Transforms"]
+    monkeypatch.undo()
+
+    # changed contents make a new entry
+    src = tmp_path / "tf.yaml"
+    src.write_text((samplesd / "tf_func_test.yaml").read_text().replace(
+        '"GC:"', '"GX:"'))
+    tmdf = TransformReader(src, cache_dir=cache)
+    assert tmdf.transforms["lookup_and_prefix"].Steps[1].Params["prefix"] == "GX:"
+    assert len(list(cache.glob("*.json"))) == 2
+
+
+def test_lazy_reader(samplesd):
+    from bento_transforms.converters.converter import Converter
+    tmdf = TransformReader(samplesd / "tdp.yaml")
+    lazy = TransformReader(samplesd / "tdp.yaml", lazy=True)
+    assert list(lazy.transforms) == list(tmdf.transforms)
+    assert lazy.transforms.built == 0
+    cvtr = Converter(tmdf=lazy)
+    assert lazy.transforms.built == 0
+    tf_func = cvtr.convert("participant.race", "participant.race")
+    assert lazy.transforms.built == 1
+    assert tf_func("Asian") == "GC:Asian"
+    for hdl in tmdf.transforms:
+        assert lazy.transforms[hdl] == tmdf.transforms[hdl]
+        assert type(lazy.transforms[hdl]) is type(tmdf.transforms[hdl])
+    assert cvtr.plan.order
+
+
+def test_lazy_reader_cache(samplesd, tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    tmdf = TransformReader(samplesd / "tdp.yaml")
+    # a lazy cache miss writes the entry without building transforms
+    lazy = TransformReader(samplesd / "tdp.yaml", lazy=True, cache_dir=cache)
+    assert lazy.transforms.built == 0
+    assert len(list(cache.glob("*.json"))) == 1
+    monkeypatch.setattr(MDFReader, "load_yaml", None)
+    cached = TransformReader(samplesd / "tdp.yaml", lazy=True, cache_dir=cache)
+    assert cached.transforms.built == 0
+    assert cached.transforms.io("clinical_measure_file_file_name_to_file_file_name") == \
+        lazy.transforms.io("clinical_measure_file_file_name_to_file_file_name")
+    eager = TransformReader(samplesd / "tdp.yaml", cache_dir=cache)
+    for hdl in tmdf.transforms:
+        assert cached.transforms[hdl] == eager.transforms[hdl] == tmdf.transforms[hdl]
+        assert type(cached.transforms[hdl]) is type(tmdf.transforms[hdl])
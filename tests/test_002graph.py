@@ -24,6 +24,14 @@ def test_meta_graph(samplesd):
     assert mstep.version == "0.1.1"
     assert mstep.params['delimiter'] == " "
 
+    # nodes and properties are shared across transforms
+    acl = tmdl.props[("CDS", "10.0.0", "study", "acl")]
+    users = [tf for tf in tmdl.transforms.values()
+             if tf.output_props.get("study.acl") is not None]
+    assert len(users) > 1
+    assert all(tf.output_props["study.acl"] is acl for tf in users)
+    assert tmdl.nodes[("CDS", "10.0.0", "study")].props["acl"] is acl
+
     # Transform can haz Tags
     tag = Tag({"key": "Source", "value":"SB2"})
     mtf.tags[tag.key] = tag
@@ -1,16 +1,15 @@
+import gc
+import linecache
 import pytest
 from bento_transforms.mdf import TransformReader
-from bento_transforms.converters.converter import (
-    create_transform_function,
-    Converter,
-)
+from bento_transforms.converters.converter import Converter
 from typing import Callable
 from pdb import set_trace
 
 
-def test_tf_functions(samplesd):
+def test_tf_functions(samplesd, create_tf):
     tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
-    tf_func = create_transform_function(
+    tf_func = create_tf(
         tmdf.transforms['fullname_to_fmlnames']
     )
     assert isinstance(tf_func, Callable)
@@ -28,7 +27,7 @@ def test_tf_functions(samplesd):
         tf_func(**{"squidward": "Sigismund Leonhart Popbutton"})
 
     # identity
-    tf_func = create_transform_function(
+    tf_func = create_tf(
         tmdf.transforms[
             "study_personnel_email_address_to_investigator_email"
         ]
@@ -37,16 +36,16 @@ def test_tf_functions(samplesd):
     assert tf_func("boog") == "boog"
 
     # multistep
-    tf_func = create_transform_function(
+    tf_func = create_tf(
         tmdf.transforms["lookup_and_prefix"]
     )
     assert tf_func("Native American") == "GC:American Indian or Alaska Native"
 
 
-def test_converter(samplesd):
+def test_converter(samplesd, backend):
     tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
 
-    cvtr = Converter(tmdf=tmdf)
+    cvtr = Converter(tmdf=tmdf, backend=backend)
     assert cvtr
 
     assert cvtr.from_model == ('CCDI', '3.1.0')
@@ -77,3 +76,50 @@ def test_converter(samplesd):
         cvtr.convert(frm="study_personell.personnel_name",
                      to=["investigator.first_name", "investigator.middle_name",
                          "investigator.last_name"])        
+
+
+def test_step_params_compiled_once(create_tf):
+    from bento_transforms.mdf.pymodels import GeneralTransform
+    from bento_transforms.tflib import arith, ids
+    io = {"Inputs": [{"Model": "CCDI", "Version": "3.1.0",
+                      "Node": "diagnosis", "Props": ["age_at_diagnosis"]}],
+          "Outputs": [{"Model": "CDS", "Version": "10.0.0",
+                       "Node": "diagnosis", "Props": ["age_at_diagnosis"]}]}
+    step = {"Package": {"Name": "bento_transforms"},
+            "Entrypoint": "tflib.arith.days_to_years"}
+    gtf = GeneralTransform(**io, Steps=[{**step, "Params": {"divisor": 365}}])
+    tf_func = create_tf(gtf)
+    assert tf_func(730) == 2.0
+    assert tf_func(-999) is None
+    assert tf_func.map_batch([365, None]) == [1.0, None]
+    # plain dicts still work when calling tflib functions directly
+    assert arith.days_to_years(730, {"divisor": 365}) == 2.0
+
+    # bad params are reported when the pipeline is built
+    gtf = GeneralTransform(**io, Steps=[{**step, "Params": {"divisor": "boog"}}])
+    with pytest.raises(RuntimeError, match="Invalid Params for step"):
+        create_tf(gtf)
+
+    gtf = GeneralTransform(**io, Steps=[{"Package": {"Name": "bento_transforms"},
+                                         "Entrypoint": "tflib.ids.generate_uuid",
+                                         "Params": {"namespace": "oid"}}])
+    assert create_tf(gtf)("boog") == ids.generate_uuid(
+        "boog", {"namespace": "oid"})
+
+
+def test_compiled_backend(samplesd):
+    from bento_transforms.converters.compiler import compile_transform_function
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    tf_func = compile_transform_function(tmdf.transforms['lookup_and_prefix'])
+    assert "_s0(*args)" in tf_func.source
+    assert "_s1(v, params=_p1)" in tf_func.source
+    # the source is registered for tracebacks while the function lives
+    filename = tf_func.__code__.co_filename
+    assert linecache.getline(filename, 1).startswith("def _make(")
+    tf_func = compile_transform_function(tmdf.transforms['fullname_to_fmlnames'])
+    gc.collect()
+    assert filename not in linecache.cache
+    assert tf_func("A B") == {"investigator_first_name": "A",
+                              "investigator_middle_name": "B"}
+    with pytest.raises(RuntimeError, match="Unknown transform function backend"):
+        Converter(tmdf=tmdf, backend="narb")
@@ -0,0 +1,185 @@
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+
+
+def test_map_batch(samplesd, create_tf):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    tf_func = create_tf(
+        tmdf.transforms['fullname_to_fmlnames']
+    )
+    names = ["Sigismund Leonhart Popbutton", "James Earl Jones"]
+    ret = tf_func.map_batch(names)
+    assert ret == {
+        "investigator_first_name": ["Sigismund", "James"],
+        "investigator_middle_name": ["Leonhart", "Earl"],
+        "investigator_last_name": ["Popbutton", "Jones"],
+        }
+    ret = tf_func.map_batch(study_personnel_personnel_name=tuple(names))
+    assert ret["investigator_last_name"] == ["Popbutton", "Jones"]
+    for (i, name) in enumerate(names):
+        assert ret["investigator_middle_name"][i] == tf_func(name)["investigator_middle_name"]
+
+    with pytest.raises(RuntimeError, match="Valid input keys are"):
+        tf_func.map_batch(squidward=names)
+
+    # multistep, with a registered batch form and a scalar fallback
+    tf_func = create_tf(
+        tmdf.transforms["lookup_and_prefix"]
+    )
+    races = ["Native American", "Asian", "Klingon"]
+    assert tf_func.map_batch(races) == [tf_func(r) for r in races]
+    assert tf_func.map_batch([]) == []
+
+    # identity
+    tf_func = create_tf(
+        tmdf.transforms[
+            "study_personnel_email_address_to_investigator_email"
+        ]
+    )
+    assert tf_func.map_batch(x for x in ["boog", "narb"]) == ["boog", "narb"]
+
+
+def test_convert_batch(samplesd, create_tf, backend):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    cvtr = Converter(tmdf=tmdf, backend=backend)
+    ans = cvtr.convert_batch(
+        "study_personnel.personnel_name",
+        ["investigator.first_name", "investigator.middle_name",
+         "investigator.last_name"],
+        ["James Earl Jones", "Sigismund Leonhart Popbutton"])
+    assert ans["investigator_first_name"] == ["James", "Sigismund"]
+    with pytest.raises(RuntimeError, match="same length"):
+        create_tf(
+            tmdf.transforms["fullname_to_fmlnames"]
+        ).map_batch(["a b c"], ["d e f", "g h i"])
+
+
+def test_dict_encoded_batch(samplesd, create_tf, monkeypatch):
+    from bento_transforms.converters.batch import factorize, low_cardinality
+    from bento_transforms.tflib import lookup
+    assert factorize([["a", "b", "a", "c", "b"]]) == ([["a", "b", "c"]],
+                                                      [0, 1, 0, 2, 1])
+    assert factorize([["a", "a", "b"], [1, 1, 1]]) == ([["a", "b"], [1, 1]],
+                                                       [0, 0, 1])
+    assert factorize([[["unhashable"]]]) is None
+    # equal values of different types are kept apart
+    assert factorize([[1, 1.0, True, 1]]) == ([[1, 1.0, True]], [0, 1, 2, 0])
+    assert factorize([[1, 1], [True, 1]]) == ([[1, 1], [True, 1]], [0, 1])
+    assert low_cardinality([["a", "b"] * 10])
+    assert not low_cardinality([[str(i) for i in range(20)]])
+
+    seen = []
+    batch = lookup.race_ccdi_to_cds.batch
+
+    def counting(inps, **kwargs):
+        seen.append(len(inps))
+        return batch(inps, **kwargs)
+    monkeypatch.setattr(lookup.race_ccdi_to_cds, "batch", counting)
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    tf_func = create_tf(tmdf.transforms["lookup_and_prefix"])
+    races = ["Asian", "European", "Other", "Asian"] * 250
+    expected = [tf_func(r) for r in races]
+    assert tf_func.map_batch(races) == expected
+    assert seen == [3]
+    tf_func.map_batch.dict_encode = False
+    assert tf_func.map_batch(races) == expected
+    assert seen == [3, 1000]
+    tf_func.map_batch.dict_encode = True
+    assert tf_func.map_batch(["Asian"]) == ["GC:Asian"]
+    assert tf_func.map_batch([]) == []
+
+    tf_func = create_tf(tmdf.transforms["fullname_to_fmlnames"])
+    names = ["A B C", "D E F"] * 10
+    assert tf_func.map_batch(names)["investigator_last_name"] == ["C", "F"] * 10
+
+
+def test_arith_batch(create_tf, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from bento_transforms.mdf.pymodels import GeneralTransform
+    from bento_transforms.tflib import arith
+    days = [365, None, -999, 0.005 * 365, 2.675 * 365, -1, 40000, float("nan")]
+    assert arith.days_to_years_batch(days, {}) == [
+        arith.days_to_years(d, {}) for d in days[:-1]] + [pytest.approx(
+            float("nan"), nan_ok=True)]
+    years = [1, None, 2.5, 0.5, 1.5, -3, 2 ** 60]
+    assert arith.years_to_days_batch(years, {"multiplier": 12}) == [
+        arith.years_to_days(y, {"multiplier": 12}) for y in years]
+
+    # arrays give masked arrays
+    ret = arith.days_to_years_batch(np.array([730, -999, 1]), {"precision": 3})
+    assert ret.mask.tolist() == [False, True, False]
+    assert ret.compressed().tolist() == [2.0, 0.003]
+    ret = arith.years_to_days_batch(np.ma.array([1.0, 2.0], mask=[0, 1]), {})
+    assert ret.tolist() == [365, -999]
+
+    # non-numeric columns go to the scalar form
+    with pytest.raises(TypeError):
+        arith.days_to_years_batch(["12"], {})
+
+    gtf = GeneralTransform(
+        Inputs=[{"Model": "CCDI", "Version": "3.1.0", "Node": "diagnosis",
+                 "Props": ["age_at_diagnosis"]}],
+        Outputs=[{"Model": "CDS", "Version": "10.0.0", "Node": "diagnosis",
+                  "Props": ["age_at_diagnosis"]}],
+        Steps=[{"Package": {"Name": "bento_transforms"},
+                "Entrypoint": "tflib.arith.days_to_years",
+                "Params": {"precision": 1}}])
+    tf_func = create_tf(gtf)
+    tf_func.map_batch.dict_encode = False
+    assert tf_func.map_batch(days[:-1]) == [tf_func(d) for d in days[:-1]]
+
+    # arrays, and columns of NumPy scalars, take the vectorized path
+    ages = np.array([365, 730, 365, 1095])
+    expected = [tf_func(int(d)) for d in ages]
+    monkeypatch.setattr(arith, "days_to_years", None)
+    for encode in (False, True, "auto"):
+        tf_func.map_batch.dict_encode = encode
+        ret = tf_func.map_batch(ages)
+        # encoded or not, an array gives a masked array
+        assert isinstance(ret, np.ma.MaskedArray)
+        assert ret.tolist() == expected
+    assert arith.days_to_years_batch(list(ages), {"precision": 1}) == expected
+
+
+def test_string_batch():
+    from bento_transforms.tflib import string
+    names = ["Sigismund Leonhart Popbutton", "Cher", "", None]
+    prm = {"default": "NMN"}
+    assert string.extract_middle_name("James Earl Jones", prm) == "Earl"
+    assert string.extract_middle_name_batch(names, prm) == [
+        string.extract_middle_name(n, prm) for n in names] == [
+            "Leonhart", "NMN", "NMN", "NMN"]
+    prm = {"pattern": "nos", "flags": 2, "replacement": "", "delimiter": ","}
+    codes = ["Carcinoma, NOS", "", None, "nostril"]
+    assert string.strip_pattern_batch(codes, prm) == [
+        string.strip_pattern(c, prm) for c in codes] == [
+            "Carcinoma, ", "", None, "tril"]
+    terms = ["carcinoma, nos", "MALIGNANT neoplasm", None]
+    assert string.normalize_case_batch(terms, "sentence", ["NOS"]) == [
+        string.normalize_case(t, "sentence", ["NOS"]) for t in terms]
+    prm = {"delimiter": "|", "prefix": "<", "suffix": ">", "skip_null": True}
+    fields = [["a", None, " ", 3], ("b",), "c", None]
+    assert string.concat_fields_batch(fields, prm) == [
+        string.concat_fields(f, prm) for f in fields] == [
+            "<a|3>", "<b>", "<c>", "<>"]
+
+
+def test_single_output_list(create_tf):
+    from bento_transforms.mdf.pymodels import GeneralTransform
+    from bento_transforms.converters.plan import ExecutionPlan, PropKey
+    gtf = GeneralTransform(
+        Inputs=[{"Model": "A", "Version": "1", "Node": "n", "Props": ["x"]}],
+        Outputs=[{"Model": "B", "Version": "1", "Node": "n", "Props": ["y"]}],
+        Steps=[{"Package": {"Name": "bento_transforms"},
+                "Entrypoint": "tflib.string.split",
+                "Params": {"delimiter": " "}}])
+    tf_func = create_tf(gtf)
+    values = ["a b", "c"]
+    # a list result is split by output name, in both forms
+    assert tf_func("a b") == {"n_y": "a"}
+    assert tf_func.map_batch(values) == {"n_y": ["a", "c"]}
+    plan = ExecutionPlan({"split": gtf})
+    (x, y) = (PropKey("A", "1", "n", "x"), PropKey("B", "1", "n", "y"))
+    assert plan.run({x: "a b"}, lambda hdl: tf_func) == {y: "a"}
+    assert plan.run_batch({x: values}, lambda hdl: tf_func) == {y: ["a", "c"]}
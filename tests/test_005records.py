@@ -0,0 +1,117 @@
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+
+
+def test_convert_records(samplesd, backend):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    cvtr = Converter(tmdf=tmdf, backend=backend)
+    records = [
+        {"study_personnel": {"personnel_name": "James Earl Jones",
+                             "email_address": "jej@example.com"},
+         "participant": {"race": "Asian"}},
+        {"participant": {"race": "Native American", "sex": "F"}},
+        {"study_personnel": {"personnel_name": "Sigismund Leonhart Popbutton",
+                             "email_address": "slp@example.com"},
+         "participant": {"race": "European"}},
+        {"diagnosis": {"age_at_diagnosis": 3650}},
+    ]
+    out = list(cvtr.convert_records(iter(records)))
+    assert len(out) == 4
+    assert out[0] == {
+        "investigator": {"first_name": "James", "middle_name": "Earl",
+                         "last_name": "Jones", "email": "jej@example.com"},
+        "participant": {"race": "GC:Asian"},
+    }
+    assert out[1] == {"participant": {"race": "GC:American Indian or Alaska Native"}}
+    assert out[2]["investigator"]["last_name"] == "Popbutton"
+    assert out[3] == {}
+    # records 0 and 2 share a shape, so share a plan
+    assert len(cvtr._state.record_plans) == 3
+    plan = cvtr.record_plan(frozenset([("participant", "race")]))
+    assert plan.handles == ["lookup_and_prefix"]
+
+
+def _io(model, version, node, prop):
+    return {"Model": model, "Version": version, "Node": node, "Props": [prop]}
+
+
+def _prefix_step(prefix):
+    return {"Package": {"Name": "bento_transforms"},
+            "Entrypoint": "tflib.string.add_prefix",
+            "Params": {"prefix": prefix}}
+
+
+def test_execution_plan(backend):
+    from bento_transforms.mdf.pymodels import GeneralTransform, IdentityTransform
+    from bento_transforms.converters.plan import ExecutionPlan, PropKey
+    gtfs = {
+        # declared out of order on purpose
+        "to_cds": GeneralTransform(
+            Inputs=[_io("CCDI", "3.1.0", "participant", "race")],
+            Outputs=[_io("CDS", "10.0.0", "participant", "race")],
+            Steps=[_prefix_step("cds:")]),
+        "tag_cds": GeneralTransform(
+            Inputs=[_io("CDS", "10.0.0", "participant", "race")],
+            Outputs=[_io("CDS", "10.0.0", "participant", "race")],
+            Steps=[_prefix_step("gc:")]),
+        "upgrade": IdentityTransform(
+            Inputs=[_io("CCDI", "1.6.0", "participant", "race")],
+            Outputs=[_io("CCDI", "3.1.0", "participant", "race")]),
+        "sex": IdentityTransform(
+            Inputs=[_io("CCDI", "1.6.0", "participant", "gender")],
+            Outputs=[_io("CDS", "10.0.0", "participant", "sex")]),
+    }
+    plan = ExecutionPlan(gtfs)
+    assert plan.stages == [["upgrade", "sex"], ["to_cds"], ["tag_cds"]]
+    assert plan.dependencies("tag_cds") == {"to_cds"}
+    race = PropKey("CDS", "10.0.0", "participant", "race")
+    assert plan.in_place == {"tag_cds": [race]}
+    assert set(plan.targets) == {race, PropKey("CDS", "10.0.0", "participant", "sex")}
+    assert "in place: CDS:10.0.0:participant.race" in plan.describe()
+
+    cvtr = Converter(gtfs=gtfs, backend=backend)
+    src = PropKey("CCDI", "1.6.0", "participant", "race")
+    assert plan.run({src: "Asian"}, cvtr.tfunction) == {race: "gc:cds:Asian"}
+    assert plan.run_batch({src: ["Asian", "Other"]}, cvtr.tfunction) == {
+        race: ["gc:cds:Asian", "gc:cds:Other"]}
+    # the record converter chains transforms through the plan
+    assert list(cvtr.convert_records([{"participant": {"race": "Asian",
+                                                       "gender": "F"}}])) == [
+        {"participant": {"race": "gc:cds:Asian", "sex": "F"}}]
+
+    gtfs["downgrade"] = IdentityTransform(
+        Inputs=[_io("CDS", "10.0.0", "participant", "race")],
+        Outputs=[_io("CCDI", "3.1.0", "participant", "race")])
+    with pytest.raises(RuntimeError, match="cyclic dependencies"):
+        ExecutionPlan(gtfs)
+
+
+def test_record_outputs(backend):
+    from bento_transforms.mdf.pymodels import GeneralTransform
+    from bento_transforms.converters.plan import PropKey
+    gtfs = {
+        "to_cds": GeneralTransform(
+            Inputs=[_io("CCDI", "3.1.0", "participant", "race")],
+            Outputs=[_io("CDS", "10.0.0", "participant", "race")],
+            Steps=[_prefix_step("cds:")]),
+        "race_code": GeneralTransform(
+            Inputs=[_io("CDS", "10.0.0", "participant", "race")],
+            Outputs=[_io("CDS", "10.0.0", "participant", "race_code")],
+            Steps=[_prefix_step("code:")]),
+    }
+    record = {"participant": {"race": "Asian"}}
+    expected = [{"participant": {"race": "cds:Asian",
+                                 "race_code": "code:cds:Asian"}}]
+    # race is read by race_code, but is still output
+    for to_model in (("CDS", "10.0.0"), None):
+        cvtr = Converter(gtfs=gtfs, backend=backend, to_model=to_model)
+        assert list(cvtr.convert_records([record])) == expected
+    race = PropKey("CDS", "10.0.0", "participant", "race")
+    assert cvtr.plan.targets == [race._replace(prop="race_code")]
+    assert cvtr.plan.outputs() == [race, race._replace(prop="race_code")]
+    assert cvtr.plan.outputs(("CCDI", "3.1.0")) == []
+    assert cvtr.plan.run({race._replace(model="CCDI", version="3.1.0"): "Asian"},
+                         cvtr.tfunction) == {race: "cds:Asian",
+                                             race._replace(prop="race_code"):
+                                             "code:cds:Asian"}
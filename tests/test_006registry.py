@@ -0,0 +1,59 @@
+import pytest
+from bento_transforms.mdf.pymodels import GeneralTransform, IdentityTransform
+from bento_transforms.converters.registry import ConverterRegistry
+
+
+def _io(mv, node, prop):
+    return {"Model": mv[0], "Version": mv[1], "Node": node, "Props": [prop]}
+
+
+def _ident(frm, to, node, prop, to_prop=None):
+    return IdentityTransform(Inputs=[_io(frm, node, prop)],
+                             Outputs=[_io(to, node, to_prop or prop)])
+
+
+CCDI16 = ("CCDI", "1.6.0")
+CCDI31 = ("CCDI", "3.1.0")
+CDS10 = ("CDS", "10.0.0")
+GC = ("GC", "10.0.1")
+
+
+def test_registry(samplesd):
+    prefix = {"Package": {"Name": "bento_transforms"},
+              "Entrypoint": "tflib.string.add_prefix",
+              "Params": {"prefix": "GC:"}}
+    registry = ConverterRegistry(
+        {"race": _ident(CCDI16, CCDI31, "participant", "race"),
+         "ethnicity": _ident(CCDI16, CCDI31, "participant", "ethnicity")},
+        {"race": _ident(CCDI31, CDS10, "participant", "race")},
+        {"race": GeneralTransform(
+            Inputs=[_io(CDS10, "participant", "race")],
+            Outputs=[_io(GC, "subject", "race")],
+            Steps=[prefix])},
+    )
+    # a direct crosswalk that is more expensive than the chain
+    registry.add({"race_direct": _ident(CCDI16, GC, "participant", "race")},
+                 cost=10)
+    assert (CCDI31, CDS10) in registry.model_pairs
+    assert registry.path(CCDI16, GC) == [(CCDI16, CCDI31), (CCDI31, CDS10),
+                                         (CDS10, GC)]
+    cvtr = registry.converter(CCDI16, GC)
+    assert cvtr is registry.converter(list(CCDI16), list(GC))
+    assert cvtr.from_model == CCDI16
+    assert cvtr.to_model == GC
+    # ethnicity has no route to GC, so it is not converted
+    assert sorted(cvtr.transforms) == ["race", "race@1", "race@2"]
+    out = list(cvtr.convert_records([{"participant": {"race": "Asian",
+                                                      "ethnicity": "Unknown"}}]))
+    assert out == [{"subject": {"race": "GC:Asian"}}]
+
+    # transforms read from MDF files are registered too
+    registry = ConverterRegistry(samplesd / "tf_func_test.yaml")
+    assert registry.model_pairs == [(CCDI31, CDS10)]
+    assert sorted(registry.converter(CCDI31, CDS10).transforms) == [
+        "fullname_to_fmlnames", "lookup_and_prefix",
+        "study_personnel_email_address_to_investigator_email"]
+    with pytest.raises(RuntimeError, match="No chain of transforms"):
+        registry.path(GC, CCDI16)
+    with pytest.raises(RuntimeError, match="to itself"):
+        registry.converter(CCDI31, CCDI31)
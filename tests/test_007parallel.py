@@ -0,0 +1,25 @@
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.converters.parallel import ParallelConverter
+
+
+def test_parallel_converter(samplesd, backend):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    cvtr = Converter(tmdf=tmdf, backend=backend)
+    names = [f"First{i} Middle{i} Last{i}" for i in range(25)]
+    races = ["Asian", "European", "Native American", "Other", "Klingon"] * 5
+    records = [{"study_personnel": {"personnel_name": n},
+                "participant": {"race": r}} for (n, r) in zip(names, races)]
+    with ParallelConverter(cvtr, workers=2, chunk_size=4) as pcvtr:
+        assert list(pcvtr.convert_records(iter(records))) == list(
+            cvtr.convert_records(records))
+        ret = pcvtr.map_batch("fullname_to_fmlnames", names)
+        assert ret == cvtr.tfunction("fullname_to_fmlnames").map_batch(names)
+        assert ret["investigator_last_name"][24] == "Last24"
+        assert pcvtr.map_batch("lookup_and_prefix",
+                               participant_race=races) == [
+            cvtr.tfunction("lookup_and_prefix")(r) for r in races]
+        assert pcvtr.map_batch("lookup_and_prefix", []) == []
+    with pytest.raises(RuntimeError, match="chunk_size"):
+        ParallelConverter(cvtr, chunk_size=0)
@@ -0,0 +1,91 @@
+import csv
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.manifests import convert_tsv_files, read_node_tsv
+from bento_transforms.cli import main
+
+
+def _write_tsv(path, rows):
+    with path.open("w", newline="") as fh:
+        w = csv.writer(fh, delimiter="\t", lineterminator="\n")
+        w.writerows(rows)
+
+
+def _read_tsv(path):
+    with path.open(newline="") as fh:
+        return list(csv.reader(fh, delimiter="\t"))
+
+
+@pytest.fixture
+def loadfiles(tmp_path):
+    srcd = tmp_path / "src"
+    srcd.mkdir()
+    _write_tsv(srcd / "study_personnel.tsv", [
+        ["type", "personnel_name", "email_address", "personnel_type"],
+        ["study_personnel", "James Earl Jones", "jej@example.com", "PI"],
+        ["study_personnel", "Sigismund Leonhart Popbutton", "", "PI"],
+    ])
+    # no type column: the node comes from the file name
+    _write_tsv(srcd / "participant.tsv", [
+        ["participant_id", "race"],
+        ["p1", "Asian"],
+        ["p2", "Pacific Islander"],
+        ["p3", "European"],
+        ["p4", ""],
+    ])
+    return [srcd / "study_personnel.tsv", srcd / "participant.tsv"]
+
+
+def test_read_node_tsv(loadfiles):
+    recs = list(read_node_tsv(loadfiles[0]))
+    assert recs[1] == {"study_personnel": {
+        "personnel_name": "Sigismund Leonhart Popbutton",
+        "personnel_type": "PI"}}
+    assert next(read_node_tsv(loadfiles[1])) == {
+        "participant": {"participant_id": "p1", "race": "Asian"}}
+
+
+def test_convert_tsv_files(samplesd, loadfiles, tmp_path):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    cvtr = Converter(tmdf=tmdf)
+    counts = convert_tsv_files(cvtr, loadfiles, tmp_path / "out", buffer_rows=2)
+    # p4 has no race, so no participant row
+    assert counts == {"investigator": 2, "participant": 3}
+    rows = _read_tsv(tmp_path / "out" / "investigator.tsv")
+    assert rows[0] == ["type", "email", "first_name", "middle_name", "last_name"]
+    assert rows[1] == ["investigator", "jej@example.com", "James", "Earl", "Jones"]
+    assert rows[2] == ["investigator", "", "Sigismund", "Leonhart", "Popbutton"]
+    rows = _read_tsv(tmp_path / "out" / "participant.tsv")
+    assert [r[1] for r in rows] == [
+        "race", "GC:Asian", "GC:Native Hawaiian or Other Pacific Islander",
+        "GC:White"]
+
+
+def test_cli_convert(samplesd, loadfiles, tmp_path):
+    outd = tmp_path / "cli_out"
+    assert main(["convert", "-t", str(samplesd / "tf_func_test.yaml"),
+                 "--mdf-schema", str(samplesd / "mdf-schema-tf.yaml"),
+                 "--backend", "compiled", "--workers", "2", "--chunk-size", "1",
+                 "-o", str(outd)] + [str(f) for f in loadfiles]) == 0
+    assert len(_read_tsv(outd / "participant.tsv")) == 4
+    # a blank name doesn't fire the name transform
+    _write_tsv(loadfiles[0], [["type", "personnel_name", "email_address"],
+                              ["study_personnel", "", "anon@example.com"]])
+    assert main(["convert", "-t", str(samplesd / "tf_func_test.yaml"),
+                 "--mdf-schema", str(samplesd / "mdf-schema-tf.yaml"),
+                 "-o", str(tmp_path / "blank")] + [str(loadfiles[0])]) == 0
+    assert _read_tsv(tmp_path / "blank" / "investigator.tsv")[1] == [
+        "investigator", "anon@example.com", "", "", ""]
+    assert _read_tsv(outd / "investigator.tsv")[1][2] == "James"
+
+
+def test_cli_convert_csv(samplesd, tmp_path):
+    src = tmp_path / "participant.csv"
+    src.write_text("race\nAsian\n")
+    outd = tmp_path / "out"
+    assert main(["convert", "-t", str(samplesd / "tf_func_test.yaml"),
+                 "--mdf-schema", str(samplesd / "mdf-schema-tf.yaml"),
+                 "--csv", "-o", str(outd), str(src)]) == 0
+    # CSV in, TSV out
+    assert (outd / "participant.tsv").read_text() == "type\trace\nparticipant\tGC:Asian\n"
@@ -0,0 +1,60 @@
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.converters.memo import LRUMemo
+from bento_transforms.tflib import string
+from bento_transforms.tflib.protocol import impure
+
+
+def test_lru_memo():
+    calls = []
+
+    def tf(x):
+        calls.append(x)
+        return [x, x]
+    tf.inputs = ["boog"]
+    memo = LRUMemo(tf, maxsize=2)
+    assert memo.inputs == ["boog"]
+    for x in ["a", "b", "a", "c", "b", "a"]:
+        assert memo(x) == [x, x]
+    # "b" was evicted by "c", then "a" by "b"
+    assert calls == ["a", "b", "c", "b", "a"]
+    assert memo.cache_info() == {"hits": 1, "misses": 5, "evictions": 3,
+                                 "uncacheable": 0, "size": 2, "maxsize": 2}
+    assert memo(["unhashable"]) == [["unhashable"], ["unhashable"]]
+    assert memo.uncacheable == 1
+    memo.cache_clear()
+    assert memo.cache_info()["size"] == 0
+    # inputs are cached with their types
+    assert memo(1) == [1, 1] and memo(True) == [True, True]
+    assert memo(x=1.0) == [1.0, 1.0] and memo(x=1) == [1, 1]
+    assert type(memo(x=1.0)[0]) is float
+    assert memo.cache_info()["misses"] == 4
+    with pytest.raises(RuntimeError, match="at least 1"):
+        LRUMemo(tf, maxsize=0)
+
+
+def test_converter_memo(samplesd, backend, monkeypatch):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    cvtr = Converter(tmdf=tmdf, backend=backend, memo_size=16,
+                     memo_sizes={"study_personnel_email_address_to_investigator_email": None})
+    races = ["Asian", "European", "Asian", "Asian", "European"]
+    tf = cvtr.tfunction("lookup_and_prefix")
+    assert [tf(r) for r in races] == ["GC:Asian", "GC:White", "GC:Asian",
+                                      "GC:Asian", "GC:White"]
+    ret = cvtr.tfunction("fullname_to_fmlnames")("A B C")
+    ret["investigator_first_name"] = "Z"  # callers can't change cached results
+    assert cvtr.tfunction("fullname_to_fmlnames")("A B C")["investigator_first_name"] == "A"
+    cvtr.tfunction("study_personnel_email_address_to_investigator_email")
+    stats = cvtr.memo_stats()
+    assert stats["lookup_and_prefix"]["hits"] == 3
+    assert stats["lookup_and_prefix"]["misses"] == 2
+    assert stats["fullname_to_fmlnames"]["hits"] == 1
+    assert "study_personnel_email_address_to_investigator_email" not in stats
+
+    # transforms with impure steps are never memoized
+    monkeypatch.setattr(string.concat_fields, "impure", True, raising=False)
+    cvtr = Converter(tmdf=tmdf, backend=backend, memo_size=16)
+    assert not isinstance(cvtr.tfunction("lookup_and_prefix"), LRUMemo)
+    assert isinstance(cvtr.tfunction("fullname_to_fmlnames"), LRUMemo)
+    assert impure(lambda x: x).impure
@@ -0,0 +1,91 @@
+import json
+import os
+import pytest
+from bento_transforms.mdf.pymodels import GeneralTransform
+from bento_transforms.tflib import lookup, tables
+from bento_transforms.tflib.tables import LookupTable, compile_table, open_table
+
+
+@pytest.fixture
+def mapping_files(tmp_path):
+    tsv = tmp_path / "icdo.tsv"
+    tsv.write_text("code\tterm\tsyn\n"
+                   "8000/3\tNeoplasm, malignant\tCancer\n"
+                   "8140/3\tAdenocarcinoma, NOS\tAdenoca\n"
+                   "8140/3\tDuplicate\tDup\n")
+    yml = tmp_path / "sex.yaml"
+    yml.write_text("Male: M\nfemale: F\n")
+    js = tmp_path / "empty.json"
+    js.write_text(json.dumps({}))
+    return {"tsv": tsv, "yaml": yml, "json": js}
+
+
+def test_lookup_table(mapping_files, tmp_path, monkeypatch):
+    idxd = tmp_path / "idx"
+    idx = compile_table(mapping_files["tsv"], index_dir=idxd)
+    assert compile_table(mapping_files["tsv"], index_dir=idxd) == idx
+    tbl = LookupTable(idx)
+    assert len(tbl) == 2
+    assert tbl.get("8140/3") == "Adenocarcinoma, NOS"
+    assert tbl.get("9999/9", "NA") == "NA"
+    assert list(tbl.items())[0] == ("8000/3", "Neoplasm, malignant")
+
+    rev = open_table(mapping_files["tsv"], value="syn", reverse=True,
+                     index_dir=idxd)
+    assert rev.get("Adenoca") == "8140/3"
+    assert rev.path != idx
+
+    ci = open_table(mapping_files["yaml"], case_insensitive=True, index_dir=idxd)
+    assert ci.get("FEMALE") == "F"
+    assert ci is open_table(mapping_files["yaml"], case_insensitive=True,
+                            index_dir=idxd)
+    assert len(open_table(mapping_files["json"], index_dir=idxd)) == 0
+    with pytest.raises(RuntimeError, match="icdo.tsv has no column 'name'"):
+        compile_table(mapping_files["tsv"], value="name", index_dir=idxd)
+
+    # a changed mapping file is recompiled
+    mapping_files["yaml"].write_text("Male: Man\n")
+    assert open_table(mapping_files["yaml"], index_dir=idxd).get("Male") == "Man"
+
+    # an unchanged file isn't read; a touched one is hashed, not recompiled
+    hashed = []
+    digest = tables._file_digest
+    monkeypatch.setattr(tables, "_file_digest",
+                        lambda p: hashed.append(p) or digest(p))
+    monkeypatch.setattr(tables, "read_mapping", None)
+    assert compile_table(mapping_files["tsv"], index_dir=idxd) == idx
+    assert hashed == []
+    st = mapping_files["tsv"].stat()
+    os.utime(mapping_files["tsv"], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert compile_table(mapping_files["tsv"], index_dir=idxd) == idx
+    assert compile_table(mapping_files["tsv"], index_dir=idxd) == idx
+    assert hashed == [mapping_files["tsv"]]
+    assert LookupTable(idx).get("8000/3") == "Neoplasm, malignant"
+
+
+def test_lookup_table_step(mapping_files, tmp_path, create_tf, monkeypatch):
+    params = {"file": str(mapping_files["yaml"]), "default": "Unknown",
+              "case_insensitive": True, "index_dir": str(tmp_path / "idx")}
+    assert lookup.table("male", params) == "M"
+    assert lookup.table(None, params) == "Unknown"
+    assert lookup.table("X", {**params, "passthrough": True}) == "X"
+    gtf = GeneralTransform(
+        Inputs=[{"Model": "CCDI", "Version": "3.1.0", "Node": "participant",
+                 "Props": ["sex_at_birth"]}],
+        Outputs=[{"Model": "CDS", "Version": "10.0.0", "Node": "participant",
+                  "Props": ["gender"]}],
+        Steps=[{"Package": {"Name": "bento_transforms"},
+                "Entrypoint": "tflib.lookup.table", "Params": params}])
+    tf_func = create_tf(gtf)
+    assert tf_func("Female") == "F"
+    assert tf_func.map_batch(["MALE", "female", "x", None]) == [
+        "M", "F", "Unknown", "Unknown"]
+    # scalar calls don't check the mapping file; batches do
+    open_ = lookup._open
+    monkeypatch.setattr(lookup, "_open", None)
+    assert tf_func("male") == "M"
+    monkeypatch.setattr(lookup, "_open", open_)
+    mapping_files["yaml"].write_text("Male: Man\n")
+    assert tf_func.map_batch(["male"]) == ["Man"]
+    assert tf_func("male") == "Man"
+    assert lookup.table("female", params) == "Unknown"
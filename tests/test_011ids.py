@@ -0,0 +1,41 @@
+import uuid
+import pytest
+from bento_transforms.tflib import ids
+from bento_transforms.tflib.pymodels import UuidNSEnum
+
+
+def test_uuid5_batch():
+    seeds = ["participant_1", ["study", None, 7], "", "é"]
+    for ns in UuidNSEnum:
+        expected = [str(uuid.uuid5(ids.NAMESPACES[ns], ids._seed(s)))
+                    for s in seeds]
+        assert ids.generate_uuid_batch(seeds, {"namespace": ns}) == expected
+        assert [ids.generate_uuid(s, {"namespace": ns}) for s in seeds] == expected
+    assert ids.generate_uuid("x", {}) == str(uuid.uuid5(uuid.NAMESPACE_DNS, "x"))
+
+
+def test_minter(tmp_path):
+    reg = tmp_path / "ids.jsonl"
+    minter = ids.UuidMinter("url", registry=reg)
+    minted = minter.mint(["a", "b", "a", ["c", 1]])
+    assert minted[0] == minted[2] == str(uuid.uuid5(uuid.NAMESPACE_URL, "a"))
+    assert minted[3] == str(uuid.uuid5(uuid.NAMESPACE_URL, "c_1"))
+    assert minter.duplicates == {"a": 2}
+    with pytest.raises(RuntimeError, match="more than once"):
+        minter.mint(["b", "b"], unique=True)
+
+    # a re-run reads the registry, dropping a partial last line
+    with reg.open("a") as fh:
+        fh.write('["d", "0000')
+    minter = ids.UuidMinter(UuidNSEnum.URL, registry=reg)
+    assert len(minter) == 3
+    assert minter.mint(["c_1", "d"])[0] == minted[3]
+    assert len(ids.UuidMinter("url", registry=reg)) == 4
+    with pytest.raises(RuntimeError, match="is for namespace"):
+        ids.UuidMinter("dns", registry=reg)
+
+    # collisions are detected
+    minter = ids.UuidMinter()
+    minter._seeds_by_id[ids.generate_uuid("e", {})] = "f"
+    with pytest.raises(RuntimeError, match="ID collision"):
+        minter.mint(["e"])
@@ -0,0 +1,39 @@
+import shutil
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters import tf_utils
+from bento_transforms.converters.bundle import BUNDLE_MAGIC, read_bundle
+from bento_transforms.converters.converter import Converter
+
+
+def test_bundle(samplesd, tmp_path, backend, monkeypatch):
+    src = tmp_path / "tf_func_test.yaml"
+    shutil.copy(samplesd / "tf_func_test.yaml", src)
+    cvtr = Converter(tmdf=TransformReader(src), backend=backend, memo_size=8)
+    assert cvtr.sources == [str(src)]
+    bundle = tmp_path / "tf.bundle"
+    cvtr.save_bundle(bundle)
+    assert bundle.read_bytes().startswith(BUNDLE_MAGIC)
+
+    # a fresh bundle is loaded without reading the sources
+    monkeypatch.setattr(tf_utils, "_step_methods", {})
+    monkeypatch.setattr(tf_utils, "_import_step_method", None)
+    monkeypatch.setattr(TransformReader, "__init__", None)
+    loaded = Converter.load_bundle(bundle)
+    assert loaded.transforms == cvtr.transforms
+    assert loaded.backend == backend
+    assert loaded.sources == [str(src.resolve())]
+    tf_func = loaded.convert("participant.race", "participant.race")
+    assert tf_func("Asian") == "GC:Asian"
+    assert loaded.memo_stats()["lookup_and_prefix"]["misses"] == 1
+    monkeypatch.undo()
+
+    # a changed source makes the bundle stale: it's rebuilt from the source
+    src.write_text(src.read_text().replace('prefix: "GC:"', 'prefix: "GX:"'))
+    assert read_bundle(bundle) is None
+    loaded = Converter.load_bundle(bundle, backend="reference")
+    assert loaded.tfunction("lookup_and_prefix")("Asian") == "GX:Asian"
+    assert read_bundle(bundle) is not None
+
+    with pytest.raises(RuntimeError, match="no source files"):
+        Converter.load_bundle(tmp_path / "nonesuch.bundle")
@@ -0,0 +1,36 @@
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.converters.index import TransformIndex
+
+
+def test_transform_index(samplesd):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    idx = Converter(tmdf=tmdf).index
+    assert len(idx) == len(tmdf.transforms)
+    assert idx.find(["participant.race"], ["participant.race"]) == "lookup_and_prefix"
+    assert idx.find(["study_personnel.personnel_name"],
+                    ["investigator.last_name", "investigator.first_name",
+                     "investigator.middle_name"]) == "fullname_to_fmlnames"
+    assert idx.find(["participant.race"], []) is None
+    assert idx.producers("investigator.email") == [
+        "study_personnel_email_address_to_investigator_email"]
+    assert idx.readers("study_personnel.*") == [
+        "study_personnel_email_address_to_investigator_email",
+        "fullname_to_fmlnames"]
+    assert idx.producers("investigator.*") == idx.readers("study_personnel.*")
+    assert idx.by_node("participant") == ["lookup_and_prefix"]
+    assert set(idx.by_model("CCDI")) == set(tmdf.transforms)
+    assert idx.by_model("CDS", "9.0.0") == []
+    assert idx.by_entrypoint("string.concat_fields") == ["lookup_and_prefix"]
+    assert idx.input_models().most_common(1)[0][0] == ("CCDI", "3.1.0")
+    with pytest.raises(RuntimeError, match="Expected 'node.prop'"):
+        idx.readers("participant")
+
+    # a lazy reader's index is built without building transforms
+    lazy = TransformReader(samplesd / "tf_func_test.yaml", lazy=True)
+    lidx = TransformIndex(lazy.transforms)
+    assert lazy.transforms.built == 0
+    for hdl in tmdf.transforms:
+        assert lidx.io(hdl) == idx.io(hdl)
+    assert lidx.by_entrypoint("string.split") == ["fullname_to_fmlnames"]
@@ -0,0 +1,43 @@
+import os
+import shutil
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_reload(samplesd, tmp_path, lazy):
+    src = tmp_path / "tf.yaml"
+    shutil.copy(samplesd / "tf_func_test.yaml", src)
+    cvtr = Converter(tmdf=TransformReader(src, lazy=lazy), memo_size=8)
+    prefix = cvtr.tfunction("lookup_and_prefix")
+    names = cvtr.tfunction("fullname_to_fmlnames")
+    names("A B C")
+    records = cvtr.convert_records([{"participant": {"race": "Asian"}}] * 2)
+    assert next(records)["participant"]["race"] == "GC:Asian"
+    assert cvtr.reload() == []
+
+    # touching a file without changing it doesn't reload
+    os.utime(src, ns=(1, 1))
+    assert cvtr.reload() == []
+    assert cvtr.tfunction("lookup_and_prefix") is prefix
+
+    src.write_text(src.read_text().replace('prefix: "GC:"', 'prefix: "GX:"'))
+    assert cvtr.reload() == ["lookup_and_prefix"]
+    assert cvtr.tfunction("lookup_and_prefix")("Asian") == "GX:Asian"
+    assert cvtr.convert("participant.race", "participant.race")("Asian") == "GX:Asian"
+    # unchanged transforms keep their functions and caches
+    assert cvtr.tfunction("fullname_to_fmlnames") is names
+    assert cvtr.memo_stats()["fullname_to_fmlnames"]["misses"] == 1
+    # conversions in progress finish with the transforms they started with
+    assert next(records)["participant"]["race"] == "GC:Asian"
+
+    # a bad change is refused, and the converter keeps working
+    src.write_text(src.read_text().replace("string.concat_fields",
+                                           "string.nonesuch"))
+    with pytest.raises(RuntimeError, match="has no method"):
+        cvtr.reload()
+    assert cvtr.tfunction("lookup_and_prefix")("Asian") == "GX:Asian"
+
+    with pytest.raises(RuntimeError, match="no source files"):
+        Converter(gtfs=cvtr.transforms).reload()
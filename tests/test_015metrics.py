@@ -0,0 +1,56 @@
+import json
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.converters.metrics import Instrumentation
+
+
+def test_instrumentation(samplesd, backend):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    # no instrumentation: functions are built unwrapped
+    cvtr = Converter(tmdf=tmdf, backend=backend)
+    assert cvtr.instrumentation is None
+    assert not hasattr(cvtr.tfunction("lookup_and_prefix"), "__wrapped__")
+
+    instr = Instrumentation()
+    cvtr = Converter(tmdf=tmdf, backend=backend, instrumentation=instr)
+    tf = cvtr.tfunction("lookup_and_prefix")
+    assert tf.inputs == tmdf.transforms["lookup_and_prefix"].Inputs
+    assert [tf(r) for r in ["Asian", "European", "Asian"]] == [
+        "GC:Asian", "GC:White", "GC:Asian"]
+    stats = instr.to_dict()
+    assert stats["transforms"]["lookup_and_prefix"]["calls"] == 3
+    assert stats["transforms"]["lookup_and_prefix"]["timed"] == 3
+    assert stats["steps"]["lookup.race_ccdi_to_cds"]["calls"] == 3
+    assert stats["steps"]["string.concat_fields"]["calls"] == 3
+    assert tf.map_batch(["Asian", "European"]) == ["GC:Asian", "GC:White"]
+    assert instr.batches["lookup_and_prefix"].calls == 1
+    assert instr.batches["lookup_and_prefix"].rows == 2
+    with pytest.raises(RuntimeError, match="Invalid input"):
+        tf(boog="Asian")
+    assert instr.transforms["lookup_and_prefix"].errors == 1
+    assert json.loads(instr.to_json())["sample_every"] == 1
+
+    prom = instr.to_prometheus()
+    assert "# TYPE bento_transforms_calls_total counter" in prom
+    assert "# TYPE bento_transforms_est_seconds gauge" in prom
+    assert "est_seconds_total" not in prom
+    assert ('bento_transforms_calls_total{kind="transform",'
+            'name="lookup_and_prefix"} 4') in prom
+    assert 'kind="step",name="lookup.race_ccdi_to_cds"' in prom
+    instr.reset()
+    assert instr.transforms["lookup_and_prefix"].calls == 0
+
+
+def test_instrumentation_sampling(samplesd, backend):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    instr = Instrumentation(sample_every=4)
+    cvtr = Converter(tmdf=tmdf, backend=backend, instrumentation=instr)
+    tf = cvtr.tfunction("fullname_to_fmlnames")
+    for _ in range(10):
+        tf("A B C")
+    stats = instr.transforms["fullname_to_fmlnames"]
+    assert (stats.calls, stats.timed) == (10, 2)
+    assert stats.est_seconds == pytest.approx(stats.seconds * 5)
+    with pytest.raises(RuntimeError, match="at least 1"):
+        Instrumentation(sample_every=0)
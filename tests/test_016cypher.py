@@ -0,0 +1,46 @@
+from itertools import count
+import pytest
+from cypher_graph import mdb_graph
+from bento_transforms.mdf import TransformReader
+from bento_transforms.graph import mc_utils
+from bento_transforms.graph.meta import TransformModel
+
+
+def test_batched_upsert(samplesd, monkeypatch):
+    tmdf = TransformReader(samplesd / "transforms.yaml", handle='transforms')
+    tmdl = TransformModel(tmdf.transforms)
+
+    def run(emit):
+        ids = count()
+        monkeypatch.setattr(mc_utils, "make_nanoid", lambda: f"id{next(ids)}")
+        g = mdb_graph(tmdl)
+        for stmt in emit():
+            if isinstance(stmt, tuple):
+                g.run(*stmt)
+            else:
+                g.run(stmt)
+        return g
+
+    expected = run(tmdl.cypher_for_upsert)
+    (nodes, rels) = expected.canonical()
+    assert sum(1 for n in nodes if n[0] == "transform") == len(tmdl.transforms)
+    assert any(r[0] == "next_tf_step" for r in rels)
+    assert any(r[0] == "value_as_tf_input" for r in rels)
+    assert any(r[0] == "tf_output_as_value" for r in rels)
+    assert {r[3] for r in rels if r[0] == "tf_output_as_value"} == {
+        (("position", i),) for i in range(3)}
+
+    stmts = tmdl.cypher_for_upsert_batched()
+    assert len(stmts) < len(tmdl.cypher_for_upsert()) / 5
+    assert all(s.startswith("UNWIND $rows AS row ") for (s, _) in stmts)
+    # each property is matched once
+    io_rows = [row for (s, p) in stmts if "tf_output_as_value" in s
+               or "value_as_tf_input" in s for row in p["rows"]]
+    assert len(io_rows) == len(tmdl.props)
+    assert run(tmdl.cypher_for_upsert_batched).canonical() == (nodes, rels)
+    chunked = tmdl.cypher_for_upsert_batched(batch_size=2)
+    assert max(len(p["rows"]) for (_, p) in chunked) == 2
+    assert run(lambda: tmdl.cypher_for_upsert_batched(batch_size=2)
+               ).canonical() == (nodes, rels)
+    with pytest.raises(RuntimeError, match="at least 1"):
+        tmdl.cypher_for_upsert_batched(batch_size=0)
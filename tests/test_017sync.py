@@ -0,0 +1,106 @@
+from cypher_graph import mdb_graph
+from bento_transforms.mdf import TransformReader
+from bento_transforms.graph.meta import TransformModel
+from bento_transforms.graph.sync import (
+    FINGERPRINT_QUERY,
+    read_snapshot,
+    stored_fingerprints,
+    transform_fingerprint,
+    write_snapshot,
+)
+
+
+def summary(g):
+    """Each transform's steps (in order, without nanoids) and I/O properties"""
+    ret = {}
+    for (nid, (label, props)) in g.nodes.items():
+        if label != "transform":
+            continue
+        steps = []
+        nxt = [b for (t, a, b) in g.rels if t == "first_tf_step" and a == nid]
+        while nxt:
+            steps.append({k: v for (k, v) in g.nodes[nxt[0]][1].items()
+                          if k != "nanoid"})
+            nxt = [b for (t, a, b) in g.rels if t == "next_tf_step" and a == nxt[0]]
+        ins = {g.nodes[a][1]["handle"] for (t, a, b) in g.rels
+               if t == "value_as_tf_input" and b == nid}
+        outs = {g.nodes[b][1]["handle"] for (t, a, b) in g.rels
+                if t == "tf_output_as_value" and a == nid}
+        ret[props["handle"]] = (props.get("fingerprint"), steps, ins, outs)
+    return ret
+
+
+def test_sync(samplesd, tmp_path):
+    gtfs = dict(TransformReader(samplesd / "transforms.yaml",
+                                handle='transforms').transforms)
+    tmdl = TransformModel(gtfs)
+    assert transform_fingerprint(gtfs["fullname_to_fmlnames"]) == \
+        tmdl.fingerprints["fullname_to_fmlnames"]
+
+    g = mdb_graph(tmdl)
+    plan = tmdl.sync_plan({})
+    assert plan.added == list(gtfs)
+    for stmt in plan.statements(batch_size=3):
+        g.run(*stmt)
+    stored = stored_fingerprints(g.run(FINGERPRINT_QUERY))
+    assert stored == tmdl.fingerprints
+    # nothing to do the second time
+    plan = tmdl.sync_plan(stored)
+    assert not plan and plan.statements() == []
+    assert plan.unchanged == list(gtfs)
+
+    # change params, remove and add a transform
+    new = dict(gtfs)
+    new["fullname_to_fmlnames"] = gtfs["fullname_to_fmlnames"].model_copy(deep=True)
+    new["fullname_to_fmlnames"].Steps[0].Params = {"delimiter": ","}
+    removed = next(hdl for hdl in gtfs if hdl != "fullname_to_fmlnames")
+    del new[removed]
+    new["copied"] = gtfs["fullname_to_fmlnames"]
+    ntmdl = TransformModel(new)
+    plan = ntmdl.sync_plan(stored, prune=True)
+    assert plan.added == ["copied"]
+    assert plan.changed == ["fullname_to_fmlnames"]
+    assert plan.removed == [removed]
+    assert not ntmdl.sync_plan(stored).removed
+    stmts = plan.statements()
+    assert len(stmts) < len(ntmdl.cypher_for_upsert_batched())
+    for stmt in stmts:
+        g.run(*stmt)
+
+    # same as syncing the new spec to an empty MDB
+    fresh = mdb_graph(ntmdl)
+    for stmt in ntmdl.sync_plan({}).statements():
+        fresh.run(*stmt)
+    assert summary(g) == summary(fresh)
+    # the old transform's steps went with it
+    assert len([n for n in g.nodes.values() if n[0] == "tf_step"]) == \
+        len([n for n in fresh.nodes.values() if n[0] == "tf_step"])
+    assert stored_fingerprints(g.run(FINGERPRINT_QUERY)) == ntmdl.fingerprints
+
+    # transforms loaded without fingerprints, or twice, are replaced
+    assert stored_fingerprints([{"handle": "a", "fingerprint": "x"},
+                                {"handle": "a", "fingerprint": "x"},
+                                {"handle": "b", "fingerprint": None}]) == \
+        {"a": None, "b": None}
+
+    snap = tmp_path / "snap" / "fingerprints.json"
+    assert read_snapshot(snap) == {}
+    write_snapshot(snap, plan.fingerprints)
+    assert read_snapshot(snap) == ntmdl.fingerprints
+
+
+def test_sync_shared_mdb(samplesd):
+    gtfs = dict(TransformReader(samplesd / "transforms.yaml",
+                                handle='transforms').transforms)
+    tmdl = TransformModel(gtfs)
+    g = mdb_graph(tmdl)
+    for stmt in tmdl.sync_plan({}).statements():
+        g.run(*stmt)
+    # another spec, synced to the same MDB, leaves these transforms alone
+    other = TransformModel({"copied": gtfs["fullname_to_fmlnames"]})
+    plan = other.sync_plan(stored_fingerprints(g.run(FINGERPRINT_QUERY)))
+    assert plan.added == ["copied"] and not plan.removed
+    for stmt in plan.statements():
+        g.run(*stmt)
+    assert stored_fingerprints(g.run(FINGERPRINT_QUERY)) == {
+        **tmdl.fingerprints, **other.fingerprints}
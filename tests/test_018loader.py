@@ -0,0 +1,77 @@
+import json
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.graph import loader
+from bento_transforms.graph.loader import TransformLoader, build_transforms
+
+
+class FakeResult:
+    def __init__(self, records):
+        self._records = records
+
+    def data(self):
+        return [dict(rec) for rec in self._records]
+
+
+class FakeDriver:
+    """Serves recorded query results, as a neo4j driver would"""
+    def __init__(self, recorded):
+        self.recorded = recorded
+        self.sessions = 0
+        self.queries = []
+
+    def session(self, database=None):
+        self.sessions += 1
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_read(self, work):
+        return work(self)
+
+    def run(self, qry, parameters=None):
+        self.queries.append(qry)
+        return FakeResult(self.recorded[qry])
+
+
+@pytest.fixture
+def recorded(samplesd):
+    with (samplesd / "mdb_transforms.json").open() as fh:
+        recs = json.load(fh)
+    return {loader.TRANSFORMS_QUERY: recs["transforms"],
+            loader.STEPS_QUERY: recs["steps"],
+            loader.INPUTS_QUERY: recs["inputs"],
+            loader.OUTPUTS_QUERY: recs["outputs"]}
+
+
+def test_loader(samplesd, recorded):
+    expected = TransformReader(samplesd / "transforms.yaml",
+                               handle='transforms').transforms
+    driver = FakeDriver(recorded)
+    gtfs = TransformLoader(driver).load()
+    assert gtfs == dict(expected)
+    assert list(gtfs["fullname_to_fmlnames"].Outputs[0].Props) == \
+        ["first_name", "middle_name", "last_name"]
+    assert driver.sessions == 1
+    assert len(driver.queries) == 4
+
+    cvtr = Converter(gtfs=gtfs)
+    assert cvtr.convert("study_personnel.personnel_name",
+                        ["investigator.first_name", "investigator.middle_name",
+                         "investigator.last_name"])("A B C") == {
+        "investigator_first_name": "A", "investigator_middle_name": "B",
+        "investigator_last_name": "C"}
+
+
+def test_loader_errors(recorded):
+    recs = [recorded[q] for q in (loader.TRANSFORMS_QUERY, loader.STEPS_QUERY,
+                                  loader.INPUTS_QUERY, loader.OUTPUTS_QUERY)]
+    with pytest.raises(RuntimeError, match="more than once"):
+        build_transforms(recs[0] + [dict(recs[0][0], tf="other")], *recs[1:])
+    with pytest.raises(RuntimeError, match="no steps"):
+        build_transforms(recs[0], [], *recs[2:])
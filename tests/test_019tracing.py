@@ -0,0 +1,85 @@
+import json
+import pytest
+from bento_transforms.mdf import TransformReader
+from bento_transforms.converters.converter import Converter
+from bento_transforms.converters.metrics import Instrumentation
+from bento_transforms.converters.tracing import (
+    JsonlExporter,
+    RingBuffer,
+    TraceHook,
+    Tracer,
+    params_digest,
+)
+
+RECORDS = [
+    {"study_personnel": {"personnel_name": "James Earl Jones"},
+     "participant": {"race": "Asian"}},
+    {"participant": {"race": "European"}},
+    {"participant": {"race": "Asian"}},
+]
+
+
+def test_tracing(samplesd, backend, tmp_path):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    # no hooks: nothing is wrapped
+    cvtr = Converter(tmdf=tmdf, backend=backend, tracer=Tracer())
+    assert cvtr.tracer is None
+    assert not hasattr(cvtr.tfunction("lookup_and_prefix"), "__wrapped__")
+
+    ring = RingBuffer(maxlen=100)
+    events = []
+
+    class Starts(TraceHook):
+        def on_step_start(self, span):
+            events.append(span["entrypoint"])
+
+    with JsonlExporter(tmp_path / "spans.jsonl") as exporter:
+        cvtr = Converter(tmdf=tmdf, backend=backend,
+                         tracer=Tracer(ring, Starts(), exporter, capture_values=True))
+        out = list(cvtr.convert_records(RECORDS))
+    assert out[1] == {"participant": {"race": "GC:White"}}
+    spans = ring.spans()
+    with (tmp_path / "spans.jsonl").open() as fh:
+        assert [json.loads(line)["handle"] for line in fh] == \
+            [s["handle"] for s in spans]
+    assert {s["trace"] for s in spans} == {0, 1, 2}
+    lookup = [s for s in spans if s["trace"] == 1]
+    # steps end before their transform
+    assert [(s["kind"], s["entrypoint"]) for s in lookup] == [
+        ("step", "lookup.race_ccdi_to_cds"), ("step", "string.concat_fields"),
+        ("transform", None)]
+    assert lookup[0]["inputs"] == ["European"]
+    assert lookup[-1]["output"] == "GC:White"
+    assert lookup[-1]["error"] is None and lookup[-1]["duration"] >= 0
+    split = next(s for s in spans if s["entrypoint"] == "string.split")
+    assert split["params"] == params_digest({"delimiter": " "})
+    assert "string.split" in events
+
+
+def test_tracing_sampling(samplesd, backend):
+    tmdf = TransformReader(samplesd / "tf_func_test.yaml", handle='transforms')
+    ring = RingBuffer()
+    instr = Instrumentation()
+    cvtr = Converter(tmdf=tmdf, backend=backend, instrumentation=instr,
+                     tracer=Tracer(ring, sample_every=2))
+    list(cvtr.convert_records(RECORDS))
+    # records 0 and 2 are traced, whole
+    assert {s["trace"] for s in ring.spans()} == {0, 2}
+    assert [s["handle"] for s in ring.spans() if s["kind"] == "transform"] == [
+        "fullname_to_fmlnames", "lookup_and_prefix", "lookup_and_prefix"]
+    assert "inputs" not in ring.spans()[0]
+    # counted whether traced or not
+    assert instr.transforms["lookup_and_prefix"].calls == 3
+
+    # outside convert_records, each call is sampled
+    ring.clear()
+    tf = cvtr.tfunction("lookup_and_prefix")
+    for race in ["Asian"] * 4:
+        tf(race)
+    assert len([s for s in ring.spans() if s["kind"] == "transform"]) == 2
+    tf("Asian")
+    with pytest.raises(RuntimeError, match="Invalid input"):
+        tf(boog="Asian")
+    assert ring.spans()[-1]["error"].startswith("RuntimeError")
+    with pytest.raises(RuntimeError, match="at least 1"):
+        Tracer(ring, sample_every=0)